@@ -0,0 +1,119 @@
+"""
+Burst load on a simulated local model host, with and without admission control.
+
+The simulated backend (think one Ollama host) shares its throughput among the runs in
+flight; beyond --parallel concurrent runs it also loses throughput (KV cache and memory
+pressure), so unbounded concurrency makes every run slower. A burst of --runs runs from
+--clients clients (the first client sends half of them) is sent either straight to the
+backend or through AdmissionController with --limit slots and a --queue sized queue:
+
+    python -m benchmarks.bench_admission --runs 48 --clients 6 --parallel 4 --limit 4
+
+Reported per mode: wall time, run latency percentiles, runs shed, and the p50 latency of
+the clients other than the bursty one (fairness).
+"""
+import argparse
+import asyncio
+import time
+
+from src.api.admission import AdmissionController, AdmissionRejected
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class SimulatedBackend:
+    """Processor sharing with an overload penalty, advanced in small ticks."""
+    def __init__(self, parallel: int, work_ms: float, penalty: float, tick_ms: float = 2.0):
+        self.parallel = parallel
+        self.work_ms = work_ms
+        self.penalty = penalty
+        self.tick = tick_ms / 1000
+        self.active = {}  # future -> remaining work (ms of solo service)
+
+    def throughput(self) -> float:
+        """Units of solo service delivered per ms of wall time."""
+        n = len(self.active)
+        if n <= self.parallel:
+            return float(max(n, 1))
+        return self.parallel / (1 + self.penalty * (n - self.parallel) / self.parallel)
+
+    async def serve(self):
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.tick)
+            now = time.perf_counter()
+            elapsed_ms, last = (now - last) * 1000, now
+            if not self.active:
+                continue
+            share = self.throughput() * elapsed_ms / len(self.active)
+            for future in list(self.active):
+                self.active[future] -= share
+                if self.active[future] <= 0:
+                    del self.active[future]
+                    future.set_result(None)
+
+    async def call(self):
+        future = asyncio.get_running_loop().create_future()
+        self.active[future] = self.work_ms
+        await future
+
+async def burst(args, controller=None):
+    backend = SimulatedBackend(args.parallel, args.work_ms, args.penalty)
+    server = asyncio.create_task(backend.serve())
+    latencies, others, shed = [], [], 0
+    # Client 0 is bursty: it sends half of the runs
+    clients = [0 if i % 2 == 0 else 1 + i % (args.clients - 1) for i in range(args.runs)]
+
+    async def run(client):
+        nonlocal shed
+        started = time.perf_counter()
+        try:
+            if controller is None:
+                await backend.call()
+            else:
+                async with controller.admit("ollama", f"client-{client}"):
+                    await backend.call()
+        except AdmissionRejected:
+            shed += 1
+            return
+        latency = (time.perf_counter() - started) * 1000
+        latencies.append(latency)
+        if client:
+            others.append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(client) for client in clients))
+    wall = time.perf_counter() - started
+    server.cancel()
+    return wall, latencies, others, shed
+
+async def main_async(args):
+    print(f"{args.runs} runs from {args.clients} clients, {args.work_ms:g} ms of work each, "
+          f"backend parallelism {args.parallel}, overload penalty {args.penalty:g}\n")
+    print(f"{'mode':>20} {'wall s':>7} {'p50 ms':>8} {'p99 ms':>8} {'others p50':>10} {'shed':>5}")
+    modes = [
+        ("unbounded", None),
+        (f"admission {args.limit}/{args.runs}", AdmissionController(args.limit, args.runs, timeout=600)),
+        (f"admission {args.limit}/{args.queue}", AdmissionController(args.limit, args.queue, timeout=600)),
+    ]
+    for name, controller in modes:
+        wall, latencies, others, shed = await burst(args, controller)
+        print(f"{name:>20} {wall:>7.2f} {percentile(latencies, 50):>8.0f} {percentile(latencies, 99):>8.0f} "
+              f"{percentile(others, 50):>10.0f} {shed:>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=48)
+    parser.add_argument("--clients", type=int, default=6)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--work-ms", type=float, default=100.0)
+    parser.add_argument("--penalty", type=float, default=0.5)
+    parser.add_argument("--limit", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=16)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
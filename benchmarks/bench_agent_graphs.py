@@ -0,0 +1,79 @@
+"""
+Per-request setup cost of chatting with an agent, with and without the compiled graph cache.
+
+Without the cache every request loads the Agent record (simulated with --load-ms of
+database latency) and compiles a graph with its profile; with AgentGraphRegistry only
+the first request per agent does, and the rest are a dictionary lookup:
+
+    python -m benchmarks.bench_agent_graphs --agents 20 --requests 2000 --load-ms 2
+
+Checkpointing is switched off (CHECKPOINT_BACKEND=off) unless set in the environment;
+it does not change the cost of compiling.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("CHECKPOINT_BACKEND", "off")
+
+from src.agent.agent_graphs import AgentGraphRegistry, build_profile
+from src.agent.graph import build_graph
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def make_agents(count: int):
+    return {
+        f"agent-{i}": SimpleNamespace(
+            id=f"agent-{i}", name=f"Agent {i}", role="Analyst", goal="Answer questions.", backstory="You are careful.",
+            tools=[f"tool_{i}", "search_web"], enabled=True, speculation="off", model_type="fast",
+        )
+        for i in range(count)
+    }
+
+async def run(args):
+    agents = make_agents(args.agents)
+    rng = random.Random(0)
+    requests = [rng.choice(list(agents)) for _ in range(args.requests)]
+
+    async def load(agent_id):
+        await asyncio.sleep(args.load_ms / 1000)
+        return agents[agent_id]
+
+    async def uncached(agent_id):
+        return build_graph(build_profile(await load(agent_id)))
+
+    registry = AgentGraphRegistry(max_size=args.agents, ttl=3600)
+
+    async def cached(agent_id):
+        return await registry.get(agent_id, lambda: load(agent_id))
+
+    print(f"{args.requests} requests over {args.agents} agents, {args.load_ms} ms per agent load\n")
+    print(f"{'setup':>10} {'total s':>8} {'p50 ms':>8} {'p99 ms':>8} {'compiles':>8}")
+    for name, setup in (("per-request", uncached), ("cached", cached)):
+        latencies = []
+        started = time.perf_counter()
+        for agent_id in requests:
+            t0 = time.perf_counter()
+            await setup(agent_id)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        total = time.perf_counter() - started
+        compiles = registry.stats()["compiles"] if setup is cached else len(requests)
+        print(f"{name:>10} {total:>8.2f} {percentile(latencies, 50):>8.3f} {percentile(latencies, 99):>8.3f} {compiles:>8}")
+
+    stats = registry.stats()
+    print(f"\ncache: hit rate {stats['hit_rate']:.1%}, average compile {stats['avg_compile_ms']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--load-ms", type=float, default=2.0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
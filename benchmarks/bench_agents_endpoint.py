@@ -0,0 +1,188 @@
+"""
+Benchmark: GET /agents latency with a per-request driver vs. the shared async driver.
+
+Runs entirely in-process against a local stand-in for Neo4j that simulates the
+connection handshake and query round trip, so no database is needed:
+
+    python -m benchmarks.bench_agents_endpoint --requests 500 --rate 300
+
+Load is open-loop: request i is scheduled at i / rate seconds and its latency is
+measured from that scheduled time, so time spent queued behind a blocked event
+loop counts against the handler that blocked it.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from src.api.routers import agents
+from src.utils.database import get_db_driver
+
+AGENT_ROWS = [
+    {"a": {"id": f"agent-{i}", "name": f"Agent {i}", "role": "Tester", "goal": "Benchmark",
+           "backstory": "Synthetic", "tools": [], "enabled": True}}
+    for i in range(20)
+]
+
+# --- Stand-in for the legacy synchronous driver (new driver + blocking query per request) ---
+
+class FakeSyncSession:
+    def __init__(self, handshake: float, rtt: float):
+        self.handshake = handshake
+        self.rtt = rtt
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        # A fresh driver has no pooled connection: pay the handshake, then the round trip.
+        time.sleep(self.handshake + self.rtt)
+        return list(AGENT_ROWS)
+
+class FakeSyncDriver:
+    def __init__(self, handshake: float, rtt: float):
+        self.handshake = handshake
+        self.rtt = rtt
+
+    def session(self):
+        return FakeSyncSession(self.handshake, self.rtt)
+
+    def close(self):
+        pass
+
+# --- Stand-in for the shared AsyncDriver (pooled connections, non-blocking I/O) ---
+
+class FakeAsyncResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __aiter__(self):
+        self._iter = iter(self._rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class FakeAsyncSession:
+    def __init__(self, driver: "FakeAsyncDriver"):
+        self.driver = driver
+
+    async def __aenter__(self):
+        await self.driver.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.driver.release()
+        return False
+
+    async def run(self, query, **params):
+        await asyncio.sleep(self.driver.rtt)
+        return FakeAsyncResult(AGENT_ROWS)
+
+class FakeAsyncDriver:
+    def __init__(self, pool_size: int, handshake: float, rtt: float):
+        self.handshake = handshake
+        self.rtt = rtt
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle = 0
+
+    async def acquire(self):
+        await self._slots.acquire()
+        if self._idle:
+            self._idle -= 1
+        else:
+            # Pool grows lazily: only brand-new connections pay the handshake
+            await asyncio.sleep(self.handshake)
+
+    def release(self):
+        self._idle += 1
+        self._slots.release()
+
+    def session(self):
+        return FakeAsyncSession(self)
+
+def build_legacy_app(handshake: float, rtt: float) -> FastAPI:
+    """Replica of the original handler: new driver and a blocking session.run per request."""
+    app = FastAPI()
+
+    @app.get("/agents/", response_model=list[agents.AgentResponse])
+    async def list_agents():
+        driver = FakeSyncDriver(handshake, rtt)
+        try:
+            with driver.session() as session:
+                result = session.run("MATCH (a:Agent) RETURN a")
+                return [agents.AgentResponse(**record["a"]) for record in result]
+        finally:
+            driver.close()
+
+    return app
+
+def build_shared_app(pool_size: int, handshake: float, rtt: float) -> FastAPI:
+    app = FastAPI()
+    app.include_router(agents.router)
+    driver = FakeAsyncDriver(pool_size, handshake, rtt)
+    app.dependency_overrides[get_db_driver] = lambda: driver
+    return app
+
+async def run_load(app: FastAPI, total: int, rate: float) -> list:
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        origin = time.perf_counter()
+
+        async def one(i: int):
+            scheduled = origin + i / rate
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            response = await client.get("/agents/")
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+            assert response.status_code == 200, response.text
+
+        await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(label: str, latencies: list, wall: float):
+    print(f"{label:<28} p50={percentile(latencies, 50):8.2f} ms  "
+          f"p99={percentile(latencies, 99):8.2f} ms  "
+          f"mean={statistics.mean(latencies):8.2f} ms  "
+          f"throughput={len(latencies) / wall:8.1f} req/s")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=200.0, help="Requests per second")
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=5.0)
+    parser.add_argument("--rtt-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    handshake = args.handshake_ms / 1000
+    rtt = args.rtt_ms / 1000
+
+    print(f"GET /agents x{args.requests} ({args.rate:.0f} req/s, "
+          f"handshake {args.handshake_ms} ms, rtt {args.rtt_ms} ms)")
+
+    for label, app in (
+        ("before: driver per request", build_legacy_app(handshake, rtt)),
+        ("after: shared async driver", build_shared_app(args.pool_size, handshake, rtt)),
+    ):
+        start = time.perf_counter()
+        latencies = await run_load(app, args.requests, args.rate)
+        report(label, latencies, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    asyncio.run(main())
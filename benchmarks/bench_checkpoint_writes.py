@@ -0,0 +1,69 @@
+"""
+Benchmark: checkpoint write volume of a long agent run, full vs delta writes.
+
+Runs a graph shaped like the agent loop (every step appends an assistant message and a
+~--message-kb tool result to `messages`) for --steps steps with the SQLite checkpointer,
+once writing every changed channel in full (delta_chain_max=0, what a plain saver does)
+and once with delta writes, then times a resume-style load of the latest state:
+
+    python -m benchmarks.bench_checkpoint_writes --steps 100 --message-kb 2
+"""
+import argparse
+import operator
+import tempfile
+import time
+from pathlib import Path
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, END
+
+from src.agent.checkpoint import DeltaCheckpointSaver, SQLiteCheckpointStore
+
+class State(TypedDict):
+    messages: Annotated[List, operator.add]
+    steps: int
+
+def build(saver, steps: int, payload: str):
+    def agent(state: State):
+        step = state["steps"] + 1
+        return {"messages": [AIMessage(content=f'{{"tool": "read_file", "args": {{"n": {step}}}}}'),
+                             AIMessage(content=f"Tool Result: {step} {payload}")], "steps": step}
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent", agent)
+    workflow.set_entry_point("agent")
+    workflow.add_conditional_edges("agent", lambda s: "agent" if s["steps"] < steps else "end", {"agent": "agent", "end": END})
+    return workflow.compile(checkpointer=saver)
+
+def run(path: Path, chain_max: int, steps: int, payload: str):
+    saver = DeltaCheckpointSaver(SQLiteCheckpointStore(str(path)), delta_chain_max=chain_max)
+    graph = build(saver, steps, payload)
+    config = {"configurable": {"thread_id": "bench"}, "recursion_limit": steps + 10}
+    started = time.perf_counter()
+    graph.invoke({"messages": [HumanMessage(content="Audit the repository")], "steps": 0}, config)
+    run_s = time.perf_counter() - started
+
+    fresh = build(DeltaCheckpointSaver(SQLiteCheckpointStore(str(path))), steps, payload)
+    started = time.perf_counter()
+    state = fresh.get_state(config)
+    load_ms = (time.perf_counter() - started) * 1000
+    assert len(state.values["messages"]) == 2 * steps + 1
+    return saver.stats(), run_s, load_ms, path.stat().st_size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--message-kb", type=float, default=2)
+    args = parser.parse_args()
+    payload = "x" * int(args.message_kb * 1024)
+
+    print(f"{args.steps} steps, {args.message_kb:g} KB tool result per step\n")
+    print(f"{'writes':>7} {'bytes written':>14} {'blob bytes kept':>16} {'run s':>6} {'resume load ms':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, chain_max in (("full", 0), ("delta", 32)):
+            stats, run_s, load_ms, _ = run(Path(tmp) / f"{label}.sqlite3", chain_max, args.steps, payload)
+            print(f"{label:>7} {stats['bytes_written']:>14,} {stats['store']['blob_bytes']:>16,} {run_s:>6.2f} {load_ms:>15.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: prompt size and packing cost over a long agent session.
+
+Replays --steps agent steps (assistant message, ~--result-tokens tool result, follow-up
+user message) and packs the history before each step with ContextWindowManager for a
+model with --window tokens, against sending the whole history as before:
+
+    python -m benchmarks.bench_context_window --steps 200 --window 32000 --result-tokens 600
+
+Summaries come from a stub that returns a fixed-size text after --summary-ms, so the
+numbers show how often a summary is needed rather than a model's latency. Tokens are
+counted with tiktoken when its encoding is available, else ~4 characters per token.
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.agent.context_window import ContextWindowManager
+
+async def run(args):
+    async def summarize(previous, messages):
+        await asyncio.sleep(args.summary_ms / 1000)
+        return "summary " * 200
+
+    manager = ContextWindowManager(summarize=summarize, response_tokens=1024)
+    messages = [SystemMessage(content="You are a careful assistant."), HumanMessage(content="Audit the repository")]
+    filler = "lorem ipsum dolor sit amet " * (args.result_tokens // 5)
+    full, packed_sizes, pack_ms = [], [], []
+    for step in range(args.steps):
+        messages += [AIMessage(content=f"Calling a tool for step {step}"),
+                     AIMessage(content=f"Tool Result: step {step} {filler}"),
+                     HumanMessage(content=f"Next, step {step + 1}")]
+        started = time.perf_counter()
+        packed = await manager.pack(messages, args.window)
+        pack_ms.append((time.perf_counter() - started) * 1000)
+        full.append(sum(manager.counter.count(m) for m in messages))
+        packed_sizes.append(sum(manager.counter.count(m) for m in packed))
+
+    print(f"{'step':>5} {'full tokens':>12} {'packed tokens':>14}")
+    for step in sorted({0, args.steps // 4, args.steps // 2, 3 * args.steps // 4, args.steps - 1}):
+        print(f"{step + 1:>5} {full[step]:>12,} {packed_sizes[step]:>14,}")
+    stats = manager.stats()
+    over = sum(1 for size in full if size > args.window)
+    print(f"\nsteps whose full history exceeds the {args.window:,}-token window: {over}; packed: "
+          f"{sum(1 for size in packed_sizes if size > args.window)}")
+    print(f"summaries written: {stats['summaries']} ({stats['summary_hits']} steps reused a cached one); "
+          f"pack time p50 {sorted(pack_ms)[len(pack_ms) // 2]:.2f} ms, max {max(pack_ms):.1f} ms "
+          f"(includes {args.summary_ms} ms per summary)")
+    print(f"tokens sent over the session: {sum(packed_sizes):,} instead of {sum(full):,}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--window", type=int, default=32000)
+    parser.add_argument("--result-tokens", type=int, default=600)
+    parser.add_argument("--summary-ms", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
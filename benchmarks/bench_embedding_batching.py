@@ -0,0 +1,137 @@
+"""
+Benchmark: per-request embedding calls vs. the shared micro-batching embedding service.
+
+Starts a local fake of the OpenAI embeddings endpoint (uvicorn on 127.0.0.1) whose
+latency grows slightly with batch size and which serves a limited number of
+requests at once, like a rate-limited provider. Concurrent chats then embed their
+queries through `OpenAIEmbeddings` pointed at it, either directly or via
+`EmbeddingBatcher`:
+
+    python -m benchmarks.bench_embedding_batching --chats 200 --rate 400
+
+Load is open-loop (chat i arrives at i / rate seconds); latency is measured from
+the scheduled arrival. A share of queries repeats, as templated queries do.
+"""
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from langchain_openai import OpenAIEmbeddings
+
+from src.services.embedding_service import EmbeddingBatcher
+
+DIMENSIONS = 16
+
+def build_fake_server(base_ms: float, per_input_ms: float, concurrency: int, counter: dict) -> FastAPI:
+    app = FastAPI()
+    slots = asyncio.Semaphore(concurrency)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        async with slots:
+            counter["calls"] += 1
+            counter["inputs"] += len(inputs)
+            await asyncio.sleep((base_ms + per_input_ms * len(inputs)) / 1000)
+        data = [
+            {"object": "embedding", "index": i, "embedding": [float((hash(str(text)) >> d) & 1) for d in range(DIMENSIONS)]}
+            for i, text in enumerate(inputs)
+        ]
+        return {"object": "list", "data": data, "model": body.get("model"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+    return app
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(app: FastAPI, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+def make_queries(chats: int, repeat_share: float, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    templates = [f"what is the status of ticket {i}?" for i in range(5)]
+    return [rng.choice(templates) if rng.random() < repeat_share else f"unique question number {i}"
+            for i in range(chats)]
+
+async def run_load(embed, queries: list, rate: float) -> list:
+    latencies = []
+    origin = time.perf_counter()
+
+    async def one(i: int, query: str):
+        scheduled = origin + i / rate
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        vector = await embed(query)
+        assert len(vector) == DIMENSIONS
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+
+    await asyncio.gather(*(one(i, q) for i, q in enumerate(queries)))
+    return latencies
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(label: str, latencies: list, calls: int, inputs: int):
+    print(f"{label:<26} p50={percentile(latencies, 50):8.2f} ms  "
+          f"p99={percentile(latencies, 99):8.2f} ms  "
+          f"mean={statistics.mean(latencies):8.2f} ms  "
+          f"http_calls={calls:5d}  texts_sent={inputs:5d}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=400.0, help="Arrivals per second")
+    parser.add_argument("--repeat-share", type=float, default=0.3, help="Share of templated (repeated) queries")
+    parser.add_argument("--base-ms", type=float, default=40.0, help="Fixed latency per HTTP call")
+    parser.add_argument("--per-input-ms", type=float, default=0.2, help="Extra latency per text in a call")
+    parser.add_argument("--server-concurrency", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    counter = {"calls": 0, "inputs": 0}
+    port = free_port()
+    server = start_server(build_fake_server(args.base_ms, args.per_input_ms, args.server_concurrency, counter), port)
+
+    embeddings = OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        base_url=f"http://127.0.0.1:{port}/v1",
+        api_key="bench",
+        check_embedding_ctx_length=False,
+    )
+    queries = make_queries(args.chats, args.repeat_share)
+
+    print(f"{args.chats} chats at {args.rate:.0f}/s against fake endpoint "
+          f"({args.base_ms} ms + {args.per_input_ms} ms/text, {args.server_concurrency} concurrent)")
+
+    batcher = EmbeddingBatcher(embeddings=embeddings, window_ms=args.window_ms, max_batch_size=args.max_batch)
+    for label, embed in (
+        ("before: one call per query", embeddings.aembed_query),
+        ("after: micro-batched", batcher.embed_query),
+    ):
+        counter.update(calls=0, inputs=0)
+        latencies = await run_load(embed, queries, args.rate)
+        report(label, latencies, counter["calls"], counter["inputs"])
+
+    stats = batcher.stats()
+    print(f"batch sizes: {stats['batch_size_histogram']}  "
+          f"avg queue wait {stats['avg_queue_wait_ms']:.2f} ms  deduplicated {stats['deduplicated']}")
+    server.should_exit = True
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Load test: MCP session pools against a local fake stdio server.
+
+Spawns benchmarks/fake_mcp_server.py through MCPSessionPool and fires concurrent
+`work` calls (each blocks its server process for --work-ms, like a synchronous tool
+implementation). With one session every chat serializes on one stdio pipe; with N
+sessions calls spread over N processes by least-busy dispatch:
+
+    python -m benchmarks.bench_mcp_pool --pool-sizes 1 2 4 8 --concurrency 32 --calls 256
+
+Afterwards one session of the largest pool is crashed and the time until the pool
+is back to full strength is reported, along with calls served in the meantime.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from src.tools.mcp_pool import MCPSessionPool, stdio_params
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def load(pool: MCPSessionPool, calls: int, concurrency: int, work_ms: int):
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await pool.call_tool("work", {"ms": work_ms})
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - started, latencies, errors
+
+async def crash_recovery(pool: MCPSessionPool, work_ms: int):
+    try:
+        await pool.call_tool("crash", {})
+    except Exception:
+        pass
+    started = time.perf_counter()
+    served = failed = 0
+    while pool.stats()["alive"] < len(pool.sessions):
+        try:
+            await pool.call_tool("work", {"ms": work_ms})
+            served += 1
+        except Exception:
+            failed += 1
+            await asyncio.sleep(0.05)
+    return time.perf_counter() - started, served, failed
+
+async def run(args):
+    params = stdio_params(sys.executable, ["-m", "benchmarks.fake_mcp_server"])
+    print(f"{args.calls} calls of {args.work_ms} ms work, {args.concurrency} concurrent callers\n")
+    print(f"{'sessions':>8} {'startup s':>9} {'wall s':>7} {'calls/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    pool = None
+    for size in args.pool_sizes:
+        if pool is not None:
+            await pool.close()
+        pool = MCPSessionPool("fake", params=params, size=size, ping_interval=args.ping_interval,
+                              max_concurrency=args.concurrency)
+        started = time.perf_counter()
+        await pool.start()
+        startup = time.perf_counter() - started
+        await pool.call_tool("work", {"ms": 0})  # warm up
+        wall, latencies, errors = await load(pool, args.calls, args.concurrency, args.work_ms)
+        print(f"{size:>8} {startup:>9.2f} {wall:>7.2f} {len(latencies) / wall:>8.1f} "
+              f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} {errors:>6}")
+
+    recovery, served, failed = await crash_recovery(pool, args.work_ms)
+    print(f"\ncrashed 1 of {len(pool.sessions)} sessions: full strength again after {recovery:.2f} s "
+          f"(ping interval {args.ping_interval} s); {served} calls served, {failed} failed meanwhile")
+    await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--calls", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--work-ms", type=int, default=20)
+    parser.add_argument("--ping-interval", type=float, default=0.5)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
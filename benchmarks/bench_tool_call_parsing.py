@@ -0,0 +1,70 @@
+"""
+Benchmark: tool-call extraction on large agent outputs.
+
+Compares the previous two-pass approach (the greedy DOTALL regex in
+`route_agent_output`, then `\\{.*\\}` + json.loads in `tool_node`) with the single
+balanced-brace scan `agent_node` now runs once per response:
+
+    python -m benchmarks.bench_tool_call_parsing --sizes 1000 10000 100000 1000000
+
+Each size is measured for three shapes of output: plain prose without a call, prose
+followed by one call, and prose interleaved with several JSON blocks (where the
+greedy match spans from the first '{' to the last '}' and fails to decode).
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+
+from src.agent.tool_calls import extract_tool_calls
+
+LEGACY_ROUTE_PATTERN = re.compile(r'\{.*"tool":.*\}', re.DOTALL)
+LEGACY_EXEC_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+def legacy(text: str):
+    if not LEGACY_ROUTE_PATTERN.search(text):
+        return []
+    match = LEGACY_EXEC_PATTERN.search(text)
+    try:
+        call = json.loads(match.group(0))
+    except ValueError:
+        return []
+    return [call] if "tool" in call else []
+
+def make_output(size: int, shape: str) -> str:
+    line = "The quarterly figures look stable, with revenue {roughly} flat against the plan.\n"
+    prose = (line * (size // len(line) + 1))[:size]
+    call = '{"tool": "search_web", "args": {"query": "q3 revenue"}}'
+    if shape == "prose":
+        return prose
+    if shape == "one_call":
+        return prose + "\n" + call
+    block = '{"metric": "revenue", "values": [1, 2, 3]}\n'
+    half = len(prose) // 2
+    return prose[:half] + block + call + "\n" + block + prose[half:]
+
+def timed(fn, text: str, repeat: int):
+    latencies, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'chars':>9}  {'shape':<9} {'legacy ms':>10} {'scan ms':>9}  calls (legacy / scan)")
+    for size in args.sizes:
+        for shape in ("prose", "one_call", "multi"):
+            text = make_output(size, shape)
+            legacy_ms, legacy_calls = timed(legacy, text, args.repeat)
+            scan_ms, scan_calls = timed(extract_tool_calls, text, args.repeat)
+            print(f"{size:>9}  {shape:<9} {legacy_ms:>10.3f} {scan_ms:>9.3f}  {len(legacy_calls)} / {len(scan_calls)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: prompt tokens and retries of text-mode vs. native tool calling.
+
+Runs a fixed set of tool-requiring queries through agent_node's two modes:
+
+    text    tools listed in the system prompt, the model writes {"tool": ..., "args": ...}
+    native  the same shortlist bound with bind_tools (provider function calling)
+
+Live mode needs an OpenAI-compatible endpoint (OpenAI, or Ollama at
+http://localhost:11434/v1 with a tool-capable model). A turn whose call is missing,
+malformed, names the wrong tool or lacks a required argument is retried, as the
+reflect -> agent loop would, up to --max-attempts:
+
+    python -m benchmarks.bench_tool_calling_modes --model gpt-4o-mini
+    python -m benchmarks.bench_tool_calling_modes --model qwen2.5 --base-url http://localhost:11434/v1
+
+--offline only counts prompt tokens, with tiktoken or a ~4 chars/token estimate when
+its encoding cannot be downloaded (tool definitions serialized as the provider receives
+them; providers add a small per-tool framing overhead on top).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.agent.nodes import DEFAULT_SYSTEM_INSTRUCTIONS, build_system_prompt
+from src.agent.tool_calls import extract_tool_calls, native_tool_calls, to_native_tool
+
+def _schema(required, **props):
+    return {"type": "object", "properties": {k: {"type": v[0], "description": v[1]} for k, v in props.items()},
+            "required": list(required)}
+
+TOOLS = [
+    {"name": "get_weather", "description": "Current weather and forecast for a city.",
+     "args": _schema(["city"], city=("string", "City name"), days=("integer", "Forecast days, 1-7"))},
+    {"name": "search_web", "description": "Search the web and return the top results.",
+     "args": _schema(["query"], query=("string", "Search terms"), limit=("integer", "Number of results"))},
+    {"name": "read_file", "description": "Read a text file from the workspace.",
+     "args": _schema(["path"], path=("string", "Workspace-relative path"))},
+    {"name": "create_issue", "description": "Open an issue in a GitHub repository.",
+     "args": _schema(["repo", "title"], repo=("string", "owner/name"), title=("string", "Issue title"),
+                     body=("string", "Markdown body"), labels=("array", "Label names"))},
+    {"name": "send_email", "description": "Send an email from the assistant's mailbox.",
+     "args": _schema(["to", "subject", "body"], to=("string", "Recipient address"),
+                     subject=("string", "Subject line"), body=("string", "Plain text body"))},
+]
+
+QUERIES = [
+    ("What's the weather in Lisbon for the next 3 days?", "get_weather"),
+    ("Find recent articles about the EU AI Act.", "search_web"),
+    ("Show me what's in docs/setup.md", "read_file"),
+    ("File a bug in acme/web titled 'Login button unresponsive'.", "create_issue"),
+    ("Email bob@example.com that the deploy is done, subject 'Deploy'.", "send_email"),
+    ("Is it raining in Kraków right now?", "get_weather"),
+    ("Look up the latest Python release notes.", "search_web"),
+    ("Open an issue on acme/api: 'Rate limiter leaks connections', label it bug.", "create_issue"),
+]
+
+def valid_call(calls, expected: str) -> bool:
+    tool = next((t for t in TOOLS if t["name"] == expected), None)
+    return bool(calls) and calls[0]["tool"] == expected and all(k in calls[0]["args"] for k in tool["args"]["required"])
+
+async def run_mode(llm, mode: str, max_attempts: int):
+    definitions = [to_native_tool(t) for t in TOOLS]
+    model = llm.bind_tools(definitions) if mode == "native" else llm
+    system = build_system_prompt(DEFAULT_SYSTEM_INSTRUCTIONS, [] if mode == "native" else TOOLS)
+    tokens, attempts_per_query, failures = [], [], 0
+    for query, expected in QUERIES:
+        for attempt in range(1, max_attempts + 1):
+            response = await model.ainvoke([SystemMessage(content=system), HumanMessage(content=query)])
+            tokens.append((response.usage_metadata or {}).get("input_tokens", 0))
+            calls = native_tool_calls(response) or extract_tool_calls(response.content)
+            if valid_call(calls, expected):
+                break
+        else:
+            failures += 1
+        attempts_per_query.append(attempt)
+    return {
+        "avg_prompt_tokens": statistics.mean(tokens),
+        "total_prompt_tokens": sum(tokens),
+        "retries": sum(a - 1 for a in attempts_per_query),
+        "failed_queries": failures,
+    }
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+    except Exception:
+        # The encoding is downloaded on first use; without network fall back to ~4 chars per token
+        return lambda text: len(text) // 4, "estimated at ~4 chars/token"
+
+def offline(args):
+    count, method = token_counter()
+    text_prompt = build_system_prompt(DEFAULT_SYSTEM_INSTRUCTIONS, TOOLS)
+    native_prompt = build_system_prompt(DEFAULT_SYSTEM_INSTRUCTIONS, [])
+    definitions = json.dumps([to_native_tool(t) for t in TOOLS])
+    text_tokens = count(text_prompt)
+    native_tokens = count(native_prompt) + count(definitions)
+    print(f"{len(TOOLS)} tools, system prompt + tool definitions ({method}):")
+    print(f"  text    {text_tokens:5d} tokens (names and descriptions only; the model never sees the arg schemas)")
+    print(f"  native  {native_tokens:5d} tokens (full JSON schemas as function definitions)")
+
+async def live(args):
+    from langchain_openai import ChatOpenAI
+    llm = ChatOpenAI(model=args.model, base_url=args.base_url, temperature=0,
+                     api_key=os.getenv("OPENAI_API_KEY") or "ollama")
+    print(f"{len(QUERIES)} queries against {args.model}, up to {args.max_attempts} attempts each:")
+    for mode in ("text", "native"):
+        result = await run_mode(llm, mode, args.max_attempts)
+        print(f"  {mode:<7} avg prompt tokens={result['avg_prompt_tokens']:7.1f}  total={result['total_prompt_tokens']:6d}  "
+              f"retries={result['retries']:3d}  failed={result['failed_queries']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args()
+    if args.offline:
+        offline(args)
+    else:
+        asyncio.run(live(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: top-k tool routing latency of the in-memory ToolMatrix vs. catalog size.
+
+Fills a ToolMatrix with random unit vectors (text-embedding-3-small has 1536 dims)
+for each catalog size and times single-query top-k searches, plus the incremental
+cost of adding and removing a tool:
+
+    python -m benchmarks.bench_tool_index --sizes 100 1000 10000 100000
+
+With --qdrant-url the same catalogs are also loaded into a throwaway Qdrant
+collection and searched over the network, which is what every routing decision
+paid before (an HTTP round trip per query).
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+
+from src.tools.tool_matrix import ToolMatrix
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def time_calls(fn, queries) -> list:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def report(label: str, latencies: list):
+    print(f"  {label:<22} p50={percentile(latencies, 50):9.3f} ms  "
+          f"p99={percentile(latencies, 99):9.3f} ms  mean={statistics.mean(latencies):9.3f} ms")
+
+def bench_matrix(vectors: np.ndarray, queries: np.ndarray, k: int):
+    ids = [str(i) for i in range(len(vectors))]
+    matrix = ToolMatrix()
+    started = time.perf_counter()
+    matrix.upsert(ids, vectors, [{"tool_name": f"tool_{i}"} for i in ids])
+    load_ms = (time.perf_counter() - started) * 1000
+
+    report("matrix top-k", time_calls(lambda q: matrix.search(q, k), queries))
+
+    adds = time_calls(lambda q: matrix.upsert([uuid.uuid4().hex], [q], [{"tool_name": "new"}]), queries[:50])
+    removes = time_calls(lambda q: matrix.remove([ids.pop()]), queries[:50])
+    print(f"  bulk load {load_ms:9.1f} ms   add one p50={percentile(adds, 50):.3f} ms   "
+          f"remove one p50={percentile(removes, 50):.3f} ms   "
+          f"memory {matrix.stats()['bytes'] / 2**20:.1f} MiB")
+
+def bench_qdrant(url: str, vectors: np.ndarray, queries: np.ndarray, k: int):
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models as rest
+
+    client = QdrantClient(url=url)
+    collection = f"bench_tools_{uuid.uuid4().hex[:8]}"
+    client.create_collection(collection, vectors_config=rest.VectorParams(size=vectors.shape[1], distance=rest.Distance.COSINE))
+    try:
+        for start in range(0, len(vectors), 1024):
+            block = vectors[start:start + 1024]
+            client.upsert(collection, points=rest.Batch(ids=list(range(start, start + len(block))), vectors=block.tolist()), wait=True)
+        report("qdrant search (HTTP)", time_calls(
+            lambda q: client.query_points(collection, query=q.tolist(), limit=k), queries))
+    finally:
+        client.delete_collection(collection)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--qdrant-url", default=None, help="Also measure a Qdrant server, e.g. http://localhost:6333")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+        print(f"{size} tools x {args.dim} dims, top-{args.k}:")
+        bench_matrix(vectors, queries, args.k)
+        if args.qdrant_url:
+            bench_qdrant(args.qdrant_url, vectors, queries, args.k)
+
+if __name__ == "__main__":
+    main()
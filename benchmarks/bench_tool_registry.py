@@ -0,0 +1,78 @@
+"""
+Benchmark: tool -> server lookup with many MCP servers.
+
+Compares the scan tool_node used to do (iterate over every connection and test
+`tool_name in conn["tools"]`) with ToolRegistry.resolve, plus the cost of
+re-registering one server (the atomic snapshot swap on connect / disconnect):
+
+    python -m benchmarks.bench_tool_registry --servers 10 50 100 500 --tools-per-server 50
+
+A share of tool names (--shared) is exposed by several servers; the scan silently
+picks the first server, the registry reports them as ambiguous.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.tools.tool_registry import AmbiguousToolError, ToolEntry, ToolRegistry
+
+def build(servers: int, per_server: int, shared: float, rng: random.Random):
+    connections, registry = {}, ToolRegistry()
+    common = [f"common_tool_{i}" for i in range(max(1, int(per_server * shared)))]
+    for s in range(servers):
+        server = f"server_{s}"
+        names = [f"{server}_tool_{t}" for t in range(per_server - len(common))] + common
+        connections[server] = {"tools": {name: None for name in names}}
+        registry.register_server(server, [ToolEntry(server=server, name=name) for name in names])
+    unique = [rng.choice([n for n in conn["tools"] if n not in common])
+              for conn in rng.choices(list(connections.values()), k=2000)]
+    return connections, registry, unique, common
+
+def scan(connections, tool_name):
+    for server_name, conn in connections.items():
+        if tool_name in conn["tools"]:
+            return server_name
+    return None
+
+def resolve(registry, tool_name):
+    try:
+        entry = registry.resolve(tool_name)
+    except AmbiguousToolError:
+        return None
+    return entry.server if entry else None
+
+def per_call_us(fn, items) -> float:
+    started = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - started) / len(items) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--tools-per-server", type=int, default=50)
+    parser.add_argument("--shared", type=float, default=0.05, help="Share of tool names every server exposes")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    print(f"{'servers':>7} {'tools':>7}  {'scan us':>8} {'registry us':>11}  "
+          f"{'shared: scan us':>15} {'registry us':>11}  {'re-register ms':>14}")
+    for servers in args.servers:
+        connections, registry, unique, common = build(servers, args.tools_per_server, args.shared, rng)
+        scan_us = per_call_us(lambda name: scan(connections, name), unique)
+        registry_us = per_call_us(lambda name: resolve(registry, name), unique)
+        shared_scan_us = per_call_us(lambda name: scan(connections, name), common * 200)
+        shared_registry_us = per_call_us(lambda name: resolve(registry, name), common * 200)
+        server = "server_0"
+        tools = registry.server_tools(server)
+        swaps = []
+        for _ in range(20):
+            started = time.perf_counter()
+            registry.register_server(server, tools)
+            swaps.append((time.perf_counter() - started) * 1000)
+        print(f"{servers:>7} {registry.stats()['tools']:>7}  {scan_us:>8.2f} {registry_us:>11.2f}  "
+              f"{shared_scan_us:>15.2f} {shared_registry_us:>11.2f}  {statistics.median(swaps):>14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: prompt growth from large tool results over a multi-turn conversation.
+
+Replays a conversation where every turn calls a tool that returns --result-kb of
+text (a file dump or search page), then measures the prompt the next agent turn
+sends, once with results inlined whole (the previous `Tool Result: {result}`) and
+once bounded by ToolResultStore (excerpt in the history, full text out-of-band):
+
+    python -m benchmarks.bench_tool_result_bounding --turns 8 --result-kb 50 --max-chars 4000
+
+Tokens are estimated at ~4 characters per token, as `estimate_tokens` does.
+"""
+import argparse
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from mcp.types import CallToolResult, TextContent
+
+from src.agent.speculation import estimate_tokens
+from src.tools.result_store import ToolResultStore, render_result
+
+def tool_result(turn: int, size: int) -> CallToolResult:
+    line = f"turn {turn}: lorem ipsum dolor sit amet, consectetur adipiscing elit\n"
+    return CallToolResult(content=[TextContent(type="text", text=(line * (size // len(line) + 1))[:size])])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--result-kb", type=int, default=50)
+    parser.add_argument("--max-chars", type=int, default=4000)
+    args = parser.parse_args()
+
+    store = ToolResultStore(max_chars=args.max_chars)
+    inline, bounded = [HumanMessage(content="Summarize the repository")], [HumanMessage(content="Summarize the repository")]
+    bound_seconds = 0.0
+    print(f"{'turn':>4} {'inline tokens':>14} {'bounded tokens':>15}")
+    for turn in range(1, args.turns + 1):
+        call = AIMessage(content='{"tool": "read_file", "args": {"path": "src/%d.py"}}' % turn)
+        result = tool_result(turn, args.result_kb * 1024)
+        inline += [call, AIMessage(content="Tool Result: " + "".join(render_result(result)))]
+        started = time.perf_counter()
+        excerpt = store.bound(render_result(result), "fs__read_file")
+        bound_seconds += time.perf_counter() - started
+        bounded += [call, AIMessage(content="Tool Result: " + excerpt)]
+        print(f"{turn:>4} {estimate_tokens(inline):>14,} {estimate_tokens(bounded):>15,}")
+
+    stats = store.stats()
+    print(f"\nstored out-of-band: {stats['entries']} results, {stats['chars']:,} chars; "
+          f"{stats['chars_withheld']:,} chars kept out of the history; "
+          f"bounding took {bound_seconds / args.turns * 1000:.2f} ms per result")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: offline relevance and latency of vector-only vs. hybrid tool routing.
+
+Builds a synthetic catalog of MCP-style tools (service x action x object, e.g.
+`github_create_issue`) and a labelled query set in three flavours:
+
+    named        the query contains the exact tool name   ("run github_create_issue ...")
+    prefix       the query contains a name prefix          ("use github_create_i ...")
+    descriptive  a paraphrase without the tool name        ("open a new ticket on GitHub")
+
+Both routers search the same ToolMatrix. Embeddings come from a deterministic local
+hashing embedder (word + character trigram features) so the run needs no network;
+`--embed-latency-ms` adds the round trip an embedding API call would cost, which is
+what the name fast path saves. Reports recall@1 / recall@k and p50 latency per flavour:
+
+    python -m benchmarks.bench_tool_routing_relevance --embed-latency-ms 120
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import statistics
+import time
+
+import numpy as np
+
+from src.tools.lexical_index import tokenize
+from src.tools.tool_matrix import ToolMatrix
+from src.tools.tool_router import SemanticToolRouter
+
+SERVICES = {
+    "github": "GitHub repository", "jira": "Jira project", "slack": "Slack workspace",
+    "gmail": "Gmail mailbox", "gdrive": "Google Drive", "postgres": "PostgreSQL database",
+    "s3": "Amazon S3 bucket", "calendar": "Google Calendar", "notion": "Notion workspace",
+    "linear": "Linear team", "stripe": "Stripe account", "filesystem": "local filesystem",
+}
+OBJECTS = {
+    "issue": ("ticket", ["title", "body"]), "comment": ("reply", ["text"]), "file": ("document", ["path"]),
+    "user": ("member", ["user_id"]), "message": ("note", ["channel", "text"]), "label": ("tag", ["name"]),
+    "event": ("meeting", ["start", "end"]), "table": ("dataset", ["schema"]),
+}
+ACTIONS = {
+    "create": ("make a new", "Create a new"), "list": ("show all", "List all"),
+    "delete": ("get rid of the", "Delete a"), "get": ("look up the", "Get a"),
+    "update": ("modify the", "Update an existing"), "search": ("find", "Search for"),
+}
+
+class HashingEmbedder:
+    """Deterministic bag of words + character trigrams, hashed into a fixed-size vector."""
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> int:
+        return int.from_bytes(hashlib.md5(feature.encode()).digest()[:4], "little") % self.dim
+
+    def embed(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in tokenize(text):
+            vector[self._bucket("w:" + word)] += 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                vector[self._bucket("t:" + padded[i:i + 3])] += 0.3
+        return vector.tolist()
+
+class OfflineRouter(SemanticToolRouter):
+    """SemanticToolRouter with the embedding API replaced by the local embedder plus simulated latency."""
+    def __init__(self, embedder: HashingEmbedder, latency_ms: float, **kwargs):
+        self.embedder = embedder
+        self.latency_ms = latency_ms
+        super().__init__(**kwargs)
+
+    async def _embed(self, query: str):
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self.embedder.embed(query)
+
+class VectorOnlyRouter(OfflineRouter):
+    """The pre-hybrid behaviour: embed every query, rank by cosine similarity only."""
+    async def _search(self, query: str):
+        vector = await self._embed(query)
+        return [self._tool_def(p) for p, _ in self.matrix.search(vector, self.top_k)]
+
+def build_catalog():
+    tools = []
+    for service, service_label in SERVICES.items():
+        for obj, (_synonym, args) in OBJECTS.items():
+            for action, (_phrase, verb) in ACTIONS.items():
+                tools.append({
+                    "tool_name": f"{service}_{action}_{obj}",
+                    "description": f"{verb} {obj} in the {service_label}.",
+                    "json_schema": json.dumps({"properties": {a: {"type": "string"} for a in args}}),
+                })
+    return tools
+
+def build_queries(tools, per_kind: int, rng: random.Random):
+    sample = rng.sample(tools, min(per_kind, len(tools)))
+    queries = []
+    for tool in sample:
+        name = tool["tool_name"]
+        service, action, obj = name.split("_", 2)
+        queries.append(("named", f"run {name} with the usual arguments", name))
+        queries.append(("prefix", f"use {name[:-2]} for this", name))
+        phrase = ACTIONS[action][0]
+        queries.append(("descriptive", f"please {phrase} {OBJECTS[obj][0]} {obj} on {SERVICES[service]}", name))
+    return queries
+
+async def evaluate(router, queries, k: int):
+    results = {}
+    for kind, query, expected in queries:
+        started = time.perf_counter()
+        shortlist = await router.route(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        names = [tool["name"] for tool in shortlist]
+        row = results.setdefault(kind, {"top1": 0, "topk": 0, "n": 0, "latency": []})
+        row["n"] += 1
+        row["top1"] += int(names[:1] == [expected])
+        row["topk"] += int(expected in names[:k])
+        row["latency"].append(elapsed)
+    return results
+
+def report(label: str, results: dict, k: int):
+    print(label)
+    for kind, row in results.items():
+        print(f"  {kind:<12} recall@1={row['top1'] / row['n']:6.1%}  recall@{k}={row['topk'] / row['n']:6.1%}  "
+              f"p50={statistics.median(row['latency']):8.2f} ms  (n={row['n']})")
+
+async def run(args):
+    rng = random.Random(7)
+    embedder = HashingEmbedder(args.dim)
+    tools = build_catalog()
+    matrix = ToolMatrix()
+    matrix.upsert([str(i) for i in range(len(tools))], [embedder.embed(
+        f"Tool Name: {t['tool_name']}\nDescription: {t['description']}\nArgs: {t['json_schema']}") for t in tools], tools)
+    queries = build_queries(tools, args.queries, rng)
+    print(f"{len(tools)} tools, {len(queries)} queries, top-{args.k}, simulated embedding latency {args.embed_latency_ms} ms\n")
+
+    # cache_size=0: every query is routed from scratch
+    common = dict(embedder=embedder, latency_ms=args.embed_latency_ms, top_k=args.k, cache_size=0, matrix=matrix)
+    report("vector only", await evaluate(VectorOnlyRouter(**common), queries, args.k), args.k)
+    report("hybrid (name fast path + BM25/vector RRF)", await evaluate(OfflineRouter(**common), queries, args.k), args.k)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100, help="Tools sampled per query flavour")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--embed-latency-ms", type=float, default=120.0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
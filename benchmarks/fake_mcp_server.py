@@ -0,0 +1,34 @@
+"""
+Minimal stdio MCP server for load tests (see bench_mcp_pool).
+
+Tools:
+    echo(text)        returns the text
+    work(ms)          blocks the server for `ms` milliseconds, like a synchronous tool
+                      implementation would, so one process serves one call at a time
+    crash()           exits the process without replying
+"""
+import os
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+server = FastMCP("fake")
+
+@server.tool()
+def echo(text: str) -> str:
+    """Echo the text back."""
+    return text
+
+@server.tool()
+def work(ms: int = 50) -> str:
+    """Block for `ms` milliseconds and report the process ID."""
+    time.sleep(ms / 1000)
+    return f"done by {os.getpid()}"
+
+@server.tool()
+def crash() -> str:
+    """Terminate the server process abruptly."""
+    os._exit(1)
+
+if __name__ == "__main__":
+    server.run("stdio")
@@ -17,14 +17,15 @@ export default function AgentManager() {
             goal: editingAgent.goal || "",
             backstory: editingAgent.backstory || "",
             tools: editingAgent.tools || [],
-            enabled: editingAgent.enabled ?? true
+            enabled: editingAgent.enabled ?? true,
+            speculation: editingAgent.speculation ?? "off"
         });
         setEditingAgent(null);
     };
 
     const startEdit = (agent?: Agent) => {
         setEditingAgent(agent || {
-            name: "", role: "", goal: "", backstory: "", tools: [], enabled: true
+            name: "", role: "", goal: "", backstory: "", tools: [], enabled: true, speculation: "off"
         });
     };
 
@@ -70,6 +71,14 @@ export default function AgentManager() {
                         value={editingAgent.backstory}
                         onChange={e => setEditingAgent({ ...editingAgent, backstory: e.target.value })}
                     />
+                    <select
+                        className="bg-gray-700 p-2 rounded text-white text-sm"
+                        value={editingAgent.speculation ?? "off"}
+                        onChange={e => setEditingAgent({ ...editingAgent, speculation: e.target.value as Agent["speculation"] })}
+                    >
+                        <option value="off">Speculation: off (escalate to smart on rejection)</option>
+                        <option value="fast_smart">Speculation: race fast and smart models</option>
+                    </select>
                     {/* Tool selection could be more advanced */}
                     <div className="flex gap-2 justify-end mt-2">
                         <button onClick={() => setEditingAgent(null)} className="text-gray-400 hover:text-white px-3 py-1 text-sm">Cancel</button>
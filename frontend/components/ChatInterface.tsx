@@ -10,10 +10,51 @@ export default function ChatInterface() {
     const [input, setInput] = useState("");
     const [messages, setMessages] = useState<any[]>([]);
     const messagesEndRef = useRef<HTMLDivElement>(null);
+    // Set when the server shed the run; its "complete" must not reload history over the error
+    const shedRef = useRef(false);
 
     const SOCKET_URL = config.ws("/ws/chat");
     const { sendMessage, lastMessage, readyState } = useWebSocket(SOCKET_URL, {
         shouldReconnect: (closeEvent) => true,
+        // Token deltas arrive faster than renders; handle them per message instead of via lastMessage
+        onMessage: (event) => {
+            try {
+                const data = JSON.parse(event.data);
+                // Drops the "waiting for a slot" bubble, if the last message is one
+                const withoutQueued = (prev: any[]) => (prev[prev.length - 1]?.queued ? prev.slice(0, -1) : prev);
+                if (data.type === "queue") {
+                    // Waiting for a free slot on the model's backend
+                    setMessages((prev) => [...withoutQueued(prev), {
+                        type: "status",
+                        content: `Waiting for a free slot on ${data.model} (position ${data.position} in queue)...`,
+                        queued: true,
+                    }]);
+                } else if (data.type === "run") {
+                    setMessages(withoutQueued);
+                } else if (data.type === "error" && data.code === "overloaded") {
+                    // The run was shed (queue full or waited too long); nothing was saved for it
+                    shedRef.current = true;
+                    setMessages((prev) => [...withoutQueued(prev), { type: "error", content: data.message }]);
+                } else if (data.type === "node_start" && data.phase === "answer") {
+                    // New answer attempt: start (or reset) the streaming agent bubble
+                    setMessages((prev) => {
+                        const last = prev[prev.length - 1];
+                        if (last?.streaming) {
+                            return [...prev.slice(0, -1), { ...last, content: "" }];
+                        }
+                        return [...prev, { type: "agent", content: "", streaming: true }];
+                    });
+                } else if (data.type === "token" && data.phase === "answer") {
+                    setMessages((prev) => {
+                        const last = prev[prev.length - 1];
+                        if (!last?.streaming) return prev;
+                        return [...prev.slice(0, -1), { ...last, content: last.content + data.data }];
+                    });
+                }
+            } catch (err) {
+                console.error("Error parsing message:", err);
+            }
+        },
     });
 
     // Load history when conversation changes
@@ -44,6 +85,11 @@ export default function ChatInterface() {
                     // Intermediate updates (agent thinking)
                     // Currently opting to not display raw updates to keep UI clean
                 } else if (data.type === "complete") {
+                    if (shedRef.current) {
+                        // Keep the error in view; the history holds nothing for a shed run
+                        shedRef.current = false;
+                        return;
+                    }
                     // Reload history to get the full accurate response from DB
                     if (currentConversation) {
                         setTimeout(() => {
@@ -115,7 +161,11 @@ export default function ChatInterface() {
                         key={idx}
                         className={`p-3 rounded-lg max-w-[80%] ${msg.type === "user"
                                 ? "bg-blue-600 ml-auto text-white"
-                                : "bg-gray-800 text-gray-200 border border-gray-700"
+                                : msg.type === "error"
+                                    ? "bg-red-900/40 text-red-200 border border-red-700"
+                                    : msg.type === "status"
+                                        ? "bg-gray-800/60 text-gray-400 italic border border-gray-700"
+                                        : "bg-gray-800 text-gray-200 border border-gray-700"
                             }`}
                     >
                         <div className="text-xs opacity-50 mb-1 uppercase tracking-wider">
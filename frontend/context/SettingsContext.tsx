@@ -46,6 +46,7 @@ export type Agent = {
     backstory: string;
     tools: string[];
     enabled: boolean;
+    speculation?: "off" | "fast_smart";
 };
 
 export type Crew = {
@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+import logging
+import threading
+import time
+
+from src.agent.state import AgentProfile
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+class AgentGraph(NamedTuple):
+    profile: AgentProfile
+    graph: Any  # compiled StateGraph
+
+def build_profile(agent) -> AgentProfile:
+    """Run settings of an Agent record (see src/api/routers/agents.py)."""
+    parts = [f"You are {agent.name}" + (f", the team's {agent.role}." if agent.role else "."),
+             f"Your goal: {agent.goal}" if agent.goal else "",
+             agent.backstory or ""]
+    return AgentProfile(
+        agent_id=agent.id,
+        name=agent.name,
+        instructions="\n".join(part for part in parts if part),
+        tools=frozenset(name.lower() for name in agent.tools or ()),
+        model_type=agent.model_type,
+        speculation=agent.speculation,
+    )
+
+class AgentGraphRegistry:
+    """
+    One compiled graph per agent id, with the agent's profile (instructions, tool
+    allow-list, model tier, speculation policy) baked into its nodes, so a request
+    only looks its graph up instead of loading the agent and assembling a run.
+
+    Entries are dropped by `invalidate(agent_id)` when an agent is updated or deleted.
+    A load racing with an invalidation is served but not cached. `ttl` bounds how long
+    an edit made through another worker can go unseen.
+    """
+    def __init__(
+        self,
+        build: Optional[Callable[[AgentProfile], Any]] = None,
+        max_size: int = config.AGENT_GRAPH_CACHE_SIZE,
+        ttl: float = config.AGENT_GRAPH_CACHE_TTL_SECONDS,
+    ):
+        self._build = build
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, AgentGraph]]" = OrderedDict()  # agent id -> (expires_at, graph)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "not_found": 0, "compiles": 0, "compile_ms": 0.0, "invalidations": 0}
+
+    async def get(self, agent_id: str, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[AgentGraph]:
+        """The agent's graph; on a miss `load()` fetches the Agent record. None if it does not exist."""
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(agent_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        agent = await load()
+        if agent is None:
+            with self._lock:
+                self._stats["not_found"] += 1
+                self._entries.pop(agent_id, None)
+            return None
+        compiled = self._compile(build_profile(agent))
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[agent_id] = (time.monotonic() + self.ttl, compiled)
+                self._entries.move_to_end(agent_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return compiled
+
+    def _compile(self, profile: AgentProfile) -> AgentGraph:
+        build = self._build
+        if build is None:
+            # Imported lazily: the graph module opens the checkpoint store on import
+            from src.agent.graph import build_graph as build
+        started = time.perf_counter()
+        graph = build(profile)
+        with self._lock:
+            self._stats["compiles"] += 1
+            self._stats["compile_ms"] += (time.perf_counter() - started) * 1000
+        logger.info(f"Compiled graph for agent '{profile.name}' ({profile.agent_id})")
+        return AgentGraph(profile, graph)
+
+    def invalidate(self, agent_id: Optional[str] = None):
+        """Drops one agent's graph, or all of them."""
+        with self._lock:
+            self._generation += 1
+            if agent_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(agent_id, None)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "avg_compile_ms": self._stats["compile_ms"] / self._stats["compiles"] if self._stats["compiles"] else 0.0,
+            }
+
+# Used by the chat websocket; invalidated by the agents router
+agent_graphs = AgentGraphRegistry()
@@ -0,0 +1,655 @@
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Kinds of stored channel values
+BLOB_FULL = "full"
+BLOB_DELTA = "delta"   # items appended to the list stored under `base`
+BLOB_EMPTY = "empty"   # channel cleared in this version
+
+BlobKey = Tuple[str, str]  # (channel, version)
+
+class BlobRow(NamedTuple):
+    channel: str
+    version: str
+    kind: str
+    base: Optional[str]
+    type: str
+    data: bytes
+
+class CheckpointRow(NamedTuple):
+    thread_id: str
+    checkpoint_ns: str
+    checkpoint_id: str
+    parent_id: Optional[str]
+    type: str
+    data: bytes
+    metadata_type: str
+    metadata: bytes
+    created_at: float
+
+class WriteRow(NamedTuple):
+    task_id: str
+    idx: int
+    channel: str
+    type: str
+    data: bytes
+    task_path: str
+
+class SQLiteCheckpointStore:
+    """Checkpoint rows in a local SQLite file (WAL mode, shared by workers on one host)."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+                " parent_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL,"
+                " metadata_type TEXT NOT NULL, metadata BLOB NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+                "CREATE INDEX IF NOT EXISTS checkpoints_created ON checkpoints (created_at);"
+                "CREATE TABLE IF NOT EXISTS checkpoint_blobs ("
+                " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, channel TEXT NOT NULL, version TEXT NOT NULL,"
+                " kind TEXT NOT NULL, base TEXT, type TEXT NOT NULL, data BLOB NOT NULL,"
+                " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+                "CREATE TABLE IF NOT EXISTS checkpoint_writes ("
+                " thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,"
+                " task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT NOT NULL,"
+                " data BLOB NOT NULL, task_path TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def save(self, row: CheckpointRow, blobs: Sequence[BlobRow]):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._put_blobs(conn, row.thread_id, row.checkpoint_ns, blobs)
+                conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def put_blobs(self, thread_id: str, checkpoint_ns: str, blobs: Sequence[BlobRow]):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                self._put_blobs(conn, thread_id, checkpoint_ns, blobs)
+
+    @staticmethod
+    def _put_blobs(conn, thread_id, checkpoint_ns, blobs):
+        conn.executemany(
+            "INSERT OR REPLACE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(thread_id, checkpoint_ns, *blob) for blob in blobs],
+        )
+
+    def load(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str] = None) -> Optional[CheckpointRow]:
+        rows = self.history(thread_id, checkpoint_ns, checkpoint_id=checkpoint_id, limit=1)
+        return rows[0] if rows else None
+
+    def history(self, thread_id: str, checkpoint_ns: Optional[str] = None, checkpoint_id: Optional[str] = None,
+                before: Optional[str] = None, limit: Optional[int] = None) -> List[CheckpointRow]:
+        """Checkpoints of a thread, newest first."""
+        query, params = "SELECT * FROM checkpoints WHERE thread_id = ?", [thread_id]
+        if checkpoint_ns is not None:
+            query, params = query + " AND checkpoint_ns = ?", params + [checkpoint_ns]
+        if checkpoint_id:
+            query, params = query + " AND checkpoint_id = ?", params + [checkpoint_id]
+        if before:
+            query, params = query + " AND checkpoint_id < ?", params + [before]
+        query += " ORDER BY checkpoint_id DESC"
+        if limit:
+            query, params = query + " LIMIT ?", params + [limit]
+        with self._lock:
+            return [CheckpointRow(*r) for r in self._connection().execute(query, params).fetchall()]
+
+    def checkpoint_ids(self, thread_id: str, checkpoint_ns: str) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+                (thread_id, checkpoint_ns)).fetchall()
+        return [r[0] for r in rows]
+
+    def thread_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._connection().execute("SELECT DISTINCT thread_id FROM checkpoints").fetchall()]
+
+    def namespaces(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._connection().execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+
+    def idle_threads(self, cutoff: float) -> List[str]:
+        """Threads whose newest checkpoint was written before `cutoff` (epoch seconds)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)).fetchall()
+        return [r[0] for r in rows]
+
+    def load_blobs(self, thread_id: str, checkpoint_ns: str, keys: Iterable[BlobKey]) -> Dict[BlobKey, BlobRow]:
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            for channel, version in keys:
+                row = conn.execute(
+                    "SELECT channel, version, kind, base, type, data FROM checkpoint_blobs"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                    (thread_id, checkpoint_ns, channel, version)).fetchone()
+                if row:
+                    found[(channel, version)] = BlobRow(*row)
+        return found
+
+    def save_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, writes: Sequence[WriteRow]):
+        # Regular writes are kept from the first attempt; special ones (errors, interrupts) are replaced
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for write in writes:
+                    verb = "INSERT OR REPLACE" if write.idx < 0 else "INSERT OR IGNORE"
+                    conn.execute(f"{verb} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (thread_id, checkpoint_ns, checkpoint_id, *write))
+
+    def load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[WriteRow]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT task_id, idx, channel, type, data, task_path FROM checkpoint_writes"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return [WriteRow(*r) for r in rows]
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def delete_checkpoints(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str]):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for table in ("checkpoints", "checkpoint_writes"):
+                    conn.executemany(f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                                     [(thread_id, checkpoint_ns, c) for c in checkpoint_ids])
+
+    def delete_blobs(self, thread_id: str, checkpoint_ns: str, keys: Iterable[BlobKey]) -> int:
+        rows = [(thread_id, checkpoint_ns, channel, version) for channel, version in keys]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                                 rows)
+        return len(rows)
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            return {
+                "checkpoints": conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0],
+                "blobs": conn.execute("SELECT COUNT(*) FROM checkpoint_blobs").fetchone()[0],
+                "blob_bytes": conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM checkpoint_blobs").fetchone()[0],
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class Neo4jCheckpointStore:
+    """
+    Checkpoint rows as (:Checkpoint), (:CheckpointBlob) and (:CheckpointWrite) nodes,
+    for deployments that already share one Neo4j between API workers and hosts.
+    Uses the process-wide sync driver (ModelFactory's) unless one is injected; the
+    store never closes it.
+    """
+    def __init__(self, driver=None):
+        self._driver = driver
+        self._indexed = False
+
+    def _session(self):
+        driver = self._driver
+        if driver is None:
+            from src.agent.model_factory import ModelFactory
+            driver = ModelFactory._get_driver()
+        if not self._indexed:
+            with driver.session() as session:
+                for label, keys in (("Checkpoint", "c.thread_id, c.checkpoint_ns, c.checkpoint_id"),
+                                    ("CheckpointBlob", "c.thread_id, c.checkpoint_ns, c.channel, c.version"),
+                                    ("CheckpointWrite", "c.thread_id, c.checkpoint_ns, c.checkpoint_id")):
+                    session.run(f"CREATE INDEX {label.lower()}_key IF NOT EXISTS FOR (c:{label}) ON ({keys})")
+            self._indexed = True
+        return driver.session()
+
+    def save(self, row: CheckpointRow, blobs: Sequence[BlobRow]):
+        with self._session() as session:
+            session.execute_write(self._write, row, blobs)
+
+    @staticmethod
+    def _write(tx, row: CheckpointRow, blobs: Sequence[BlobRow]):
+        Neo4jCheckpointStore._write_blobs(tx, row.thread_id, row.checkpoint_ns, blobs)
+        tx.run("MERGE (c:Checkpoint {thread_id: $thread_id, checkpoint_ns: $checkpoint_ns, checkpoint_id: $checkpoint_id})"
+               " SET c += $props", thread_id=row.thread_id, checkpoint_ns=row.checkpoint_ns,
+               checkpoint_id=row.checkpoint_id, props=row._asdict())
+
+    @staticmethod
+    def _write_blobs(tx, thread_id, checkpoint_ns, blobs):
+        tx.run("UNWIND $blobs AS b"
+               " MERGE (c:CheckpointBlob {thread_id: $thread_id, checkpoint_ns: $checkpoint_ns, channel: b.channel, version: b.version})"
+               " SET c += b", thread_id=thread_id, checkpoint_ns=checkpoint_ns, blobs=[b._asdict() for b in blobs])
+
+    def put_blobs(self, thread_id: str, checkpoint_ns: str, blobs: Sequence[BlobRow]):
+        with self._session() as session:
+            session.execute_write(self._write_blobs, thread_id, checkpoint_ns, blobs)
+
+    def load(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str] = None) -> Optional[CheckpointRow]:
+        rows = self.history(thread_id, checkpoint_ns, checkpoint_id=checkpoint_id, limit=1)
+        return rows[0] if rows else None
+
+    def history(self, thread_id: str, checkpoint_ns: Optional[str] = None, checkpoint_id: Optional[str] = None,
+                before: Optional[str] = None, limit: Optional[int] = None) -> List[CheckpointRow]:
+        query = ("MATCH (c:Checkpoint {thread_id: $thread_id})"
+                 " WHERE ($ns IS NULL OR c.checkpoint_ns = $ns) AND ($id IS NULL OR c.checkpoint_id = $id)"
+                 " AND ($before IS NULL OR c.checkpoint_id < $before)"
+                 " RETURN c ORDER BY c.checkpoint_id DESC" + (" LIMIT $limit" if limit else ""))
+        with self._session() as session:
+            result = session.run(query, thread_id=thread_id, ns=checkpoint_ns, id=checkpoint_id, before=before, limit=limit)
+            return [CheckpointRow(**{f: r["c"].get(f) for f in CheckpointRow._fields}) for r in result]
+
+    def checkpoint_ids(self, thread_id: str, checkpoint_ns: str) -> List[str]:
+        with self._session() as session:
+            result = session.run("MATCH (c:Checkpoint {thread_id: $thread_id, checkpoint_ns: $ns})"
+                                 " RETURN c.checkpoint_id AS id ORDER BY id DESC", thread_id=thread_id, ns=checkpoint_ns)
+            return [r["id"] for r in result]
+
+    def thread_ids(self) -> List[str]:
+        with self._session() as session:
+            return [r["t"] for r in session.run("MATCH (c:Checkpoint) RETURN DISTINCT c.thread_id AS t")]
+
+    def namespaces(self) -> List[Tuple[str, str]]:
+        with self._session() as session:
+            result = session.run("MATCH (c:Checkpoint) RETURN DISTINCT c.thread_id AS t, c.checkpoint_ns AS ns")
+            return [(r["t"], r["ns"]) for r in result]
+
+    def idle_threads(self, cutoff: float) -> List[str]:
+        with self._session() as session:
+            result = session.run("MATCH (c:Checkpoint) WITH c.thread_id AS t, max(c.created_at) AS last"
+                                 " WHERE last < $cutoff RETURN t", cutoff=cutoff)
+            return [r["t"] for r in result]
+
+    def load_blobs(self, thread_id: str, checkpoint_ns: str, keys: Iterable[BlobKey]) -> Dict[BlobKey, BlobRow]:
+        with self._session() as session:
+            result = session.run("UNWIND $keys AS k MATCH (c:CheckpointBlob {thread_id: $thread_id, checkpoint_ns: $ns,"
+                                 " channel: k[0], version: k[1]}) RETURN c", thread_id=thread_id, ns=checkpoint_ns,
+                                 keys=[list(k) for k in keys])
+            rows = [BlobRow(**{f: r["c"].get(f) for f in BlobRow._fields}) for r in result]
+        return {(row.channel, row.version): row for row in rows}
+
+    def save_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, writes: Sequence[WriteRow]):
+        with self._session() as session:
+            session.run("UNWIND $writes AS w"
+                        " MERGE (c:CheckpointWrite {thread_id: $thread_id, checkpoint_ns: $ns, checkpoint_id: $id,"
+                        " task_id: w.task_id, idx: w.idx})"
+                        " ON CREATE SET c += w"
+                        " WITH c, w WHERE w.idx < 0 SET c += w",
+                        thread_id=thread_id, ns=checkpoint_ns, id=checkpoint_id, writes=[w._asdict() for w in writes])
+
+    def load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[WriteRow]:
+        with self._session() as session:
+            result = session.run("MATCH (c:CheckpointWrite {thread_id: $thread_id, checkpoint_ns: $ns, checkpoint_id: $id})"
+                                 " RETURN c ORDER BY c.task_id, c.idx", thread_id=thread_id, ns=checkpoint_ns, id=checkpoint_id)
+            return [WriteRow(**{f: r["c"].get(f) for f in WriteRow._fields}) for r in result]
+
+    def delete_thread(self, thread_id: str):
+        with self._session() as session:
+            session.run("MATCH (c) WHERE (c:Checkpoint OR c:CheckpointBlob OR c:CheckpointWrite)"
+                        " AND c.thread_id = $thread_id DETACH DELETE c", thread_id=thread_id)
+
+    def delete_checkpoints(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str]):
+        with self._session() as session:
+            session.run("MATCH (c) WHERE (c:Checkpoint OR c:CheckpointWrite) AND c.thread_id = $thread_id"
+                        " AND c.checkpoint_ns = $ns AND c.checkpoint_id IN $ids DETACH DELETE c",
+                        thread_id=thread_id, ns=checkpoint_ns, ids=list(checkpoint_ids))
+
+    def delete_blobs(self, thread_id: str, checkpoint_ns: str, keys: Iterable[BlobKey]) -> int:
+        with self._session() as session:
+            record = session.run("UNWIND $keys AS k MATCH (c:CheckpointBlob {thread_id: $thread_id, checkpoint_ns: $ns,"
+                                 " channel: k[0], version: k[1]}) DETACH DELETE c RETURN count(*) AS deleted",
+                                 thread_id=thread_id, ns=checkpoint_ns, keys=[list(k) for k in keys]).single()
+            return record["deleted"] if record else 0
+
+    def size(self) -> Dict[str, int]:
+        with self._session() as session:
+            record = session.run("OPTIONAL MATCH (c:Checkpoint) WITH count(c) AS checkpoints"
+                                 " OPTIONAL MATCH (b:CheckpointBlob)"
+                                 " RETURN checkpoints, count(b) AS blobs, coalesce(sum(size(b.data)), 0) AS blob_bytes").single()
+            return dict(record)
+
+    def close(self):
+        # The driver is shared; ModelFactory.close (or whoever injected it) closes it
+        pass
+
+class _Head(NamedTuple):
+    version: str
+    items: tuple   # the list as written, for prefix checks by identity
+    depth: int     # deltas between this version and its full base
+
+class DeltaCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer over a SQLiteCheckpointStore or Neo4jCheckpointStore.
+
+    Only channels that changed in a step are written, and list channels that grew by
+    appending (`messages` with its `operator.add` reducer) are written as a delta: the
+    new items plus the version they extend. A full value is written every
+    `delta_chain_max` deltas so loads stay short. `compact` applies the retention policy:
+    threads idle for `retention_seconds` are deleted, only the newest `keep_last`
+    checkpoints of a thread are kept, and blobs no kept checkpoint needs are dropped.
+    """
+    def __init__(
+        self,
+        store,
+        *,
+        serde=None,
+        delta_chain_max: int = config.CHECKPOINT_DELTA_CHAIN_MAX,
+        keep_last: int = config.CHECKPOINT_KEEP_PER_THREAD,
+        retention_seconds: float = config.CHECKPOINT_RETENTION_SECONDS,
+        max_heads: int = 4096,
+    ):
+        super().__init__(serde=serde)
+        self.store = store
+        self.delta_chain_max = delta_chain_max
+        self.keep_last = keep_last
+        self.retention_seconds = retention_seconds
+        self.max_heads = max_heads
+        self._heads: "OrderedDict[Tuple[str, str, str], _Head]" = OrderedDict()  # (thread, ns, channel) -> last write
+        self._lock = threading.Lock()
+        self._stats = {"checkpoints": 0, "full_blobs": 0, "delta_blobs": 0, "bytes_written": 0, "loads": 0,
+                       "compactions": 0, "threads_expired": 0, "checkpoints_pruned": 0, "blobs_pruned": 0}
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Random suffix keeps versions unique when a thread forks from an older checkpoint
+        number = 0 if current is None else int(str(current).split(".")[0])
+        return f"{number + 1:032}.{random.random():016}"
+
+    # Writes
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        blobs = [self._encode(thread_id, checkpoint_ns, channel, str(version), values.get(channel, _MISSING))
+                 for channel, version in new_versions.items()]
+        type_, data = self.serde.dumps_typed(c)
+        meta_type, meta = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        row = CheckpointRow(thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                            type_, data, meta_type, meta, time.time())
+        self.store.save(row, blobs)
+        self._stats["checkpoints"] += 1
+        self._stats["bytes_written"] += len(data) + len(meta) + sum(len(b.data) for b in blobs)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def _encode(self, thread_id: str, checkpoint_ns: str, channel: str, version: str, value: Any) -> BlobRow:
+        if value is _MISSING:
+            return BlobRow(channel, version, BLOB_EMPTY, None, "empty", b"")
+        key = (thread_id, checkpoint_ns, channel)
+        with self._lock:
+            head = self._heads.get(key)
+        if (isinstance(value, list) and head is not None and head.depth < self.delta_chain_max
+                and len(value) >= len(head.items) and all(a is b for a, b in zip(head.items, value))):
+            type_, data = self.serde.dumps_typed(value[len(head.items):])
+            row, depth = BlobRow(channel, version, BLOB_DELTA, head.version, type_, data), head.depth + 1
+            self._stats["delta_blobs"] += 1
+        else:
+            type_, data = self.serde.dumps_typed(value)
+            row, depth = BlobRow(channel, version, BLOB_FULL, None, type_, data), 0
+            self._stats["full_blobs"] += 1
+        if isinstance(value, list):
+            self._remember(key, _Head(version, tuple(value), depth))
+        return row
+
+    def _remember(self, key, head: _Head):
+        with self._lock:
+            self._heads[key] = head
+            self._heads.move_to_end(key)
+            while len(self._heads) > self.max_heads:
+                self._heads.popitem(last=False)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        rows = [WriteRow(task_id, WRITES_IDX_MAP.get(channel, idx), channel, *self.serde.dumps_typed(value), task_path)
+                for idx, (channel, value) in enumerate(writes)]
+        self.store.save_writes(config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""),
+                               config["configurable"]["checkpoint_id"], rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.store.delete_thread(thread_id)
+        with self._lock:
+            for key in [k for k in self._heads if k[0] == thread_id]:
+                del self._heads[key]
+
+    # Reads
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        row = self.store.load(thread_id, checkpoint_ns, checkpoint_id)
+        if row is None:
+            return None
+        # A run continues from the latest checkpoint: later writes can be deltas of what it loads
+        return self._tuple(row, prime=checkpoint_id is None)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        thread_ids = [config["configurable"]["thread_id"]] if config else self.store.thread_ids()
+        checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        checkpoint_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        for thread_id in thread_ids:
+            rows = self.store.history(thread_id, checkpoint_ns, checkpoint_id, before_id, None if filter else limit)
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    return
+                if filter:
+                    metadata = self.serde.loads_typed((row.metadata_type, row.metadata))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None:
+                    limit -= 1
+                yield self._tuple(row)
+
+    def _tuple(self, row: CheckpointRow, prime: bool = False) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed((row.type, row.data))
+        values = self._load_values(row.thread_id, row.checkpoint_ns, checkpoint["channel_versions"], prime)
+        writes = self.store.load_writes(row.thread_id, row.checkpoint_ns, row.checkpoint_id)
+        self._stats["loads"] += 1
+        configurable = {"thread_id": row.thread_id, "checkpoint_ns": row.checkpoint_ns}
+        return CheckpointTuple(
+            config={"configurable": {**configurable, "checkpoint_id": row.checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((row.metadata_type, row.metadata)),
+            parent_config={"configurable": {**configurable, "checkpoint_id": row.parent_id}} if row.parent_id else None,
+            pending_writes=[(w.task_id, w.channel, self.serde.loads_typed((w.type, w.data))) for w in writes],
+        )
+
+    def _load_values(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions, prime: bool = False) -> Dict[str, Any]:
+        keys = [(channel, str(version)) for channel, version in versions.items()]
+        rows = self._load_chains(thread_id, checkpoint_ns, keys)
+        values = {}
+        for channel, version in keys:
+            row = rows.get((channel, version))
+            if row is None or row.kind == BLOB_EMPTY:
+                continue
+            value, depth = self._materialize(row, rows)
+            values[channel] = value
+            if prime and isinstance(value, list):
+                self._remember((thread_id, checkpoint_ns, channel), _Head(version, tuple(value), depth))
+        return values
+
+    def _load_chains(self, thread_id: str, checkpoint_ns: str, keys: Sequence[BlobKey]) -> Dict[BlobKey, BlobRow]:
+        """Blobs for `keys` plus every version their deltas extend."""
+        rows = self.store.load_blobs(thread_id, checkpoint_ns, keys)
+        while True:
+            missing = {(r.channel, r.base) for r in rows.values() if r.kind == BLOB_DELTA and (r.channel, r.base) not in rows}
+            if not missing:
+                return rows
+            found = self.store.load_blobs(thread_id, checkpoint_ns, missing)
+            if not found:
+                raise ValueError(f"Checkpoint blobs {sorted(missing)} of thread '{thread_id}' are missing")
+            rows.update(found)
+
+    def _materialize(self, row: BlobRow, rows: Dict[BlobKey, BlobRow]) -> Tuple[Any, int]:
+        chain = [row]
+        while chain[-1].kind == BLOB_DELTA:
+            chain.append(rows[(row.channel, chain[-1].base)])
+        value = self.serde.loads_typed((chain[-1].type, chain[-1].data))
+        if len(chain) == 1:
+            return value, 0
+        value = list(value)
+        for delta in reversed(chain[:-1]):
+            value.extend(self.serde.loads_typed((delta.type, delta.data)))
+        return value, len(chain) - 1
+
+    # Retention
+
+    def compact(self, keep_last: Optional[int] = None, retention_seconds: Optional[float] = None) -> Dict[str, int]:
+        """
+        Deletes idle threads and old checkpoints. Deltas a kept checkpoint needs whose
+        base would be deleted are rewritten as full values first.
+        """
+        keep_last = keep_last or self.keep_last
+        retention_seconds = retention_seconds or self.retention_seconds
+        result = {"threads_expired": 0, "checkpoints_pruned": 0, "blobs_pruned": 0}
+        for thread_id in self.store.idle_threads(time.time() - retention_seconds):
+            self.delete_thread(thread_id)
+            result["threads_expired"] += 1
+
+        for thread_id, checkpoint_ns in self.store.namespaces():
+            ids = self.store.checkpoint_ids(thread_id, checkpoint_ns)
+            if len(ids) <= keep_last:
+                continue
+            needed, dropped = self._versions(thread_id, checkpoint_ns, ids[:keep_last]), \
+                self._versions(thread_id, checkpoint_ns, ids[keep_last:])
+
+            rows = self._load_chains(thread_id, checkpoint_ns, list(needed))
+            rewritten = []
+            for key in needed:
+                row = rows.get(key)
+                if row is not None and row.kind == BLOB_DELTA and (row.channel, row.base) not in needed:
+                    value, _ = self._materialize(row, rows)
+                    rewritten.append(BlobRow(row.channel, row.version, BLOB_FULL, None, *self.serde.dumps_typed(value)))
+            if rewritten:
+                self.store.put_blobs(thread_id, checkpoint_ns, rewritten)
+                # Later deltas of this process must not extend a chain whose depth changed
+                with self._lock:
+                    for blob in rewritten:
+                        self._heads.pop((thread_id, checkpoint_ns, blob.channel), None)
+
+            self.store.delete_checkpoints(thread_id, checkpoint_ns, ids[keep_last:])
+            result["checkpoints_pruned"] += len(ids) - keep_last
+            # Only blobs the pruned checkpoints introduced: checkpoints written meanwhile are left alone
+            result["blobs_pruned"] += self.store.delete_blobs(thread_id, checkpoint_ns, dropped - needed)
+
+        self._stats["compactions"] += 1
+        for key, count in result.items():
+            self._stats[key] += count
+        return result
+
+    def _versions(self, thread_id: str, checkpoint_ns: str, checkpoint_ids: Sequence[str]) -> Set[BlobKey]:
+        versions: Set[BlobKey] = set()
+        for checkpoint_id in checkpoint_ids:
+            row = self.store.load(thread_id, checkpoint_ns, checkpoint_id)
+            if row is not None:
+                checkpoint = self.serde.loads_typed((row.type, row.data))
+                versions.update((channel, str(version)) for channel, version in checkpoint["channel_versions"].items())
+        return versions
+
+    # Async API (the stores are synchronous; calls run in worker threads)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def acompact(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self.compact)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            store = self.store.size()
+        except Exception as e:
+            store = {"error": str(e)}
+        return {**self._stats, "store": store}
+
+    def close(self):
+        self.store.close()
+
+_MISSING = object()
+
+def build_checkpointer() -> Optional[DeltaCheckpointSaver]:
+    """Checkpointer for CHECKPOINT_BACKEND ('sqlite', 'neo4j' or 'off')."""
+    backend = config.CHECKPOINT_BACKEND.lower()
+    if backend == "sqlite":
+        return DeltaCheckpointSaver(SQLiteCheckpointStore(config.CHECKPOINT_SQLITE_PATH))
+    if backend == "neo4j":
+        return DeltaCheckpointSaver(Neo4jCheckpointStore())
+    if backend not in ("off", "none", ""):
+        logger.warning(f"Unknown CHECKPOINT_BACKEND '{backend}'; runs are not checkpointed")
+    return None
+
+async def compact_periodically(saver: DeltaCheckpointSaver, interval: float = config.CHECKPOINT_COMPACT_INTERVAL_SECONDS):
+    """Background retention task started by the API server."""
+    while True:
+        try:
+            result = await saver.acompact()
+            if any(result.values()):
+                logger.info(f"Checkpoint compaction: {result}")
+        except Exception as e:
+            logger.error(f"Checkpoint compaction failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import threading
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Tokens of per-message framing (role, separators) in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant that uses tools.
+Update the summary with the new messages. Keep facts, decisions, tool results that were relied on, open questions and
+what the user asked for; drop pleasantries and repetition. Reply with the summary only, at most {max_words} words."""
+
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+def _load_encoder() -> Optional[Callable[[str], int]]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken is optional and downloads its encodings on first use
+        logger.info(f"tiktoken unavailable ({e!r}); estimating ~4 characters per token")
+        return None
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+class TokenCounter:
+    """
+    Token counts of messages, memoized per message so every step only tokenizes
+    what was appended since the last one. Messages are keyed by type and content
+    hash (str caches its own hash, so repeated lookups are O(1)).
+    """
+    def __init__(self, encode: Optional[Callable[[str], int]] = None, max_entries: int = 8192):
+        self._encode = encode
+        self._loaded = encode is not None
+        self._cache: "OrderedDict[Tuple, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def count_text(self, text: str) -> int:
+        if not self._loaded:
+            self._encode, self._loaded = _load_encoder(), True
+        return self._encode(text) if self._encode else (len(text) + 3) // 4
+
+    def count(self, message: BaseMessage) -> int:
+        key = message_key(message)
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return tokens
+        tokens = self.count_text(_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        for call in getattr(message, "tool_calls", None) or []:
+            tokens += self.count_text(f"{call.get('name')}{call.get('args')}")
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = tokens
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+def message_key(message: BaseMessage) -> Tuple:
+    content = _text(message)
+    calls = tuple(call.get("id") or call.get("name") for call in getattr(message, "tool_calls", None) or [])
+    return (message.type, hash(content), len(content), calls)
+
+class ContextWindowManager:
+    """
+    Packs a conversation into a model's token budget before each LLM call.
+
+    When the history does not fit, it is sent as:
+      - pinned messages: system messages, the first user message (the task) and the
+        latest user message, always verbatim;
+      - a rolling summary of the older turns, written by a cheap model;
+      - the most recent turns verbatim.
+    Summaries are cached by a fingerprint of the prefix they cover, and each new
+    summary extends the longest cached one instead of re-reading the whole prefix.
+    Once a summary is needed, the recent turns are trimmed to `summary_target` of the
+    budget so the same summary keeps fitting for several more steps.
+    """
+    def __init__(
+        self,
+        summarize: Optional[Callable[[Optional[str], List[BaseMessage]], Awaitable[str]]] = None,
+        counter: Optional[TokenCounter] = None,
+        response_tokens: int = config.AGENT_CONTEXT_RESPONSE_TOKENS,
+        summary_target: float = config.AGENT_CONTEXT_SUMMARY_TARGET,
+        max_summaries: int = 512,
+    ):
+        self.summarize = summarize or summarize_with_model
+        self.counter = counter or TokenCounter()
+        self.response_tokens = response_tokens
+        self.summary_target = summary_target
+        self.max_summaries = max_summaries
+        self._summaries: "OrderedDict[int, str]" = OrderedDict()  # prefix fingerprint -> summary
+        self._lock = threading.Lock()
+        self._stats = {"packs": 0, "trimmed": 0, "summaries": 0, "summary_hits": 0, "summary_failures": 0,
+                       "tokens_in": 0, "tokens_out": 0}
+
+    async def pack(self, messages: Sequence[BaseMessage], context_window: int, reserved_tokens: int = 0) -> List[BaseMessage]:
+        """
+        Messages to send in place of `messages`, fitting `context_window` minus the
+        response allowance and `reserved_tokens` (system prompt, tool definitions).
+        """
+        budget = context_window - self.response_tokens - reserved_tokens
+        tokens = [self.counter.count(m) for m in messages]
+        total = sum(tokens)
+        self._stats["packs"] += 1
+        self._stats["tokens_in"] += total
+        if total <= budget or len(messages) < 2:
+            self._stats["tokens_out"] += total
+            return list(messages)
+
+        pinned, first_user = self._pinned(messages)
+        fingerprints = _fingerprints(messages)
+
+        # Reuse the longest cached summary whose remaining tail still fits
+        cached_cut, cached_summary = self._longest_cached(fingerprints, len(messages) - 1)
+        if cached_summary is not None:
+            packed = self._assemble(messages, pinned, first_user, cached_cut, cached_summary)
+            if sum(self.counter.count(m) for m in packed) <= budget:
+                self._stats["summary_hits"] += 1
+                return self._finish(packed)
+
+        cut = self._cut(messages, tokens, pinned, budget)
+        summary = await self._summary(messages, pinned, fingerprints, cut, cached_cut, cached_summary)
+        # The newest turn is kept even if it alone exceeds the budget
+        return self._finish(self._assemble(messages, pinned, first_user, cut, summary))
+
+    @staticmethod
+    def _pinned(messages: Sequence[BaseMessage]) -> Tuple[set, Optional[int]]:
+        pinned = {i for i, m in enumerate(messages) if isinstance(m, SystemMessage)}
+        users = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if users:
+            pinned.update((users[0], users[-1]))
+        return pinned, users[0] if users else None
+
+    def _cut(self, messages, tokens, pinned, budget) -> int:
+        """Index of the first recent message kept verbatim once older turns are summarized."""
+        target = budget * self.summary_target - sum(tokens[i] for i in pinned)
+        used, cut = 0, len(messages)
+        while cut > 1:
+            cost = 0 if cut - 1 in pinned else tokens[cut - 1]
+            if used + cost > target and cut < len(messages):
+                break
+            cut -= 1
+            used += cost
+        # Tool results must follow the message that requested them
+        while cut > 1 and isinstance(messages[cut], ToolMessage):
+            cut -= 1
+        return cut
+
+    def _longest_cached(self, fingerprints: List[int], limit: int) -> Tuple[int, Optional[str]]:
+        with self._lock:
+            for cut in range(limit, 0, -1):
+                summary = self._summaries.get(fingerprints[cut])
+                if summary is not None:
+                    self._summaries.move_to_end(fingerprints[cut])
+                    return cut, summary
+        return 0, None
+
+    async def _summary(self, messages, pinned, fingerprints, cut, cached_cut, cached_summary) -> Optional[str]:
+        start, previous = (cached_cut, cached_summary) if cached_summary is not None and cached_cut <= cut else (0, None)
+        new = [m for i, m in enumerate(messages[start:cut], start) if i not in pinned]
+        if not new:
+            return previous
+        try:
+            summary = await self.summarize(previous, new)
+        except Exception as e:
+            self._stats["summary_failures"] += 1
+            logger.warning(f"Context summary failed, dropping {len(new)} older messages instead: {e!r}")
+            return previous
+        self._stats["summaries"] += 1
+        with self._lock:
+            self._summaries[fingerprints[cut]] = summary
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+    @staticmethod
+    def _assemble(messages, pinned, first_user, cut, summary) -> List[BaseMessage]:
+        # System messages and the task lead, then the summary, then a pinned latest user message
+        head = [(i, m) for i, m in enumerate(messages[:cut]) if i in pinned]
+        leading = [m for i, m in head if isinstance(m, SystemMessage) or i == first_user]
+        trailing = [m for i, m in head if not (isinstance(m, SystemMessage) or i == first_user)]
+        middle = [SystemMessage(content=SUMMARY_HEADER + summary)] if summary else []
+        return leading + middle + trailing + list(messages[cut:])
+
+    def _finish(self, packed: List[BaseMessage]) -> List[BaseMessage]:
+        self._stats["trimmed"] += 1
+        self._stats["tokens_out"] += sum(self.counter.count(m) for m in packed)
+        return packed
+
+    def clear(self):
+        with self._lock:
+            self._summaries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "cached_summaries": len(self._summaries),
+                "token_counter": {"hits": self.counter.hits, "misses": self.counter.misses}}
+
+def _fingerprints(messages: Sequence[BaseMessage]) -> List[int]:
+    """fingerprints[i] identifies messages[:i] (chained, so a shared prefix shares fingerprints)."""
+    fingerprints = [0]
+    for message in messages:
+        fingerprints.append(hash((fingerprints[-1], message_key(message))))
+    return fingerprints
+
+async def summarize_with_model(previous: Optional[str], messages: List[BaseMessage], max_words: int = 250) -> str:
+    from src.agent.model_factory import ModelFactory
+
+    transcript = "\n".join(f"{m.type}: {_text(m)[:2000]}" for m in messages)
+    prompt = [
+        SystemMessage(content=SUMMARY_PROMPT.format(max_words=max_words)),
+        HumanMessage(content=f"Current summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"),
+    ]
+    llm = ModelFactory.get_model(config.AGENT_CONTEXT_SUMMARY_MODEL)
+    # Not streamed to the chat client (see src/api/chat_stream.py)
+    response = await llm.ainvoke(prompt, config={"tags": ["nostream", "context_summary"]})
+    return response.content.strip()
+
+# Used by agent_node
+context_manager = ContextWindowManager()
@@ -1,6 +1,9 @@
+from typing import Optional
 from langgraph.graph import StateGraph, END
-from src.agent.state import AgentState
+from src.agent.state import AgentProfile, AgentState
 from src.agent.nodes import agent_node, ReflectionNode, tool_node
+from src.agent.settings_store import settings_store
+from src.agent.checkpoint import build_checkpointer
 
 # Instantiate class-based nodes
 reflection_node = ReflectionNode()
@@ -8,73 +11,86 @@ reflection_node = ReflectionNode()
 def route_agent_output(state: AgentState):
     """
     Determines if the agent is calling a tool or producing a final answer.
+    Reads the calls `agent_node` parsed instead of rescanning the message.
     """
-    messages = state['messages']
-    last_message = messages[-1]
-    content = last_message.content
-    
-    # Check for JSON tool call pattern
-    import re
-    if re.search(r'\{.*"tool":.*\}', content, re.DOTALL):
+    if state.get("tool_calls"):
         return "tools"
     return "reflect"
 
 def should_continue(state: AgentState):
     """
     Router logic based on reflection score and retry count.
+    Thresholds come from the in-memory settings snapshot (no database access).
     """
     score = state.get('reflection_score', 0.0)
     retries = state.get('retry_count', 0)
+    settings = settings_store.current()
     
-    if score >= 0.8:
+    if score >= settings.pass_threshold:
         print("Reflection Passed. Ending.")
         return "end"
-    if retries >= 3: # Max 3 retries (total 4 attempts)
+    if retries >= settings.max_retries: # Default 3 retries (total 4 attempts)
         print("Max retries reached. Ending.")
         return "end" # Or redirect to a 'failure' node
     
     print("Reflection Failed. Retrying.")
     return "agent"
 
-# Define the graph
-workflow = StateGraph(AgentState)
+def build_graph(profile: Optional[AgentProfile] = None):
+    """
+    Compiles the agent graph. With a `profile`, the agent and tool nodes run with that
+    agent's instructions, model tier and tool allow-list (see AgentGraphRegistry).
+    """
+    async def agent(state: AgentState):
+        return await agent_node(state, profile)
+
+    async def tools(state: AgentState):
+        return await tool_node(state, profile)
+
+    workflow = StateGraph(AgentState)
+
+    # Add nodes
+    workflow.add_node("agent", agent)
+    workflow.add_node("reflect", reflection_node)
+    workflow.add_node("tools", tools)
 
-# Add nodes
-workflow.add_node("agent", agent_node)
-workflow.add_node("reflect", reflection_node)
-workflow.add_node("tools", tool_node)
+    # Set entry point
+    workflow.set_entry_point("agent")
 
-# Set entry point
-workflow.set_entry_point("agent")
+    # Add edges
+    workflow.add_edge("tools", "agent")
 
-# Add edges
-workflow.add_edge("tools", "agent")
+    # Conditional Edges
+    # 1. From Agent -> Tools OR Reflect
+    workflow.add_conditional_edges(
+        "agent",
+        route_agent_output,
+        {
+            "tools": "tools",
+            "reflect": "reflect"
+        }
+    )
 
-# Conditional Edges
-# 1. From Agent -> Tools OR Reflect
-workflow.add_conditional_edges(
-    "agent",
-    route_agent_output,
-    {
-        "tools": "tools",
-        "reflect": "reflect"
-    }
-)
+    # 2. From Reflect -> End OR Agent (Loop)
+    workflow.add_conditional_edges(
+        "reflect",
+        should_continue,
+        {
+            "end": END,
+            "agent": "agent"
+        }
+    )
 
-# 2. From Reflect -> End OR Agent (Loop)
-workflow.add_conditional_edges(
-    "reflect",
-    should_continue,
-    {
-        "end": END,
-        "agent": "agent"
-    }
-)
+    # The refinement loop (reflect -> agent) is the conditional edge above; an extra
+    # unconditional edge would re-run the agent even after reflection passed.
+    # In a real implementation, we might want a specific 'refine' node that
+    # takes the critique and modifies the original query
 
-# Loop back from reflection to agent (Refinement Loop)
-# In a real implementation, we might want a specific 'refine' node that
-# takes the critique and modifies the original query
-workflow.add_edge("reflect", "agent")
+    # State is checkpointed after every node (CHECKPOINT_BACKEND), so runs need a
+    # `thread_id` in their configurable and an interrupted one resumes with input None.
+    # All graphs share the checkpointer, so a thread can be read back through any of them.
+    return workflow.compile(checkpointer=checkpointer)
 
-# Compile the graph
-app = workflow.compile()
+checkpointer = build_checkpointer()
+# Graph for runs without an agent; per-agent graphs come from src/agent/agent_graphs.py
+app = build_graph()
@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Sequence
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Per-request opt-out. Set through `bypass_memo()` for the duration of a run.
+_bypass: ContextVar[bool] = ContextVar("llm_memo_bypass", default=False)
+
+@contextmanager
+def bypass_memo(enabled: bool = True):
+    """Skips memo lookups and writes for LLM calls made inside this context."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+class SQLiteLLMMemo(BaseCache):
+    """
+    Exact-match memoization of chat model calls in a bounded SQLite file.
+
+    Plugged into models as LangChain's `cache=`, so the key covers the serialized
+    messages (`prompt`) and the model name plus invocation parameters (`llm_string`).
+    The file is opened in WAL mode so uvicorn workers on one host share entries and
+    entries survive restarts. Entries older than `max_age_seconds` are dropped, and the
+    least recently used entries are evicted once the stored payloads exceed `max_bytes`.
+    """
+    def __init__(self, path: str, max_bytes: int, max_age_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "bypassed": 0, "evicted": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_memo ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_memo_accessed ON llm_memo (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_memo_created ON llm_memo (created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if _bypass.get():
+            self._stats["bypassed"] += 1
+            return None
+
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_memo WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.max_age_seconds:
+                    self._stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE llm_memo SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            self._stats["hits"] += 1
+            return [loads(item) for item in json.loads(row[0])]
+        except Exception as e:
+            logger.error(f"LLM memo lookup failed: {e}")
+            self._stats["misses"] += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if _bypass.get():
+            return
+
+        key = self._key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_memo (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            self._stats["writes"] += 1
+        except Exception as e:
+            logger.error(f"LLM memo update failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        expired = conn.execute(
+            "DELETE FROM llm_memo WHERE created_at < ?", (now - self.max_age_seconds,)
+        ).rowcount
+        self._stats["evicted"] += max(expired, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_memo").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under budget
+        to_free = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_memo ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        conn.executemany("DELETE FROM llm_memo WHERE key = ?", victims)
+        self._stats["evicted"] += len(victims)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_memo")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        summary = {**self._stats, "hit_rate": self._stats["hits"] / lookups if lookups else 0.0}
+        try:
+            with self._lock:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_memo"
+                ).fetchone()
+            summary.update({"entries": entries, "bytes": size})
+        except Exception as e:
+            logger.error(f"LLM memo stats failed: {e}")
+        return summary
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+llm_memo = SQLiteLLMMemo(
+    path=config.LLM_MEMO_PATH,
+    max_bytes=config.LLM_MEMO_MAX_BYTES,
+    max_age_seconds=config.LLM_MEMO_MAX_AGE_SECONDS,
+)
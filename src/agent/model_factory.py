@@ -1,70 +1,234 @@
 from langchain_openai import ChatOpenAI
 from langchain_community.chat_models import ChatOllama
 from src.utils.config import config
+from src.agent.llm_memo import llm_memo
+from src.agent.model_router import model_router
+from src.agent.settings_store import settings_store
 from neo4j import GraphDatabase
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 class ModelFactory:
-    @staticmethod
-    def get_model(model_type: str = "smart"):
+    """
+    Resolves logical model types ('fast', 'smart', ...) to chat model instances.
+
+    Resolved instances are cached in-process keyed by (logical type, physical model name),
+    so the Neo4j lookup and client construction only happen on a cache miss.
+    Call `invalidate()` whenever Model nodes change; new SystemSettings versions
+    invalidate it through the settings store.
+
+    Besides the configured model, every registered Model node that lists the logical type
+    in its `tiers` is an equivalent candidate. On each call the candidates are ordered by
+    the ModelRouter (expected latency, load, errors) and the rest serve as fallbacks.
+    """
+    _driver = None
+    _lock = threading.RLock()
+    _generation = 0
+    _resolved: Dict[str, List[str]] = {}           # logical type -> candidate model names, configured first
+    _instances: Dict[Tuple[str, str], Any] = {}    # (logical type, model name) -> chat model
+    _windows: Dict[str, int] = {}                  # logical type -> smallest context_window of its candidates
+    _backends: Dict[str, Tuple[str, Optional[int], Optional[int]]] = {}  # logical type -> configured model's admission limits
+    _stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @classmethod
+    def get_model(cls, model_type: str = "smart"):
         """
         Returns a Chat model instance based on the logical model type.
         Prioritizes Global Settings from Neo4j, falls back to Config.
         """
-        
-        # 1. Fetch Global Settings to see if there's a default override for "smart" or "fast"
-        # For simplicity, we mapped "model_selection_llm_model" in Settings, which acts as the default "smart" model.
-        # If model_type is 'fast' or 'reflector', we might still look up config or specific settings.
-        # For now, let's implement a robust lookup.
-        
-        driver = GraphDatabase.driver(config.NEO4J_URI, auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD))
-        
+        with cls._lock:
+            names = cls._resolved.get(model_type)
+            if names is not None and all((model_type, n) in cls._instances for n in names):
+                cls._stats["hits"] += 1
+                return cls._route(model_type, names, {n: cls._instances[(model_type, n)] for n in names})
+            cls._stats["misses"] += 1
+            generation = cls._generation
+
+        name, model_node, cacheable = cls._resolve(model_type)
+        candidates = [(name, model_node)]
+        if cacheable:
+            candidates += cls._alternatives(model_type, name)
+        models = {n: cls._build(n, node) for n, node in candidates}
+        names = [n for n, _ in candidates]
+        # Any candidate may serve the call, so the smallest window is the safe one
+        windows = [int(node["context_window"]) for _, node in candidates if node and node.get("context_window")]
+        limits = model_node or {}
+        backend = (name, limits.get("max_concurrency"), limits.get("max_queue"))
+
+        with cls._lock:
+            # Skip caching if an invalidation happened while we were resolving
+            if cacheable and generation == cls._generation:
+                cls._resolved[model_type] = names
+                if windows:
+                    cls._windows[model_type] = min(windows)
+                cls._backends[model_type] = backend
+                for n, model in models.items():
+                    cls._instances[(model_type, n)] = model
+        return cls._route(model_type, names, models)
+
+    @staticmethod
+    def _route(model_type: str, names: List[str], models: Dict[str, Any]):
+        """Best candidate first, the others as automatic fallbacks on error."""
+        if len(names) == 1:
+            return models[names[0]]
+        ranked = model_router.rank(names)
+        if ranked[0] != names[0]:
+            logger.info(f"ModelFactory: routing '{model_type}' to '{ranked[0]}' instead of '{names[0]}'")
+        return models[ranked[0]].with_fallbacks([models[n] for n in ranked[1:]])
+
+    @classmethod
+    def context_window(cls, model_type: str) -> int:
+        """
+        Context window (tokens) of a logical model type from the Model registry's
+        `context_window`, or AGENT_CONTEXT_WINDOW_DEFAULT for unregistered models.
+        """
+        with cls._lock:
+            if model_type in cls._resolved:
+                return cls._windows.get(model_type, config.AGENT_CONTEXT_WINDOW_DEFAULT)
+        cls.get_model(model_type)
+        with cls._lock:
+            return cls._windows.get(model_type, config.AGENT_CONTEXT_WINDOW_DEFAULT)
+
+    @classmethod
+    def backend(cls, model_type: str) -> Tuple[str, Optional[int], Optional[int]]:
+        """
+        (model name, max_concurrency, max_queue) of the configured model for a logical
+        type, for admission control; limits are None unless set on its Model node.
+        """
+        with cls._lock:
+            if model_type in cls._backends:
+                return cls._backends[model_type]
+        cls.get_model(model_type)
+        with cls._lock:
+            fallback = (config.MODEL_CONFIG.get(model_type, config.MODEL_CONFIG["smart"]), None, None)
+            return cls._backends.get(model_type, fallback)
+
+    @classmethod
+    def _get_driver(cls):
+        with cls._lock:
+            if cls._driver is None:
+                cls._driver = GraphDatabase.driver(
+                    config.NEO4J_URI,
+                    auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD),
+                    max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+                    connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+                )
+            return cls._driver
+
+    @staticmethod
+    def get_settings() -> Mapping[str, Any]:
+        """
+        Returns the flat SystemSettings properties of the current settings snapshot
+        (see src/agent/settings_store.py). Empty when no settings are stored.
+        """
+        return settings_store.current().values
+
+    @classmethod
+    def _resolve(cls, model_type: str) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+        """
+        Looks up the physical model name and its registry node.
+        Returns (model_name, model_node_props, cacheable). Results are not cacheable
+        when the database could not be reached, so the next call retries.
+        """
         target_model_name = config.MODEL_CONFIG.get(model_type, config.MODEL_CONFIG["smart"])
-        
+
+        # "model_selection_llm_model" in Settings acts as the default "smart" model.
+        if model_type == "smart":
+            target_model_name = cls.get_settings().get("model_selection_llm_model", target_model_name)
+
         try:
-            with driver.session() as session:
-                # Get Global Settings
-                settings_query = "MATCH (s:SystemSettings {id: 'global'}) RETURN s"
-                result = session.run(settings_query).single()
-                if result:
-                    props = dict(result["s"])
-                    # If the request is for the main "smart" model, use the global default
-                    if model_type == "smart":
-                         target_model_name = props.get("model_selection_llm_model", target_model_name)
-                    
+            with cls._get_driver().session() as session:
                 # Now resolve the physical model details from Model Registry
                 model_query = "MATCH (m:Model {name: $name}) RETURN m"
                 model_result = session.run(model_query, name=target_model_name).single()
-                
-                if model_result:
-                     m_node = model_result["m"]
-                     provider = m_node.get("provider", "openai")
-                     base_url = m_node.get("base_url") 
-                     # api_key = m_node.get("api_key") # If stored
-                     
-                     if provider == "openai":
-                         return ChatOpenAI(model=target_model_name, api_key=config.OPENAI_API_KEY)
-                     elif provider == "ollama":
-                         return ChatOllama(
-                            model=target_model_name,
-                            base_url=base_url or config.OLLAMA_BASE_URL,
-                            temperature=0.1
-                         )
+                model_node = dict(model_result["m"]) if model_result else None
+                return target_model_name, model_node, True
         except Exception as e:
             logger.error(f"ModelFactory Error: {e}")
             # Fallback to config
-            pass
-        finally:
-            driver.close()
+            return target_model_name, None, False
+
+    @classmethod
+    def _alternatives(cls, model_type: str, primary: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Registered models that declare they can serve `model_type`, other than the primary."""
+        try:
+            with cls._get_driver().session() as session:
+                query = (
+                    "MATCH (m:Model) WHERE $tier IN coalesce(m.tiers, []) AND m.name <> $name "
+                    "RETURN m ORDER BY m.name"
+                )
+                return [(record["m"]["name"], dict(record["m"]))
+                        for record in session.run(query, tier=model_type, name=primary)]
+        except Exception as e:
+            logger.error(f"ModelFactory Error loading alternatives for '{model_type}': {e}")
+            return []
 
-        # Fallback implementation if DB fails
-        if "gpt" in target_model_name:
-            return ChatOpenAI(model=target_model_name, api_key=config.OPENAI_API_KEY)
+    @staticmethod
+    def _build(model_name: str, model_node: Optional[Dict[str, Any]]):
+        # Opt-in exact-match memoization of calls (see src/agent/llm_memo.py)
+        common = {"cache": llm_memo} if config.LLM_MEMO_ENABLED else {}
+        # Latency, load and error tracking for routing (see src/agent/model_router.py)
+        common["callbacks"] = [model_router.callback(model_name)]
+
+        if model_node:
+            provider = model_node.get("provider", "openai")
+            base_url = model_node.get("base_url")
+            # api_key = model_node.get("api_key") # If stored
+
+            if provider == "openai":
+                return ChatOpenAI(model=model_name, api_key=config.OPENAI_API_KEY, **common)
+            elif provider == "ollama":
+                return ChatOllama(
+                    model=model_name,
+                    base_url=base_url or config.OLLAMA_BASE_URL,
+                    temperature=0.1,
+                    **common
+                )
+
+        # Fallback implementation if DB fails or the model is not registered
+        if "gpt" in model_name:
+            return ChatOpenAI(model=model_name, api_key=config.OPENAI_API_KEY, **common)
         else:
             return ChatOllama(
-                model=target_model_name,
+                model=model_name,
                 base_url=config.OLLAMA_BASE_URL,
-                temperature=0.1
+                temperature=0.1,
+                **common
             )
+
+    @classmethod
+    def invalidate(cls):
+        """Drops all cached resolutions and model instances."""
+        with cls._lock:
+            cls._generation += 1
+            cls._resolved.clear()
+            cls._instances.clear()
+            cls._windows.clear()
+            cls._backends.clear()
+            cls._stats["invalidations"] += 1
+        logger.info("ModelFactory cache invalidated.")
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            lookups = cls._stats["hits"] + cls._stats["misses"]
+            return {
+                **cls._stats,
+                "hit_rate": cls._stats["hits"] / lookups if lookups else 0.0,
+                "cached_models": [f"{t}:{n}" for t, n in cls._instances],
+                "candidates": {t: list(names) for t, names in cls._resolved.items()},
+            }
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            if cls._driver is not None:
+                cls._driver.close()
+                cls._driver = None
+        llm_memo.close()
+
+# The default "smart" model is a setting
+settings_store.subscribe(lambda snapshot: ModelFactory.invalidate())
@@ -0,0 +1,158 @@
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import asyncio
+import logging
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+class ModelHealth:
+    """Rolling counters for one physical model."""
+    def __init__(self):
+        self.latency_ms: Optional[float] = None  # EWMA of successful call durations
+        self.error_rate = 0.0                    # EWMA of failures (0 = healthy, 1 = always failing)
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0                    # circuit breaker: skipped until this time
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "circuit_open": self.open_until > now,
+        }
+
+class _RouterCallback(BaseCallbackHandler):
+    """Feeds call timings and outcomes of one model into the router."""
+    run_inline = True  # record synchronously, also for async calls
+
+    def __init__(self, router: "ModelRouter", model_name: str):
+        self.router = router
+        self.model_name = model_name
+        self._started: Dict[UUID, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._started[run_id] = time.perf_counter()
+        self.router.record_start(self.model_name)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.router.record_end(self.model_name, (time.perf_counter() - started) * 1000)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        if self._started.pop(run_id, None) is None:
+            return
+        if isinstance(error, asyncio.CancelledError):
+            # Cancelled by us (e.g. a lost speculative race), not the model's fault
+            self.router.record_cancel(self.model_name)
+        else:
+            self.router.record_error(self.model_name)
+
+class ModelRouter:
+    """
+    Latency- and load-aware choice among equivalent physical models for a logical tier.
+
+    Every model built by ModelFactory reports through a callback, which keeps an EWMA
+    of latency and error rate plus the number of in-flight calls. `rank` orders a tier's
+    candidates by expected latency: latency * (1 + in_flight) / (1 - error_rate).
+    Candidates without samples inherit the best known latency, so new models get probed,
+    and ties keep the configured order. After `failure_threshold` consecutive errors a
+    model's circuit opens and it is ranked last for `cooldown_seconds`.
+    """
+    def __init__(self, alpha: float = 0.2, failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._health: Dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, model_name: str) -> ModelHealth:
+        health = self._health.get(model_name)
+        if health is None:
+            health = self._health[model_name] = ModelHealth()
+        return health
+
+    def callback(self, model_name: str) -> BaseCallbackHandler:
+        return _RouterCallback(self, model_name)
+
+    def record_start(self, model_name: str):
+        with self._lock:
+            health = self._get(model_name)
+            health.in_flight += 1
+            health.calls += 1
+
+    def record_end(self, model_name: str, latency_ms: float):
+        with self._lock:
+            health = self._get(model_name)
+            health.in_flight = max(health.in_flight - 1, 0)
+            if health.latency_ms is None:
+                health.latency_ms = latency_ms
+            else:
+                health.latency_ms += self.alpha * (latency_ms - health.latency_ms)
+            health.error_rate *= 1 - self.alpha
+            health.consecutive_failures = 0
+            health.open_until = 0.0
+
+    def record_cancel(self, model_name: str):
+        with self._lock:
+            health = self._get(model_name)
+            health.in_flight = max(health.in_flight - 1, 0)
+
+    def record_error(self, model_name: str):
+        with self._lock:
+            health = self._get(model_name)
+            health.in_flight = max(health.in_flight - 1, 0)
+            health.errors += 1
+            health.error_rate += self.alpha * (1 - health.error_rate)
+            health.consecutive_failures += 1
+            if health.consecutive_failures >= self.failure_threshold:
+                health.open_until = time.monotonic() + self.cooldown_seconds
+                logger.warning(f"ModelRouter: circuit open for '{model_name}' after {health.consecutive_failures} failures")
+
+    def rank(self, candidates: List[str]) -> List[str]:
+        """Orders candidate model names, best first. Open circuits go last."""
+        if len(candidates) < 2:
+            return list(candidates)
+        now = time.monotonic()
+        with self._lock:
+            known = [self._health[n].latency_ms for n in candidates
+                     if n in self._health and self._health[n].latency_ms is not None]
+            prior = min(known) if known else 0.0
+
+            def expected(position_and_name):
+                position, name = position_and_name
+                health = self._health.get(name) or ModelHealth()
+                latency = health.latency_ms if health.latency_ms is not None else prior
+                cost = latency * (1 + health.in_flight) / max(1 - health.error_rate, 0.05)
+                return (health.open_until > now, cost, position)
+
+            return [name for _, name in sorted(enumerate(candidates), key=expected)]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {name: health.snapshot(now) for name, health in self._health.items()}
+
+    def reset(self):
+        with self._lock:
+            self._health.clear()
+
+model_router = ModelRouter(
+    alpha=config.MODEL_ROUTER_EWMA_ALPHA,
+    failure_threshold=config.MODEL_ROUTER_FAILURE_THRESHOLD,
+    cooldown_seconds=config.MODEL_ROUTER_COOLDOWN_SECONDS,
+)
@@ -1,13 +1,21 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
 import json
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI
-from src.agent.state import AgentState
+from src.agent.state import AgentProfile, AgentState
 from src.utils.config import config
 from src.tools.tool_router import SemanticToolRouter
 
 # Initialize LLM
 from src.agent.model_factory import ModelFactory
+from src.agent.settings_store import settings_store
+from src.agent.context_window import context_manager
+from src.agent.reflection_gate import ReflectionGate, reflection_gate, parse_reflection, REFLECTION_PROMPT
+from src.agent.speculation import SPECULATION_FAST_SMART, estimate_tokens, race_fast_smart
+from src.agent.tool_calls import extract_tool_calls, native_tool_calls, to_native_tool, tool_calling_stats
+from src.tools.result_store import READ_RESULT_TOOL, READ_RESULT_TOOL_DEF, render_result, tool_result_store
 
 # Remove global llm
 # llm = ChatOpenAI(model="gpt-4o", api_key=config.OPENAI_API_KEY)
@@ -15,45 +23,48 @@ from src.agent.model_factory import ModelFactory
 # Initialize Router
 tool_router = SemanticToolRouter(top_k=5)
 
+DEFAULT_SYSTEM_INSTRUCTIONS = "You are Forgery, an expert executive AI assistant."
+
+# Values of config.AGENT_TOOL_CALLING
+TOOL_CALLING_TEXT = "text"
+TOOL_CALLING_NATIVE = "native"
+
 class ReflectionNode:
     """
     Evaluates the agent's response against quality criteria.
     Criteria: Factual Grounding, JSON Schema compliance, Completeness.
+    Cheap tiers (see ReflectionGate) run first; the reflector model is only
+    called when their score is inside the uncertain band around the
+    `reflection_threshold` setting, below which a retry escalates to 'smart'.
     """
+    def __init__(self, gate: ReflectionGate = None):
+        self.gate = gate or reflection_gate
+
+    def score(self, query: str, answer: str):
+        """Returns (score, reason) for an answer, consulting the reflector only when needed."""
+        threshold = settings_store.current().reflection_threshold
+        verdict = self.gate.pre_score(query, answer, threshold)
+
+        if verdict is not None:
+            score, reason = verdict
+        else:
+            # Get Reflector Model (usually kept as 'reflector' -> gpt-4o or similar strong model)
+            # But user might want local strong model for pivot
+            llm = ModelFactory.get_model("reflector")
+
+            reflection_response = llm.invoke([
+                SystemMessage(content=REFLECTION_PROMPT),
+                HumanMessage(content=f"User Query: {query}\nAgent Response: {answer}")
+            ])
+
+            score, reason, parsed = parse_reflection(reflection_response.content)
+            if parsed:
+                self.gate.remember(query, answer, score, reason)
+        return score, reason
+
     def __call__(self, state: AgentState) -> Dict[str, Any]:
         messages = state['messages']
-        last_message = messages[-1]
-        
-        # Get Reflector Model (usually kept as 'reflector' -> gpt-4o or similar strong model)
-        # But user might want local strong model for pivot
-        llm = ModelFactory.get_model("reflector")
-        
-        # System prompt for the reflector
-        system_prompt = (
-            "You are a strict QA auditor for an AI agent. "
-            "Evaluate the following response based on: "
-            "1. Factual Grounding (is it hallucinatory?) "
-            "2. Completeness (did it answer the user query?) "
-            "3. Safety "
-            "Return a JSON object: {\"score\": float (0.0-1.0), \"reason\": \"string\"}"
-        )
-        
-        reflection_response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"User Query: {messages[0].content}\nAgent Response: {last_message.content}")
-        ])
-        
-        try:
-            # Clean generic markdown blocks if present
-            content = reflection_response.content.replace("```json", "").replace("```", "").strip()
-            data = json.loads(content)
-            score = float(data.get("score", 0.0))
-            reason = data.get("reason", "No reason provided")
-        except Exception as e:
-            print(f"Reflection parsing failed: {e}")
-            score = 0.5
-            reason = "Parsing Error"
-            
+        score, reason = self.score(messages[0].content, messages[-1].content)
         print(f"Reflection Score: {score} | Reason: {reason}")
         
         # Self-Improvement Logic:
@@ -64,7 +75,7 @@ class ReflectionNode:
             "retry_count": state.get("retry_count", 0) + 1
         }
         
-        if score < 0.7:
+        if score < settings_store.current().reflection_threshold:
              # Strategy: Switch to 'smart' or 'local_smart' if we were on 'fast'
              current_model = state.get("active_model_type", "fast")
              if current_model == "fast":
@@ -73,89 +84,185 @@ class ReflectionNode:
                  
         return updates
 
-def agent_node(state: AgentState):
+async def agent_node(state: AgentState, profile: Optional[AgentProfile] = None):
     """
     The core agent node that generates a response based on the current state.
     Uses RAG-on-Tools to select relevant tools first.
+    With the `fast_smart` speculation policy, the first attempt races the fast
+    and smart models instead of waiting for reflection to escalate.
+    Tool calls in the response are parsed once here and stored in `tool_calls`
+    for routing and execution. Long histories are packed into the model's context
+    window (pinned messages, rolling summary, recent turns) before the call.
+    In an agent's graph, `profile` supplies its instructions, model tier and
+    speculation policy, and limits routing to its allowed tools.
     """
     messages = state['messages']
     user_query = messages[-1].content
     
     # Resolve Model
-    model_type = state.get("active_model_type", "fast") # Default to fast (e.g. qwen)
+    model_type = state.get("active_model_type") or (profile.model_type if profile else "fast") # Default to fast (e.g. qwen)
     llm = ModelFactory.get_model(model_type)
     print(f"AGENT: Using model type '{model_type}' -> {getattr(llm, 'model', 'unknown')}")
     
     # Dynamic Tool Retrieval
-    relevant_tools = tool_router.route(user_query)
-    
-    # If we have tools, bind them. Ideally we convert schemas to a format the LLM accepts.
-    # For now, we'll just inject them into the system prompt as a lightweight approach
-    # until we have full Pydantic models for every tool.
-    # But to support function calling, we can use a generic "call_tool" binding or raw tool binding if possible.
+    relevant_tools = await tool_router.route(user_query, profile.tools if profile else None)
+    if _has_stored_results(messages):
+        # Truncated results earlier in the conversation can be paged through
+        relevant_tools = relevant_tools + [READ_RESULT_TOOL_DEF]
     
-    tools_context = ""
-    if relevant_tools:
-        tools_list = "\n".join([f"- {t['name']}: {t['description']}" for t in relevant_tools])
-        tools_context = f"\nAVAILABLE TOOLS:\n{tools_list}\n\nTo use a tool, strictly output a JSON block: {{\"tool\": \"tool_name\", \"args\": {{...}}}}"
+    # Native mode hands the shortlist (with its JSON schemas) to the provider's function
+    # calling; models without bind_tools support fall back to the JSON convention in the prompt
+    bind = None
+    if relevant_tools and config.AGENT_TOOL_CALLING == TOOL_CALLING_NATIVE:
+        bind = _native_binder(llm, relevant_tools)
+    mode = TOOL_CALLING_NATIVE if bind else TOOL_CALLING_TEXT
 
     # Use dynamic system instructions if available, otherwise fallback
-    base_instructions = state.get("system_instructions")
+    base_instructions = state.get("system_instructions") or (profile.instructions if profile else None)
     if not base_instructions:
-        base_instructions = "You are Forgery, an expert executive AI assistant."
+        base_instructions = DEFAULT_SYSTEM_INSTRUCTIONS
+
+    system_prompt = SystemMessage(content=build_system_prompt(base_instructions, [] if bind else relevant_tools))
+    policy = state.get("speculation") or (profile.speculation if profile else None) or config.AGENT_SPECULATION
+    speculate = policy == SPECULATION_FAST_SMART and model_type == "fast" and not state.get("retry_count")
+    prompt = [system_prompt] + await _fit_context(messages, model_type, system_prompt, relevant_tools if bind else [], speculate)
+
+    if speculate:
+        response = await _speculate(prompt, messages[0].content, bind)
+    else:
+        response = await (bind(llm) if bind else llm).ainvoke(prompt)
+
+    tool_calls = native_tool_calls(response) or extract_tool_calls(response.content)
+    _record_tool_calling(mode, prompt, response, tool_calls, retry=bool(state.get("retry_count")))
+    return {"messages": [response], "tool_calls": tool_calls}
+
+async def _fit_context(messages, model_type: str, system_prompt, native_tools, speculate: bool):
+    """History packed into the model's context window (see ContextWindowManager)."""
+    if not config.AGENT_CONTEXT_MANAGER:
+        return messages
+    window = ModelFactory.context_window(model_type)
+    if speculate:
+        window = min(window, ModelFactory.context_window("smart"))
+    reserved = context_manager.counter.count(system_prompt)
+    if native_tools:
+        reserved += context_manager.counter.count_text(json.dumps([to_native_tool(t) for t in native_tools]))
+    return await context_manager.pack(messages, window, reserved)
+
+def _has_stored_results(messages) -> bool:
+    return any(isinstance(m.content, str) and READ_RESULT_TOOL in m.content for m in messages)
+
+def build_system_prompt(base_instructions: str, relevant_tools) -> str:
+    """System prompt for the agent; tools are described in text only in text mode."""
+    tools_context = ""
+    if relevant_tools:
+        tools_list = "\n".join([f"- {t['name']}: {t['description']}" for t in relevant_tools])
+        tools_context = (
+            f"\nAVAILABLE TOOLS:\n{tools_list}\n\nTo use a tool, strictly output a JSON block: {{\"tool\": \"tool_name\", \"args\": {{...}}}}"
+            "\nFor several independent lookups, output one JSON block per tool call; they run in parallel."
+        )
 
-    system_prompt = (
+    return (
         f"{base_instructions}\n"
         f"{tools_context}\n"
         "If you can answer directly, do so."
     )
-    
-    response = llm.invoke([SystemMessage(content=system_prompt)] + messages)
-    return {"messages": [response]}
 
-import re
-async def tool_node(state: AgentState):
+def _native_binder(llm, relevant_tools):
+    """Returns a function binding the shortlist to a model, or None when the model cannot bind tools."""
+    definitions = [to_native_tool(t) for t in relevant_tools]
+    try:
+        llm.bind_tools(definitions)
+    except NotImplementedError:
+        tool_calling_stats.native_fallbacks += 1
+        print(f"AGENT: {type(llm).__name__} has no native tool calling; using text mode.")
+        return None
+    return lambda model: model.bind_tools(definitions)
+
+def _record_tool_calling(mode: str, prompt, response, tool_calls, retry: bool):
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens") or estimate_tokens(prompt)
+    if mode == TOOL_CALLING_NATIVE:
+        failures = len(getattr(response, "invalid_tool_calls", None) or [])
+    else:
+        # A tool key that did not parse into a call is a malformed call
+        failures = int(not tool_calls and '"tool"' in str(response.content))
+    tool_calling_stats.record(mode, prompt_tokens, len(tool_calls), failures, retry)
+
+_speculation_judge = ReflectionNode()
+
+async def _speculate(prompt, query: str, bind=None):
+    async def accept(response) -> bool:
+        # Tool calls are not judged by reflection; take the cheap one
+        if native_tool_calls(response) or extract_tool_calls(response.content, limit=1):
+            return True
+        score, _ = await asyncio.to_thread(_speculation_judge.score, query, response.content)
+        return score >= settings_store.current().pass_threshold
+
+    async def run(_):
+        fast, smart = ModelFactory.get_model("fast"), ModelFactory.get_model("smart")
+        if bind:
+            fast, smart = bind(fast), bind(smart)
+        return await race_fast_smart(prompt, fast, smart, accept)
+
+    # Everything inside the race is tagged so chat streaming does not interleave both models
+    response, winner = await RunnableLambda(run).ainvoke(None, config={"tags": ["nostream", "speculative"]})
+    print(f"AGENT: Speculative race won by '{winner}'")
+    return response
+
+async def tool_node(state: AgentState, profile: Optional[AgentProfile] = None):
     """
-    Executes a tool call if the last message contains one.
+    Executes the tool calls parsed from the last agent message (see `agent_node`).
+    Calls run concurrently, each with its own timeout (each pooled MCP session caps
+    its calls in flight, so a server takes up to pool size x MCP_SERVER_MAX_CONCURRENCY);
+    results come back in call order, one message each.
+    Native calls are answered with a ToolMessage per call ID, as providers require.
+    Results longer than TOOL_RESULT_MAX_CHARS are stored out-of-band and enter the
+    history as an excerpt the agent can page through with `read_tool_result`.
+    Calls to tools outside the `profile`'s allow-list are refused.
     """
-    messages = state["messages"]
-    last_message = messages[-1]
-    
-    # Simple parsing logic for tool calls in text
-    content = last_message.content
-    
-    # Regex to find JSON block
-    # Matches ```json { ... } ``` or just { ... }
-    # This is a basic implementation.
-    json_match = re.search(r"\{.*\}", content, re.DOTALL)
-    
+    tool_calls = state.get("tool_calls") or []
+    if not tool_calls:
+        return {"messages": [AIMessage(content="No tool executed. Proceeding.")], "tool_calls": []}
+
+    contents = await asyncio.gather(*(_execute_tool_call(tool_call, profile) for tool_call in tool_calls))
+    messages = []
+    for tool_call, content in zip(tool_calls, contents):
+        if tool_call.get("id"):
+            messages.append(ToolMessage(content=content, tool_call_id=tool_call["id"]))
+        else:
+            messages.append(AIMessage(content=content))
+    return {"messages": messages, "tool_calls": []}
+
+async def _execute_tool_call(tool_call, profile: Optional[AgentProfile] = None) -> str:
+    from src.tools.mcp_manager import mcp_manager
+    from src.tools.tool_registry import AmbiguousToolError
+
+    tool_name = tool_call["tool"]
+    args = tool_call.get("args", {})
+
+    print(f"Executing tool: {tool_name}")
+
+    if not isinstance(args, dict):
+        return f"Error: arguments of '{tool_name}' must be a JSON object, got {type(args).__name__}."
+    if tool_name == READ_RESULT_TOOL:
+        return tool_result_store.read(args.get("handle", ""), args.get("offset", 0), args.get("limit"))
+
     try:
-        if json_match:
-            tool_call = json.loads(json_match.group(0))
-            if "tool" in tool_call:
-                from src.tools.mcp_manager import mcp_manager
-                
-                tool_name = tool_call["tool"]
-                args = tool_call.get("args", {})
-                
-                print(f"Executing tool: {tool_name}")
-                
-                server_name = None
-                for s_name, conn in mcp_manager.connections.items():
-                    if tool_name in conn["tools"]:
-                        server_name = s_name
-                        break
-                
-                if server_name:
-                    # Async execution
-                    try:
-                        result = await mcp_manager.call_tool(server_name, tool_name, args)
-                        return {"messages": [AIMessage(content=f"Tool Result: {result}")]}
-                    except Exception as e:
-                         return {"messages": [AIMessage(content=f"Error executing tool: {e}")]}
-                else:
-                    return {"messages": [AIMessage(content=f"Error: Tool '{tool_name}' not found on any connected MCP server.")]}
-    except Exception as e:
-        print(f"Tool execution parsing failed: {e}")
-
-    return {"messages": [AIMessage(content="No tool executed. Proceeding.")]}
+        entry = mcp_manager.resolve_tool(tool_name)
+    except AmbiguousToolError as e:
+        return f"Error: {e}"
+
+    if entry and profile and not profile.allows(entry):
+        return f"Error: Tool '{tool_name}' is not available to this agent."
+    if entry:
+        # Async execution; wait_for cancels the call when it times out
+        timeout = config.TOOL_CALL_TIMEOUT_SECONDS
+        try:
+            result = await asyncio.wait_for(mcp_manager.call_tool(entry.server, entry.name, args), timeout)
+            prefix = "Tool Error: " if getattr(result, "isError", False) else "Tool Result: "
+            return prefix + tool_result_store.bound(render_result(result), entry.qualified_name)
+        except asyncio.TimeoutError:
+            return f"Error executing tool: '{tool_name}' timed out after {timeout:g}s"
+        except Exception as e:
+            return f"Error executing tool: {e}"
+    return f"Error: Tool '{tool_name}' not found on any connected MCP server."
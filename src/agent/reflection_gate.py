@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import threading
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+REFLECTION_PROMPT = (
+    "You are a strict QA auditor for an AI agent. "
+    "Evaluate the following response based on: "
+    "1. Factual Grounding (is it hallucinatory?) "
+    "2. Completeness (did it answer the user query?) "
+    "3. Safety "
+    "Return a JSON object: {\"score\": float (0.0-1.0), \"reason\": \"string\"}"
+)
+
+_GREETING = re.compile(r"^\s*(hi|hello|hey|thanks|thank you|thx|good (morning|afternoon|evening)|bye)\b[\s!.?]*$", re.IGNORECASE)
+_REFUSAL = re.compile(r"^\s*(i('m| am) sorry|i can(no|')t|i am unable|i'm unable|as an ai)\b", re.IGNORECASE)
+_ERROR = re.compile(r"^\s*(error\b|no tool executed)", re.IGNORECASE)
+
+def parse_reflection(content: str) -> Tuple[float, str, bool]:
+    """Parses a reflector reply into (score, reason, ok)."""
+    try:
+        # Clean generic markdown blocks if present
+        cleaned = content.replace("```json", "").replace("```", "").strip()
+        data = json.loads(cleaned)
+        return float(data.get("score", 0.0)), data.get("reason", "No reason provided"), True
+    except Exception as e:
+        print(f"Reflection parsing failed: {e}")
+        return 0.5, "Parsing Error", False
+
+class ReflectionGate:
+    """
+    Cheap tiers that run before the expensive reflector model.
+
+    1. A cached score for the same (query, answer) pair.
+    2. Heuristics for answers whose verdict is obvious (empty, errors, refusals, small talk).
+    3. Optionally a small local model (`REFLECTION_GATE_MODEL`, e.g. 'fast').
+
+    A cheap score is final unless it falls inside the uncertain band
+    [threshold - margin, threshold + margin), where threshold is the
+    `agent_config_reflection_threshold` setting. Only then is the reflector called.
+    """
+    def __init__(self, margin: float = 0.15, local_model_type: Optional[str] = None, max_cached: int = 2048):
+        self.margin = margin
+        self.local_model_type = local_model_type
+        self.max_cached = max_cached
+        self._scores: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"evaluations": 0, "reflector_calls": 0, "avoided_cached": 0, "avoided_heuristic": 0, "avoided_local_model": 0}
+
+    @staticmethod
+    def _key(query: str, answer: str) -> str:
+        return hashlib.sha256(f"{query}\x00{answer}".encode("utf-8")).hexdigest()
+
+    def band(self, threshold: float) -> Tuple[float, float]:
+        return threshold - self.margin, threshold + self.margin
+
+    def is_uncertain(self, score: float, threshold: float) -> bool:
+        low, high = self.band(threshold)
+        return low <= score < high
+
+    @staticmethod
+    def heuristic_score(query: str, answer: str) -> Optional[Tuple[float, str]]:
+        """Returns a score only when the verdict is obvious, otherwise None."""
+        text = (answer or "").strip()
+        if not text:
+            return 0.0, "Heuristic: empty response"
+        if _ERROR.match(text):
+            return 0.1, "Heuristic: error output instead of an answer"
+        if text.lower() == (query or "").strip().lower():
+            return 0.1, "Heuristic: response echoes the query"
+        if _REFUSAL.match(text) and len(text) < 200:
+            return 0.3, "Heuristic: refusal"
+        if _GREETING.match(query or "") and len(text) < 300:
+            return 0.9, "Heuristic: small talk answered"
+        return None
+
+    def _local_model_score(self, query: str, answer: str) -> Optional[Tuple[float, str]]:
+        if not self.local_model_type:
+            return None
+        from src.agent.model_factory import ModelFactory
+        try:
+            llm = ModelFactory.get_model(self.local_model_type)
+            response = llm.invoke([
+                SystemMessage(content=REFLECTION_PROMPT),
+                HumanMessage(content=f"User Query: {query}\nAgent Response: {answer}")
+            ])
+        except Exception as e:
+            logger.error(f"Local reflection model failed: {e}")
+            return None
+        score, reason, ok = parse_reflection(response.content)
+        return (score, f"Local model: {reason}") if ok else None
+
+    def pre_score(self, query: str, answer: str, threshold: float) -> Optional[Tuple[float, str]]:
+        """
+        Runs the cheap tiers. Returns (score, reason) when one of them is decisive,
+        or None when the reflector has to be consulted.
+        """
+        self._stats["evaluations"] += 1
+
+        key = self._key(query, answer)
+        with self._lock:
+            cached = self._scores.get(key)
+            if cached is not None:
+                self._scores.move_to_end(key)
+        if cached is not None:
+            self._stats["avoided_cached"] += 1
+            return cached
+
+        heuristic = self.heuristic_score(query, answer)
+        if heuristic is not None and not self.is_uncertain(heuristic[0], threshold):
+            self._stats["avoided_heuristic"] += 1
+            return heuristic
+
+        local = self._local_model_score(query, answer)
+        if local is not None and not self.is_uncertain(local[0], threshold):
+            self._stats["avoided_local_model"] += 1
+            self.remember(query, answer, *local)
+            return local
+
+        self._stats["reflector_calls"] += 1
+        return None
+
+    def remember(self, query: str, answer: str, score: float, reason: str):
+        key = self._key(query, answer)
+        with self._lock:
+            self._scores[key] = (score, reason)
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_cached:
+                self._scores.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        avoided = self._stats["avoided_cached"] + self._stats["avoided_heuristic"] + self._stats["avoided_local_model"]
+        evaluations = self._stats["evaluations"]
+        return {
+            **self._stats,
+            "reflector_calls_avoided": avoided,
+            "avoided_rate": avoided / evaluations if evaluations else 0.0,
+        }
+
+reflection_gate = ReflectionGate(
+    margin=config.REFLECTION_GATE_MARGIN,
+    local_model_type=config.REFLECTION_GATE_MODEL,
+)
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+import logging
+import time
+import uuid
+
+import numpy as np
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedResponse:
+    workspace_id: str
+    query: str
+    answer: str
+    reflection_score: float
+    vector: np.ndarray
+    created_at: float = field(default_factory=time.monotonic)
+
+@dataclass
+class CacheLookup:
+    answer: Optional[str]
+    similarity: float
+    vector: np.ndarray
+
+class SemanticResponseCache:
+    """
+    Semantic cache of accepted agent answers, consulted before the agent graph runs.
+
+    Entries are keyed by the embedding of (system instructions + query) and partitioned
+    by workspace. A lookup returns the stored answer of the most similar entry in the
+    same workspace if its cosine similarity is at or above `threshold`.
+    Entries expire after `ttl_seconds` and the least recently used entry is evicted
+    once `max_entries` is reached.
+    """
+    def __init__(
+        self,
+        embeddings=None,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 1000,
+    ):
+        self._embeddings = embeddings
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()  # LRU order, oldest first
+        self._by_workspace: Dict[str, Set[str]] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "rejected": 0, "expired": 0, "evicted": 0}
+
+    @property
+    def embeddings(self):
+        # Shares the batching embedding service unless a model was injected
+        if self._embeddings is None:
+            from src.services.embedding_service import batched_embeddings
+            self._embeddings = batched_embeddings
+        return self._embeddings
+
+    @staticmethod
+    def _key_text(query: str, system_instructions: str) -> str:
+        return f"{system_instructions}\n---\n{query}"
+
+    async def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(self, query: str, system_instructions: str, workspace_id: str) -> CacheLookup:
+        """
+        Returns the cached answer (or None) together with the query vector,
+        so a later `store` does not have to embed the same text again.
+        """
+        vector = await self._embed(self._key_text(query, system_instructions))
+        now = time.monotonic()
+
+        best_id, best_similarity = None, -1.0
+        for entry_id in list(self._by_workspace.get(workspace_id, ())):
+            entry = self._entries[entry_id]
+            if now - entry.created_at > self.ttl_seconds:
+                self._remove(entry_id)
+                self._stats["expired"] += 1
+                continue
+            similarity = float(np.dot(vector, entry.vector))
+            if similarity > best_similarity:
+                best_id, best_similarity = entry_id, similarity
+
+        if best_id is not None and best_similarity >= self.threshold:
+            self._entries.move_to_end(best_id)
+            self._stats["hits"] += 1
+            return CacheLookup(self._entries[best_id].answer, best_similarity, vector)
+
+        self._stats["misses"] += 1
+        return CacheLookup(None, best_similarity, vector)
+
+    async def store(
+        self,
+        query: str,
+        system_instructions: str,
+        workspace_id: str,
+        answer: str,
+        reflection_score: Optional[float],
+        pass_threshold: float,
+        vector: Optional[np.ndarray] = None,
+    ) -> bool:
+        """Stores an answer if reflection accepted it. Returns True if it was cached."""
+        if not answer or reflection_score is None or reflection_score < pass_threshold:
+            self._stats["rejected"] += 1
+            return False
+
+        if vector is None:
+            vector = await self._embed(self._key_text(query, system_instructions))
+
+        while len(self._entries) >= self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self._stats["evicted"] += 1
+
+        entry_id = str(uuid.uuid4())
+        self._entries[entry_id] = CachedResponse(workspace_id, query, answer, reflection_score, vector)
+        self._by_workspace.setdefault(workspace_id, set()).add(entry_id)
+        self._stats["stores"] += 1
+        return True
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id)
+        ids = self._by_workspace.get(entry.workspace_id)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_workspace[entry.workspace_id]
+
+    def invalidate_workspace(self, workspace_id: str) -> int:
+        """Drops every cached answer of a workspace, e.g. after its documents changed."""
+        entry_ids = list(self._by_workspace.get(workspace_id, ()))
+        for entry_id in entry_ids:
+            self._remove(entry_id)
+        if entry_ids:
+            logger.info(f"Semantic cache: invalidated {len(entry_ids)} entries for workspace {workspace_id}")
+        return len(entry_ids)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_workspace.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "workspaces": len(self._by_workspace),
+        }
+
+response_cache = SemanticResponseCache(
+    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=config.SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+)
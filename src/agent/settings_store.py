@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Defaults for settings that were never saved (see src/api/routers/settings.py)
+DEFAULT_REFLECTION_THRESHOLD = 0.7
+DEFAULT_PASS_THRESHOLD = 0.8
+DEFAULT_MAX_RETRIES = 3
+
+SETTINGS_QUERY = "MATCH (s:SystemSettings {id: 'global'}) RETURN s"
+VERSION_QUERY = "MATCH (s:SystemSettings {id: 'global'}) RETURN coalesce(s.version, 0) AS version"
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """
+    Immutable view of the SystemSettings node at one `version` (0 when it was never
+    saved, None when it could not be read). Typed values are parsed once here.
+    """
+    version: Optional[int]
+    values: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    reflection_threshold: float = DEFAULT_REFLECTION_THRESHOLD
+    pass_threshold: float = DEFAULT_PASS_THRESHOLD
+    max_retries: int = DEFAULT_MAX_RETRIES
+    loaded_at: float = 0.0
+
+    @classmethod
+    def from_props(cls, props: Dict[str, Any]) -> "SettingsSnapshot":
+        def number(key, cast, default):
+            try:
+                value = props.get(key)
+                return default if value is None else cast(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid setting {key}={props.get(key)!r}")
+                return default
+
+        return cls(
+            version=int(props.get("version") or 0),
+            values=MappingProxyType(dict(props)),
+            reflection_threshold=number("agent_config_reflection_threshold", float, DEFAULT_REFLECTION_THRESHOLD),
+            pass_threshold=number("agent_config_pass_threshold", float, DEFAULT_PASS_THRESHOLD),
+            max_retries=number("agent_config_max_retries", int, DEFAULT_MAX_RETRIES),
+            loaded_at=time.time(),
+        )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+def _neo4j_load() -> Dict[str, Any]:
+    from src.agent.model_factory import ModelFactory
+
+    with ModelFactory._get_driver().session() as session:
+        record = session.run(SETTINGS_QUERY).single()
+        return dict(record["s"]) if record else {}
+
+def _neo4j_version() -> int:
+    from src.agent.model_factory import ModelFactory
+
+    with ModelFactory._get_driver().session() as session:
+        record = session.run(VERSION_QUERY).single()
+        return record["version"] if record else 0
+
+class SettingsStore:
+    """
+    In-process, versioned snapshot of SystemSettings.
+
+    `current()` is an attribute read, so graph routers and ModelFactory consult settings
+    on every step without touching Neo4j. The snapshot is loaded once (at startup or on
+    first use) and replaced as a whole, never mutated:
+      - `PUT /settings` bumps the node's `version` and `publish`es the saved properties;
+      - other workers run `watch()`, which polls only the version counter and reloads
+        when it moved.
+    Subscribers (e.g. ModelFactory's model cache) are told about every new version.
+    """
+    def __init__(
+        self,
+        load: Callable[[], Dict[str, Any]] = _neo4j_load,
+        read_version: Callable[[], int] = _neo4j_version,
+    ):
+        self._load = load
+        self._read_version = read_version
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._listeners: List[Callable[[SettingsSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "load_failures": 0, "publishes": 0, "polls": 0, "changes": 0}
+
+    def current(self) -> SettingsSnapshot:
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
+
+    def refresh(self) -> SettingsSnapshot:
+        """Reloads the snapshot; on failure the previous one (or defaults) stays in place."""
+        with self._lock:
+            try:
+                props = self._load()
+            except Exception as e:
+                self._stats["load_failures"] += 1
+                logger.error(f"Failed to load settings, keeping the current snapshot: {e}")
+                if self._snapshot is None:
+                    self._snapshot = SettingsSnapshot(version=None)
+                return self._snapshot
+            self._stats["loads"] += 1
+            return self._install(SettingsSnapshot.from_props(props))
+
+    def publish(self, props: Dict[str, Any]) -> SettingsSnapshot:
+        """Installs settings this worker just saved (`props` include the bumped version)."""
+        with self._lock:
+            self._stats["publishes"] += 1
+            return self._install(SettingsSnapshot.from_props(props))
+
+    def _install(self, snapshot: SettingsSnapshot) -> SettingsSnapshot:
+        previous = self._snapshot
+        if previous is not None and previous.version is not None and snapshot.version is not None \
+                and snapshot.version < previous.version:
+            # A slower reader finished after a newer version was installed
+            return previous
+        self._snapshot = snapshot
+        if previous is not None and previous.version != snapshot.version:
+            self._stats["changes"] += 1
+            logger.info(f"Settings changed: version {previous.version} -> {snapshot.version}")
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    logger.error(f"Settings listener failed: {e}")
+        return snapshot
+
+    def subscribe(self, listener: Callable[[SettingsSnapshot], None]):
+        self._listeners.append(listener)
+
+    async def watch(self, interval: float = config.SETTINGS_POLL_SECONDS):
+        """Background task started by the API server: reloads when another worker saved settings."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self._stats["polls"] += 1
+                version = await asyncio.to_thread(self._read_version)
+                if version != self.current().version:
+                    await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Settings version check failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            **self._stats,
+            "version": snapshot.version if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+        }
+
+# Used by ModelFactory, the graph routers and the settings API
+settings_store = SettingsStore()
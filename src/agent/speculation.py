@@ -0,0 +1,132 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# Per-agent values of the `speculation` policy
+SPECULATION_OFF = "off"
+SPECULATION_FAST_SMART = "fast_smart"
+SPECULATION_POLICIES = (SPECULATION_OFF, SPECULATION_FAST_SMART)
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token count (~4 characters per token) for calls whose usage we never see."""
+    return sum(len(str(m.content)) for m in messages) // 4
+
+def _used_tokens(response: BaseMessage, prompt: List[BaseMessage]) -> int:
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    return estimate_tokens(prompt) + estimate_tokens([response])
+
+class SpeculationStats:
+    """Outcome and waste counters for speculative fast/smart races."""
+    def __init__(self):
+        self.races = 0
+        self.fast_accepted = 0
+        self.fast_rejected = 0
+        self.smart_first = 0
+        self.fast_errors = 0
+        self.smart_errors = 0
+        self.cancelled = 0
+        self.wasted_tokens = 0
+        self.latency_total_ms = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "races": self.races,
+            "fast_accepted": self.fast_accepted,
+            "fast_rejected": self.fast_rejected,
+            "smart_first": self.smart_first,
+            "fast_errors": self.fast_errors,
+            "smart_errors": self.smart_errors,
+            "cancelled": self.cancelled,
+            "wasted_tokens": self.wasted_tokens,
+            "avg_latency_ms": self.latency_total_ms / self.races if self.races else None,
+        }
+
+speculation_stats = SpeculationStats()
+
+async def _cancel(task: asyncio.Task):
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+async def race_fast_smart(
+    messages: List[BaseMessage],
+    fast_llm,
+    smart_llm,
+    accept: Callable[[BaseMessage], Awaitable[bool]],
+    stats: Optional[SpeculationStats] = None,
+) -> Tuple[BaseMessage, str]:
+    """
+    Starts the fast and smart models concurrently and returns (response, winner).
+
+    The fast answer wins if it arrives first and `accept` approves it; the smart
+    request is then cancelled. If the fast answer is rejected or fails, the smart
+    answer is awaited. If the smart answer arrives first it wins outright and the
+    fast request is cancelled. Tokens spent on the losing side are counted as waste;
+    for a cancelled request only the prompt is counted (estimated).
+    """
+    stats = stats or speculation_stats
+    stats.races += 1
+    started = time.perf_counter()
+
+    fast = asyncio.create_task(fast_llm.ainvoke(messages))
+    smart = asyncio.create_task(smart_llm.ainvoke(messages))
+
+    def finish(response: BaseMessage, winner: str) -> Tuple[BaseMessage, str]:
+        stats.latency_total_ms += (time.perf_counter() - started) * 1000
+        return response, winner
+
+    async def drop(task: asyncio.Task):
+        if task.done():
+            if not task.cancelled() and task.exception() is None:
+                stats.wasted_tokens += _used_tokens(task.result(), messages)
+            return
+        stats.cancelled += 1
+        stats.wasted_tokens += estimate_tokens(messages)
+        await _cancel(task)
+
+    rejected_tokens = 0
+    try:
+        done, _ = await asyncio.wait({fast, smart}, return_when=asyncio.FIRST_COMPLETED)
+
+        if fast in done and fast.exception() is None:
+            response = fast.result()
+            if await accept(response):
+                stats.fast_accepted += 1
+                await drop(smart)
+                return finish(response, "fast")
+            stats.fast_rejected += 1
+            rejected_tokens = _used_tokens(response, messages)
+            stats.wasted_tokens += rejected_tokens
+        elif fast in done:
+            stats.fast_errors += 1
+            logger.warning(f"Speculative fast model failed: {fast.exception()}")
+        else:
+            stats.smart_first += 1
+            if smart.exception() is None:
+                await drop(fast)
+                return finish(smart.result(), "smart")
+
+        try:
+            return finish(await smart, "smart")
+        except Exception as e:
+            stats.smart_errors += 1
+            if fast.done() and fast.exception() is not None:
+                raise
+            # The (possibly rejected) fast answer is all we have left; reflection will judge it
+            logger.warning(f"Speculative smart model failed, falling back to fast: {e}")
+            stats.wasted_tokens -= rejected_tokens
+            return finish(await fast, "fast")
+    except BaseException:
+        for task in (fast, smart):
+            if not task.done():
+                await _cancel(task)
+        raise
@@ -1,4 +1,5 @@
-from typing import TypedDict, Annotated, List, Union
+from dataclasses import dataclass
+from typing import TypedDict, Annotated, Any, Dict, FrozenSet, List, Union
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -10,3 +11,22 @@ class AgentState(TypedDict):
     agent_id: str
     system_instructions: str
     active_model_type: str # 'fast', 'smart', 'local_smart'
+    speculation: str # 'off', 'fast_smart' (per-agent policy)
+    tool_calls: List[Dict[str, Any]] # [{"tool": name, "args": {...}}] parsed from the last agent message
+
+@dataclass(frozen=True)
+class AgentProfile:
+    """
+    An Agent's run settings, baked into the graph compiled for it (see
+    src/agent/agent_graphs.py). Values in the run state take precedence.
+    """
+    agent_id: str
+    name: str
+    instructions: str
+    tools: FrozenSet[str] = frozenset()  # lowercased bare or '<server>__<tool>' names; empty allows every tool
+    model_type: str = "fast"
+    speculation: str = "off"
+
+    def allows(self, entry) -> bool:
+        """Whether the agent may call a resolved tool (a ToolEntry)."""
+        return not self.tools or entry.name.lower() in self.tools or entry.qualified_name.lower() in self.tools
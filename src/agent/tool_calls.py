@@ -0,0 +1,163 @@
+from typing import Any, Dict, List, Optional
+import json
+import re
+
+# Characters that change the scanner state inside a JSON object
+_STRUCTURAL = re.compile(r'[{}"\\]')
+# Cheap rejection: a text-mode tool call always carries this key
+_TOOL_KEY = '"tool"'
+
+def _as_tool_call(candidate: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(candidate)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and isinstance(data.get("tool"), str):
+        args = data.get("args")
+        return {"tool": data["tool"], "args": args if isinstance(args, dict) else {}}
+    return None
+
+class ToolCallParser:
+    """
+    Incremental, balanced-brace scanner for text-mode tool calls ({"tool": ..., "args": {...}}).
+
+    Text can be fed in chunks (e.g. while streaming); each top-level JSON object is
+    decoded once when its closing brace arrives, and text outside objects is dropped
+    as it is scanned. Braces inside strings are ignored, so several JSON blocks in one
+    answer are told apart instead of being swallowed by one greedy match.
+    """
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.calls: List[Dict[str, Any]] = []
+        self._buffer = ""     # unscanned text plus the object being scanned
+        self._start = 0       # index of the current object's '{' in _buffer
+        self._pos = 0         # scan position in _buffer
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self.limit is not None and len(self.calls) >= self.limit
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Scans more text; returns the tool calls completed by it."""
+        found: List[Dict[str, Any]] = []
+        if self.done or not chunk:
+            return found
+        self._buffer += chunk
+        self._scan(found)
+        # Keep only the open object, so memory stays bounded by the largest object
+        if self._depth == 0:
+            self._buffer, self._start, self._pos = "", 0, 0
+        elif self._start:
+            self._buffer = self._buffer[self._start:]
+            self._pos -= self._start
+            self._start = 0
+        return found
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Ends the input. An object still open here was an unbalanced '{' in prose;
+        the text after it is rescanned so it cannot hide the calls that follow.
+        """
+        found: List[Dict[str, Any]] = []
+        while self._depth and not self.done:
+            self._reset(self._start + 1)
+            self._scan(found)
+        return found
+
+    def _reset(self, pos: int):
+        self._pos, self._depth, self._in_string = pos, 0, False
+
+    def _scan(self, found: List[Dict[str, Any]]):
+        buffer = self._buffer
+        while not self.done:
+            if self._depth == 0:
+                start = buffer.find("{", self._pos)
+                if start < 0:
+                    self._pos = len(buffer)
+                    return
+                # Prose before the object is skipped: its quotes, braces and backslashes
+                # must not change the scanner state
+                self._start = self._pos = start
+            match = _STRUCTURAL.search(buffer, self._pos)
+            if match is None:
+                # max(): an escape at the end of a chunk already moved past the escaped character
+                self._pos = max(self._pos, len(buffer))
+                return
+            char, self._pos = match.group(), match.end()
+            if char == "\\":
+                self._pos += 1  # skip the escaped character (in strings; invalid JSON elsewhere)
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif char == "{":
+                self._depth += 1
+            elif self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = buffer[self._start:self._pos]
+                    if _TOOL_KEY not in candidate:
+                        continue
+                    call = _as_tool_call(candidate)
+                    if call is not None:
+                        found.append(call)
+                        self.calls.append(call)
+                    else:
+                        # Not a tool call as a whole (prose braces, a wrapper object):
+                        # rescan from just after its opening brace for nested calls
+                        self._reset(self._start + 1)
+
+def extract_tool_calls(text: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Tool calls in a complete message, in order; stops after `limit` calls."""
+    if not isinstance(text, str) or _TOOL_KEY not in text:
+        return []
+    parser = ToolCallParser(limit=limit)
+    parser.feed(text)
+    parser.finish()
+    return parser.calls
+
+def to_native_tool(tool_def: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI-format function definition for a SemanticToolRouter shortlist entry."""
+    schema = tool_def.get("args") or {}
+    if not (schema.get("type") == "object" or "properties" in schema):
+        # LangChain tools store only the properties mapping; MCP tools store the full input schema
+        schema = {"type": "object", "properties": schema}
+    return {
+        "type": "function",
+        "function": {
+            "name": tool_def["name"],
+            "description": tool_def.get("description") or "",
+            "parameters": schema,
+        },
+    }
+
+def native_tool_calls(message: Any) -> List[Dict[str, Any]]:
+    """Structured tool calls of a model response, in the same shape as `extract_tool_calls`."""
+    return [
+        {"tool": call["name"], "args": call.get("args") or {}, "id": call.get("id")}
+        for call in getattr(message, "tool_calls", None) or []
+    ]
+
+class ToolCallingStats:
+    """Per-mode (text / native) counters for comparing tool-calling overhead."""
+    def __init__(self):
+        self._modes: Dict[str, Dict[str, int]] = {}
+        self.native_fallbacks = 0
+
+    def record(self, mode: str, prompt_tokens: int, calls: int, parse_failures: int, retry: bool):
+        row = self._modes.setdefault(mode, {"turns": 0, "prompt_tokens": 0, "tool_calls": 0, "parse_failures": 0, "retries": 0})
+        row["turns"] += 1
+        row["prompt_tokens"] += prompt_tokens
+        row["tool_calls"] += calls
+        row["parse_failures"] += parse_failures
+        row["retries"] += int(retry)
+
+    def snapshot(self) -> Dict[str, Any]:
+        modes = {}
+        for mode, row in self._modes.items():
+            modes[mode] = {**row, "avg_prompt_tokens": row["prompt_tokens"] / row["turns"] if row["turns"] else None}
+        return {"modes": modes, "native_fallbacks": self.native_fallbacks}
+
+tool_calling_stats = ToolCallingStats()
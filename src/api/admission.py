@@ -0,0 +1,216 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import logging
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """A run was shed: the model's wait queue is full, or the wait timed out."""
+    def __init__(self, model: str, reason: str, message: str):
+        super().__init__(message)
+        self.model = model
+        self.reason = reason  # 'queue_full' or 'timeout'
+
+class _Waiter:
+    __slots__ = ("client", "position", "granted", "wake")
+
+    def __init__(self, client: str):
+        self.client = client
+        self.position = 0
+        self.granted = False
+        self.wake = asyncio.get_running_loop().create_future()
+
+    def signal(self):
+        if not self.wake.done():
+            self.wake.set_result(None)
+
+class _Lane:
+    """Slots and wait queue of one model backend."""
+    def __init__(self, model: str, limit: int, max_queue: int):
+        self.model = model
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        # client -> its waiters in arrival order; the dict order is the round-robin order
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "wait_ms": 0.0}
+
+    def has_slot(self) -> bool:
+        return self.limit <= 0 or self.active < self.limit
+
+    def queue_full(self) -> bool:
+        return 0 < self.max_queue <= self.waiting
+
+    def snapshot(self) -> Dict[str, Any]:
+        queued = self.stats["queued"]
+        return {
+            "limit": self.limit, "max_queue": self.max_queue, "active": self.active, "waiting": self.waiting,
+            **{k: v for k, v in self.stats.items() if k != "wait_ms"},
+            "avg_wait_ms": self.stats["wait_ms"] / queued if queued else 0.0,
+        }
+
+class AdmissionController:
+    """
+    Admission control for chat runs, one lane per model backend.
+
+    A lane admits up to `limit` concurrent runs (the Model node's `max_concurrency`);
+    further runs wait in a queue of at most `max_queue`. Slots are handed out round-robin
+    across clients, so one client's burst cannot starve the others, and waiters are told
+    their position whenever it changes. Runs arriving at a full queue, or waiting longer
+    than `timeout` seconds, are rejected with AdmissionRejected instead of piling onto
+    an overloaded backend. All state lives on the event loop, so no locks are needed.
+    """
+    def __init__(
+        self,
+        default_limit: int = config.ADMISSION_MAX_CONCURRENCY,
+        default_queue: int = config.ADMISSION_MAX_QUEUE,
+        timeout: float = config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.default_limit = default_limit
+        self.default_queue = default_queue
+        self.timeout = timeout
+        self._lanes: Dict[str, _Lane] = {}
+
+    def _lane(self, model: str, limit: Optional[int], max_queue: Optional[int]) -> _Lane:
+        limit = self.default_limit if limit is None else int(limit)
+        max_queue = self.default_queue if max_queue is None else int(max_queue)
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _Lane(model, limit, max_queue)
+        elif (lane.limit, lane.max_queue) != (limit, max_queue):
+            # The Model node was edited; a raised limit admits waiters right away
+            lane.limit, lane.max_queue = limit, max_queue
+            self._dispatch(lane)
+        return lane
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        model: str,
+        client: str,
+        limit: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        on_position: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
+        """
+        Holds a slot on `model`'s lane for the duration of the block. `limit` and `max_queue`
+        override the defaults (None); 0 or less means unlimited for either. While queued,
+        `on_position(position)` is awaited with the 1-based queue position as it changes.
+        """
+        lane = self._lane(model, limit, max_queue)
+        await self._acquire(lane, client, on_position)
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    async def _acquire(self, lane: _Lane, client: str, on_position):
+        if lane.has_slot() and not lane.waiting:
+            lane.active += 1
+            lane.stats["admitted"] += 1
+            return
+        if lane.queue_full():
+            lane.stats["rejected"] += 1
+            logger.warning(f"Admission: shedding a run for '{lane.model}', queue full ({lane.waiting})")
+            raise AdmissionRejected(
+                lane.model, "queue_full",
+                f"Model '{lane.model}' is at capacity ({lane.active} running, {lane.waiting} waiting). Please retry shortly.",
+            )
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(client)
+        lane.queues.setdefault(client, deque()).append(waiter)
+        lane.waiting += 1
+        lane.stats["queued"] += 1
+        self._update_positions(lane)
+        started = loop.time()
+        deadline = started + self.timeout
+        reported = None
+        try:
+            while not waiter.granted:
+                if on_position and waiter.position != reported:
+                    reported = waiter.position
+                    await on_position(reported)
+                    continue
+                if waiter.wake.done():
+                    waiter.wake = loop.create_future()
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    lane.stats["timed_out"] += 1
+                    logger.warning(f"Admission: a run for '{lane.model}' timed out in the queue")
+                    raise AdmissionRejected(
+                        lane.model, "timeout",
+                        f"Model '{lane.model}' is overloaded; gave up after waiting {self.timeout:g}s in the queue.",
+                    )
+                await asyncio.wait({waiter.wake}, timeout=remaining)
+        except BaseException:
+            # Disconnected, cancelled or timed out: give back a slot granted meanwhile, or leave the queue
+            if waiter.granted:
+                self._release(lane)
+            else:
+                self._remove(lane, waiter)
+            raise
+        lane.stats["admitted"] += 1
+        lane.stats["wait_ms"] += (loop.time() - started) * 1000
+
+    def _release(self, lane: _Lane):
+        lane.active -= 1
+        self._dispatch(lane)
+
+    def _dispatch(self, lane: _Lane):
+        granted = False
+        while lane.waiting and lane.has_slot():
+            client, queue = next(iter(lane.queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                lane.queues.move_to_end(client)  # the next client goes first
+            else:
+                del lane.queues[client]
+            lane.waiting -= 1
+            lane.active += 1
+            waiter.granted = True
+            waiter.signal()
+            granted = True
+        if granted:
+            self._update_positions(lane)
+
+    def _remove(self, lane: _Lane, waiter: _Waiter):
+        queue = lane.queues.get(waiter.client)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del lane.queues[waiter.client]
+        lane.waiting -= 1
+        self._update_positions(lane)
+
+    @staticmethod
+    def _update_positions(lane: _Lane):
+        """Positions in the order `_dispatch` will serve the waiters: one per client per round."""
+        queues = list(lane.queues.values())
+        position, depth = 0, 0
+        while True:
+            served = False
+            for queue in queues:
+                if depth < len(queue):
+                    position += 1
+                    waiter = queue[depth]
+                    if waiter.position != position:
+                        waiter.position = position
+                        waiter.signal()
+                    served = True
+            if not served:
+                break
+            depth += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {model: lane.snapshot() for model, lane in self._lanes.items()}
+
+# Used by the chat websocket
+admission = AdmissionController()
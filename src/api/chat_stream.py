@@ -0,0 +1,124 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import WebSocket
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Phase each graph node belongs to, as shown to chat clients
+NODE_PHASES = {
+    "agent": "answer",
+    "tools": "tools",
+    "reflect": "reflection",
+}
+
+class StreamingStats:
+    """Aggregate time-to-first-token over all streamed chat runs."""
+    def __init__(self):
+        self.runs = 0
+        self.ttft_samples = 0
+        self.ttft_total_ms = 0.0
+        self.last_ttft_ms: Optional[float] = None
+
+    def record_run(self, ttft_ms: Optional[float]):
+        self.runs += 1
+        if ttft_ms is not None:
+            self.ttft_samples += 1
+            self.ttft_total_ms += ttft_ms
+            self.last_ttft_ms = ttft_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "avg_ttft_ms": self.ttft_total_ms / self.ttft_samples if self.ttft_samples else None,
+            "last_ttft_ms": self.last_ttft_ms,
+        }
+
+streaming_stats = StreamingStats()
+
+async def _send(websocket: WebSocket, payload: Dict[str, Any]):
+    await websocket.send_text(json.dumps(payload))
+
+async def send_cached_answer(websocket: WebSocket, answer: str, similarity: float):
+    """Replays a semantic-cache hit using the same answer-phase events as a live run."""
+    await _send(websocket, {"type": "cache_hit", "similarity": round(similarity, 4)})
+    await _send(websocket, {"type": "node_start", "node": "cache", "phase": "answer"})
+    await _send(websocket, {"type": "token", "node": "cache", "phase": "answer", "data": answer})
+    await _send(websocket, {"type": "node_end", "node": "cache", "phase": "answer"})
+
+async def stream_graph_run(
+    websocket: WebSocket,
+    graph,
+    state: Dict[str, Any],
+    config: Dict[str, Any],
+    on_node_end: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the graph with LangGraph event streaming and forwards progress to the chat socket:
+
+    - `node_start` / `node_end` markers for every graph node, tagged with its phase
+    - `token` deltas from the agent node's LLM as they arrive; calls tagged `nostream`
+      (e.g. a speculative race) are not streamed and their chosen answer is sent
+      as a single token when the node ends
+    - one `metric` event with the run's time-to-first-token (`ttft_ms`)
+    - the legacy `update` payload when a node finishes
+
+    Reflection runs after the answer has been streamed and is reported under the
+    `reflection` phase. Returns the final answer and its reflection score.
+    """
+    started = time.perf_counter()
+    ttft_ms = None
+    answer = ""
+    reflection_score = None
+    streamed = False  # tokens sent for the current agent node run
+
+    async def send_token(node: str, text: str):
+        nonlocal ttft_ms, streamed
+        if ttft_ms is None:
+            ttft_ms = (time.perf_counter() - started) * 1000
+            await _send(websocket, {"type": "metric", "name": "ttft_ms", "value": round(ttft_ms, 1)})
+        await _send(websocket, {"type": "token", "node": node, "phase": NODE_PHASES[node], "data": text})
+        streamed = True
+
+    async for event in graph.astream_events(state, config=config, version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream" and node == "agent":
+            if "nostream" in event.get("tags", ()):
+                continue
+            delta = event["data"]["chunk"].content
+            if not delta or not isinstance(delta, str):
+                continue
+            await send_token(node, delta)
+
+        elif kind in ("on_chain_start", "on_chain_end") and node in NODE_PHASES and event["name"] == node:
+            phase = NODE_PHASES[node]
+            if kind == "on_chain_start":
+                streamed = False
+                await _send(websocket, {"type": "node_start", "node": node, "phase": phase})
+                continue
+
+            output = event["data"].get("output") or {}
+            if node == "agent" and not streamed and isinstance(output, dict) and output.get("messages"):
+                content = output["messages"][-1].content
+                if content and isinstance(content, str):
+                    await send_token(node, content)
+            await _send(websocket, {"type": "node_end", "node": node, "phase": phase})
+            await _send(websocket, {"type": "update", "node": node, "phase": phase, "data": str(output)})
+
+            if isinstance(output, dict):
+                if node == "agent" and output.get("messages"):
+                    answer = output["messages"][-1].content
+                if node == "reflect" and "reflection_score" in output:
+                    reflection_score = output["reflection_score"]
+
+            if on_node_end:
+                await on_node_end(node)
+
+    streaming_stats.record_run(ttft_ms)
+    if ttft_ms is not None:
+        logger.info(f"Chat run streamed, time to first token: {ttft_ms:.1f} ms")
+
+    return {"answer": answer, "reflection_score": reflection_score}
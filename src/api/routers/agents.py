@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 import uuid
-from neo4j import GraphDatabase
-from src.utils.config import config
+from neo4j import AsyncDriver
+from src.utils.database import get_db_driver
 from src.services.agent_seeder import seed_default_agents
+from src.agent.agent_graphs import agent_graphs
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -21,51 +22,58 @@ class AgentCreate(BaseModel):
     backstory: str
     tools: List[str] = []
     enabled: bool = True
+    # 'fast_smart' races the fast and smart models on the first attempt
+    speculation: Literal["off", "fast_smart"] = "off"
+    # Model tier the agent starts on; reflection may still escalate a retry to 'smart'
+    model_type: Literal["fast", "smart", "local_smart"] = "fast"
 
 class AgentResponse(AgentCreate):
     id: str
 
-def get_db_driver():
-    return GraphDatabase.driver(
-        config.NEO4J_URI, 
-        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
+def _to_response(node) -> AgentResponse:
+    return AgentResponse(
+        id=node.get("id"),
+        name=node.get("name"),
+        role=node.get("role"),
+        goal=node.get("goal"),
+        backstory=node.get("backstory"),
+        tools=node.get("tools", []),
+        enabled=node.get("enabled", True),
+        speculation=node.get("speculation", "off"),
+        model_type=node.get("model_type", "fast"),
     )
 
+async def load_agent(agent_id: str, driver: AsyncDriver) -> Optional[AgentResponse]:
+    """Fetches one agent, or None if it does not exist."""
+    async with driver.session() as session:
+        result = await session.run("MATCH (a:Agent {id: $id}) RETURN a", id=agent_id)
+        record = await result.single()
+    return _to_response(record["a"]) if record else None
+
 @router.post("/seed")
 async def trigger_seed():
     """Manually trigger default agent seeding."""
-    seed_default_agents()
+    await seed_default_agents()
+    agent_graphs.invalidate()
     return {"status": "seeded"}
 
 @router.get("/", response_model=List[AgentResponse])
-async def list_agents():
-    driver = get_db_driver()
+async def list_agents(driver: AsyncDriver = Depends(get_db_driver)):
     try:
         query = "MATCH (a:Agent) RETURN a"
-        with driver.session() as session:
-            result = session.run(query)
+        async with driver.session() as session:
+            result = await session.run(query)
             agents = []
-            for record in result:
+            async for record in result:
                 node = record["a"]
-                agents.append(AgentResponse(
-                    id=node.get("id"),
-                    name=node.get("name"),
-                    role=node.get("role"),
-                    goal=node.get("goal"),
-                    backstory=node.get("backstory"),
-                    tools=node.get("tools", []),
-                    enabled=node.get("enabled", True)
-                ))
+                agents.append(_to_response(node))
             return agents
     except Exception as e:
         print(f"Error listing agents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.post("/", response_model=AgentResponse)
-async def create_agent(agent: AgentCreate):
-    driver = get_db_driver()
+async def create_agent(agent: AgentCreate, driver: AsyncDriver = Depends(get_db_driver)):
     agent_id = str(uuid.uuid4())
     try:
         query = """
@@ -77,31 +85,32 @@ async def create_agent(agent: AgentCreate):
             backstory: $backstory,
             tools: $tools,
             enabled: $enabled,
+            speculation: $speculation,
+            model_type: $model_type,
             created_at: timestamp()
         })
         RETURN a
         """
-        with driver.session() as session:
-            result = session.run(query, 
+        async with driver.session() as session:
+            result = await session.run(query, 
                 id=agent_id, 
                 name=agent.name, 
                 role=agent.role, 
                 goal=agent.goal, 
                 backstory=agent.backstory, 
                 tools=agent.tools,
-                enabled=agent.enabled
+                enabled=agent.enabled,
+                speculation=agent.speculation,
+                model_type=agent.model_type
             )
             # In a real app check if created
             return AgentResponse(id=agent_id, **agent.dict())
     except Exception as e:
         print(f"Error creating agent: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.put("/{agent_id}", response_model=AgentResponse)
-async def update_agent(agent_id: str, agent: AgentCreate):
-    driver = get_db_driver()
+async def update_agent(agent_id: str, agent: AgentCreate, driver: AsyncDriver = Depends(get_db_driver)):
     try:
         query = """
         MATCH (a:Agent {id: $id})
@@ -110,41 +119,43 @@ async def update_agent(agent_id: str, agent: AgentCreate):
             a.goal = $goal,
             a.backstory = $backstory,
             a.tools = $tools,
-            a.enabled = $enabled
+            a.enabled = $enabled,
+            a.speculation = $speculation,
+            a.model_type = $model_type
         RETURN a
         """
-        with driver.session() as session:
-            result = session.run(query,
+        async with driver.session() as session:
+            result = await session.run(query,
                 id=agent_id,
                 name=agent.name,
                 role=agent.role,
                 goal=agent.goal,
                 backstory=agent.backstory,
                 tools=agent.tools,
-                enabled=agent.enabled
+                enabled=agent.enabled,
+                speculation=agent.speculation,
+                model_type=agent.model_type
             )
-            if result.peek() is None:
+            if await result.peek() is None:
                 raise HTTPException(status_code=404, detail="Agent not found")
-            
+            # The next chat with this agent recompiles its graph
+            agent_graphs.invalidate(agent_id)
+
             return AgentResponse(id=agent_id, **agent.dict())
     except HTTPException as he:
         raise he
     except Exception as e:
         print(f"Error updating agent: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.delete("/{agent_id}")
-async def delete_agent(agent_id: str):
-    driver = get_db_driver()
+async def delete_agent(agent_id: str, driver: AsyncDriver = Depends(get_db_driver)):
     try:
         query = "MATCH (a:Agent {id: $id}) DELETE a"
-        with driver.session() as session:
-            session.run(query, id=agent_id)
+        async with driver.session() as session:
+            await session.run(query, id=agent_id)
+        agent_graphs.invalidate(agent_id)
         return {"status": "success"}
     except Exception as e:
         print(f"Error deleting agent: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
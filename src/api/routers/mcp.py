@@ -0,0 +1,114 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+import json
+from neo4j import AsyncDriver
+from src.utils.database import get_db_driver
+from src.tools.mcp_manager import mcp_manager
+
+router = APIRouter(prefix="/mcp", tags=["mcp"])
+
+class MCPServerConfig(BaseModel):
+    name: str
+    command: str
+    args: List[str] = []
+    env: Dict[str, str] = {}
+    # Sessions (subprocesses) for this server; MCP_POOL_SIZE when unset
+    pool_size: Optional[int] = None
+
+class MCPServerStatus(MCPServerConfig):
+    connected: bool = False
+    pool: Optional[Dict[str, Any]] = None
+
+def _to_config(node) -> MCPServerConfig:
+    return MCPServerConfig(
+        name=node.get("name"),
+        command=node.get("command"),
+        args=node.get("args") or [],
+        # Neo4j properties cannot hold maps; env is stored as a JSON string
+        env=json.loads(node.get("env") or "{}"),
+        pool_size=node.get("pool_size"),
+    )
+
+async def load_servers(driver: AsyncDriver) -> List[MCPServerConfig]:
+    async with driver.session() as session:
+        result = await session.run("MATCH (s:MCPServer) RETURN s ORDER BY s.name")
+        return [_to_config(record["s"]) async for record in result]
+
+async def connect_saved_servers(driver: AsyncDriver) -> Dict[str, Optional[str]]:
+    """Startup: connects every persisted server concurrently. Returns name -> error (None if connected)."""
+    try:
+        servers = await load_servers(driver)
+    except Exception as e:
+        print(f"Could not load saved MCP servers: {e}")
+        return {}
+    if not servers:
+        return {}
+    print(f"Connecting {len(servers)} saved MCP servers...")
+    results = await mcp_manager.connect_all([s.model_dump() for s in servers])
+    failed = {name: error for name, error in results.items() if error}
+    if failed:
+        print(f"MCP servers that failed to connect: {failed}")
+    return results
+
+def _status(server: MCPServerConfig) -> MCPServerStatus:
+    conn = mcp_manager.connections.get(server.name)
+    return MCPServerStatus(**server.model_dump(), connected=conn is not None,
+                           pool=conn["pool"].stats() if conn else None)
+
+@router.get("/servers", response_model=List[MCPServerStatus])
+async def list_servers(driver: AsyncDriver = Depends(get_db_driver)):
+    try:
+        return [_status(server) for server in await load_servers(driver)]
+    except Exception as e:
+        print(f"Error listing MCP servers: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/servers", response_model=MCPServerStatus)
+async def add_server(server: MCPServerConfig, driver: AsyncDriver = Depends(get_db_driver)):
+    """Saves (or updates) a server configuration and connects it."""
+    query = """
+    MERGE (s:MCPServer {name: $name})
+    SET s.command = $command, s.args = $args, s.env = $env, s.pool_size = $pool_size
+    RETURN s
+    """
+    try:
+        async with driver.session() as session:
+            await session.run(query, name=server.name, command=server.command, args=server.args,
+                              env=json.dumps(server.env), pool_size=server.pool_size)
+    except Exception as e:
+        print(f"Error saving MCP server: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        await mcp_manager.connect_server(server.name, server.command, server.args, server.env, server.pool_size)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Saved, but failed to connect: {e}")
+    return _status(server)
+
+@router.post("/servers/{name}/reconnect", response_model=MCPServerStatus)
+async def reconnect_server(name: str, driver: AsyncDriver = Depends(get_db_driver)):
+    server = next((s for s in await load_servers(driver) if s.name == name), None)
+    if server is None:
+        raise HTTPException(status_code=404, detail="MCP server not found")
+    try:
+        await mcp_manager.connect_server(server.name, server.command, server.args, server.env, server.pool_size)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Failed to connect: {e}")
+    return _status(server)
+
+@router.delete("/servers/{name}")
+async def delete_server(name: str, driver: AsyncDriver = Depends(get_db_driver)):
+    await mcp_manager.disconnect_server(name)
+    try:
+        async with driver.session() as session:
+            await session.run("MATCH (s:MCPServer {name: $name}) DETACH DELETE s", name=name)
+    except Exception as e:
+        print(f"Error deleting MCP server: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "deleted"}
+
+@router.get("/stats")
+async def pool_stats():
+    """Session pool state per connected server: live sessions, in-flight calls, restarts."""
+    return mcp_manager.stats()
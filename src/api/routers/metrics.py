@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from src.agent.model_factory import ModelFactory
+from src.api.chat_stream import streaming_stats
+from src.agent.response_cache import response_cache
+from src.agent.llm_memo import llm_memo
+from src.agent.reflection_gate import reflection_gate
+from src.agent.speculation import speculation_stats
+from src.agent.tool_calls import tool_calling_stats
+from src.services.embedding_service import embedding_service
+from src.agent.nodes import tool_router
+from src.tools.tool_registry import tool_registry
+from src.tools.result_cache import tool_result_cache
+from src.tools.result_store import tool_result_store
+from src.agent.context_window import context_manager
+from src.agent.graph import checkpointer
+from src.agent.agent_graphs import agent_graphs
+from src.agent.settings_store import settings_store
+from src.api.admission import admission
+from src.utils.config import config
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+async def get_metrics():
+    """Runtime counters for in-process caches and optimizations."""
+    return {
+        "model_cache": ModelFactory.cache_stats(),
+        "chat_streaming": streaming_stats.snapshot(),
+        "semantic_cache": response_cache.stats(),
+        "reflection_gate": reflection_gate.stats(),
+        "speculation": speculation_stats.snapshot(),
+        "embeddings": embedding_service.stats(),
+        "tool_router": tool_router.cache_stats(),
+        "tool_registry": tool_registry.stats(),
+        "tool_result_cache": tool_result_cache.stats(),
+        "tool_result_store": tool_result_store.stats(),
+        "context_window": context_manager.stats(),
+        "checkpoints": checkpointer.stats() if checkpointer else {"enabled": False},
+        "agent_graphs": agent_graphs.stats(),
+        "settings": settings_store.stats(),
+        "admission": admission.stats(),
+        "tool_calling": tool_calling_stats.snapshot(),
+        "llm_memo": llm_memo.stats() if config.LLM_MEMO_ENABLED else {"enabled": False},
+    }
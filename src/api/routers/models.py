@@ -1,18 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
-from neo4j import GraphDatabase
+from neo4j import AsyncDriver
 from src.utils.config import config
+from src.utils.database import get_db_driver
+from src.agent.model_factory import ModelFactory
+from src.agent.model_router import model_router
 import uuid
 
 router = APIRouter(prefix="/models", tags=["models"])
 
-def get_db_driver():
-    return GraphDatabase.driver(
-        config.NEO4J_URI, 
-        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
-    )
-
 class Model(BaseModel):
     id: Optional[str] = None
     name: str # e.g. "gpt-4o"
@@ -20,16 +17,28 @@ class Model(BaseModel):
     base_url: Optional[str] = None
     api_key: Optional[str] = None
     context_window: int = 128000
+    # Logical types this model can serve interchangeably ('fast', 'smart', 'local_smart', ...)
+    tiers: List[str] = []
+    # Chat runs admitted at once / allowed to wait for this model (None = ADMISSION_* defaults, 0 = unlimited)
+    max_concurrency: Optional[int] = None
+    max_queue: Optional[int] = None
+
+@router.get("/stats")
+async def model_stats():
+    """Live routing counters per physical model: latency EWMA, error rate, in-flight calls."""
+    return {
+        "models": model_router.snapshot(),
+        "candidates": ModelFactory.cache_stats()["candidates"],
+    }
 
 @router.get("/", response_model=List[Model])
-async def list_models():
-    driver = get_db_driver()
+async def list_models(driver: AsyncDriver = Depends(get_db_driver)):
     query = "MATCH (m:Model) RETURN m"
     try:
-        with driver.session() as session:
-            results = session.run(query)
+        async with driver.session() as session:
+            results = await session.run(query)
             models = []
-            for record in results:
+            async for record in results:
                 node = record["m"]
                 models.append(Model(
                     id=node.get("id"),
@@ -37,24 +46,24 @@ async def list_models():
                     provider=node.get("provider"),
                     base_url=node.get("base_url"),
                     api_key=node.get("api_key"), # Be careful returning this in prod
-                    context_window=node.get("context_window", 128000)
+                    context_window=node.get("context_window", 128000),
+                    tiers=node.get("tiers") or [],
+                    max_concurrency=node.get("max_concurrency"),
+                    max_queue=node.get("max_queue")
                 ))
             
-            # If empty, seed default models
-            if not models:
-                await seed_default_models()
-                return await list_models() # Recurse once
+        # If empty, seed default models (outside the session so its connection is released first)
+        if not models:
+            await seed_default_models(driver)
+            return await list_models(driver) # Recurse once
                 
-            return models
+        return models
     except Exception as e:
         print(f"Error listing models: {e}")
         return []
-    finally:
-        driver.close()
 
 @router.post("/", response_model=Model)
-async def create_model(model: Model):
-    driver = get_db_driver()
+async def create_model(model: Model, driver: AsyncDriver = Depends(get_db_driver)):
     model_id = str(uuid.uuid4())
     model.id = model_id
     
@@ -65,79 +74,89 @@ async def create_model(model: Model):
         provider: $provider,
         base_url: $base_url,
         api_key: $api_key,
-        context_window: $context_window
+        context_window: $context_window,
+        tiers: $tiers,
+        max_concurrency: $max_concurrency,
+        max_queue: $max_queue
     })
     RETURN m
     """
     
     try:
-        with driver.session() as session:
-            session.run(query, 
+        async with driver.session() as session:
+            await session.run(query, 
                 id=model.id,
                 name=model.name,
                 provider=model.provider,
                 base_url=model.base_url,
                 api_key=model.api_key,
-                context_window=model.context_window
+                context_window=model.context_window,
+                tiers=model.tiers,
+                max_concurrency=model.max_concurrency,
+                max_queue=model.max_queue
             )
+        ModelFactory.invalidate()
         return model
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.put("/{model_id}", response_model=Model)
-async def update_model(model_id: str, model: Model):
-    driver = get_db_driver()
+async def update_model(model_id: str, model: Model, driver: AsyncDriver = Depends(get_db_driver)):
     query = """
     MATCH (m:Model {id: $id})
     SET m.name = $name,
         m.provider = $provider,
         m.base_url = $base_url,
         m.api_key = $api_key,
-        m.context_window = $context_window
+        m.context_window = $context_window,
+        m.tiers = $tiers,
+        m.max_concurrency = $max_concurrency,
+        m.max_queue = $max_queue
     RETURN m
     """
     try:
-        with driver.session() as session:
-            result = session.run(query, 
+        async with driver.session() as session:
+            result = await session.run(query, 
                 id=model_id,
                 name=model.name,
                 provider=model.provider,
                 base_url=model.base_url,
                 api_key=model.api_key,
-                context_window=model.context_window
-            ).single()
+                context_window=model.context_window,
+                tiers=model.tiers,
+                max_concurrency=model.max_concurrency,
+                max_queue=model.max_queue
+            )
+            record = await result.single()
             
-            if not result:
+            if not record:
                 raise HTTPException(status_code=404, detail="Model not found")
                 
+            ModelFactory.invalidate()
             return model
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.delete("/{model_id}")
-async def delete_model(model_id: str):
-    driver = get_db_driver()
+async def delete_model(model_id: str, driver: AsyncDriver = Depends(get_db_driver)):
     query = "MATCH (m:Model {id: $id}) DETACH DELETE m"
     try:
-        with driver.session() as session:
-            session.run(query, id=model_id)
+        async with driver.session() as session:
+            await session.run(query, id=model_id)
+        ModelFactory.invalidate()
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
-async def seed_default_models():
+async def seed_default_models(driver: AsyncDriver):
     """Seeds defaults from config.MODEL_CONFIG or standard list if DB is empty."""
     defaults = [
-        Model(name="gpt-4o", provider="openai", context_window=128000),
-        Model(name="qwen2.5:1.5b", provider="ollama", base_url=config.OLLAMA_BASE_URL, context_window=32000),
-        Model(name="llama3.2", provider="ollama", base_url=config.OLLAMA_BASE_URL, context_window=128000),
+        Model(name="gpt-4o", provider="openai", context_window=128000, tiers=["smart", "reflector"]),
+        Model(name="qwen2.5:1.5b", provider="ollama", base_url=config.OLLAMA_BASE_URL, context_window=32000, tiers=["fast"],
+              max_concurrency=4),
+        Model(name="llama3.2", provider="ollama", base_url=config.OLLAMA_BASE_URL, context_window=128000, tiers=["local_smart"],
+              max_concurrency=2),
     ]
     
     for m in defaults:
-        await create_model(m)
+        await create_model(m, driver)
@@ -1,19 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Dict, Optional, Any
-from neo4j import GraphDatabase
-from src.utils.config import config
+from neo4j import AsyncDriver
+from src.utils.database import get_db_driver
+from src.agent.settings_store import settings_store
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
-def get_db_driver():
-    return GraphDatabase.driver(
-        config.NEO4J_URI, 
-        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
-    )
-
 class AgentConfigModel(BaseModel):
+    # Below it a retry escalates to the smart model; also centres the reflection gate's uncertain band
     reflection_threshold: float = 0.7
+    # Reflection score at or above which an answer is accepted
+    pass_threshold: float = 0.8
     max_retries: int = 3
     system_prompt: str = "You are a helpful AI assistant."
 
@@ -40,13 +38,13 @@ class SystemSettings(BaseModel):
     service_endpoints: ServiceEndpointsModel = ServiceEndpointsModel()
 
 @router.get("/", response_model=SystemSettings)
-async def get_settings():
-    driver = get_db_driver()
+async def get_settings(driver: AsyncDriver = Depends(get_db_driver)):
     query = "MATCH (s:SystemSettings {id: 'global'}) RETURN s"
     
     try:
-        with driver.session() as session:
-            result = session.run(query).single()
+        async with driver.session() as session:
+            records = await session.run(query)
+            result = await records.single()
             if result:
                 node = result["s"]
                 # Neo4j stores flat properties, we need to restructure
@@ -55,6 +53,7 @@ async def get_settings():
                 return SystemSettings(
                     agent_config=AgentConfigModel(
                         reflection_threshold=props.get("agent_config_reflection_threshold", 0.7),
+                        pass_threshold=props.get("agent_config_pass_threshold", 0.8),
                         max_retries=props.get("agent_config_max_retries", 3),
                         system_prompt=props.get("agent_config_system_prompt", "You are a helpful AI assistant.")
                     ),
@@ -81,17 +80,15 @@ async def get_settings():
     except Exception as e:
         print(f"Error fetching settings: {e}")
         return SystemSettings()
-    finally:
-        driver.close()
 
 @router.put("/", response_model=SystemSettings)
-async def update_settings(settings: SystemSettings):
-    driver = get_db_driver()
+async def update_settings(settings: SystemSettings, driver: AsyncDriver = Depends(get_db_driver)):
     
     # Flatten for Neo4j
     props = {
         "id": "global",
         "agent_config_reflection_threshold": settings.agent_config.reflection_threshold,
+        "agent_config_pass_threshold": settings.agent_config.pass_threshold,
         "agent_config_max_retries": settings.agent_config.max_retries,
         "agent_config_system_prompt": settings.agent_config.system_prompt,
         
@@ -109,17 +106,19 @@ async def update_settings(settings: SystemSettings):
         "service_endpoints_langfuse_host": settings.service_endpoints.langfuse_host,
     }
     
+    # The version counter tells other workers to reload their settings snapshot
     query = """
     MERGE (s:SystemSettings {id: 'global'})
-    SET s += $props
+    SET s += $props, s.version = coalesce(s.version, 0) + 1
     RETURN s
     """
     
     try:
-        with driver.session() as session:
-            session.run(query, props=props)
+        async with driver.session() as session:
+            result = await session.run(query, props=props)
+            record = await result.single()
+        # Swaps this worker's snapshot at once (and drops cached models: the default "smart" may have changed)
+        settings_store.publish(dict(record["s"]))
         return settings
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 import uuid
-from neo4j import GraphDatabase
-from src.utils.config import config
+from neo4j import AsyncDriver
+from src.utils.database import get_db_driver
+from src.agent.response_cache import response_cache
 
 # In a real app, we'd inject these dependencies
 from src.memory.graph_ingestion import GraphIngestionPipeline
@@ -20,12 +21,6 @@ def get_ingestion_pipeline():
         _ingestion_pipeline = GraphIngestionPipeline()
     return _ingestion_pipeline
 
-def get_db_driver():
-    return GraphDatabase.driver(
-        config.NEO4J_URI, 
-        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
-    )
-
 class WorkspaceCreate(BaseModel):
     title: str
     goal: Optional[str] = None
@@ -46,7 +41,7 @@ async def create_workspace(workspace: WorkspaceCreate):
     # Create the root Workspace node in Neo4j
     try:
         pipeline = get_ingestion_pipeline()
-        pipeline.add_workspace_node(workspace_id, workspace.title, workspace.goal)
+        await pipeline.add_workspace_node(workspace_id, workspace.title, workspace.goal)
     except Exception as e:
         print(f"Error creating workspace: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -96,18 +91,20 @@ async def upload_workspace_files(workspace_id: str, files: List[UploadFile] = Fi
         await pipeline.ingest_documents(documents, workspace_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+    finally:
+        # Cached answers may no longer reflect the workspace's documents
+        response_cache.invalidate_workspace(workspace_id)
         
     return {"status": "success", "processed_files": len(files)}
 
 @router.get("/", response_model=List[WorkspaceResponse])
-async def list_workspaces():
-    driver = get_db_driver()
+async def list_workspaces(driver: AsyncDriver = Depends(get_db_driver)):
     try:
         query = "MATCH (w:Workspace) RETURN w"
-        with driver.session() as session:
-            results = session.run(query)
+        async with driver.session() as session:
+            results = await session.run(query)
             workspaces = []
-            for record in results:
+            async for record in results:
                 node = record["w"]
                 workspaces.append({
                     "id": node.get("id"),
@@ -118,20 +115,18 @@ async def list_workspaces():
     except Exception as e:
         print(f"Error listing workspaces: {e}")
         return []
-    finally:
-        driver.close()
 
 @router.delete("/{workspace_id}")
-async def delete_workspace(workspace_id: str):
-    driver = get_db_driver()
+async def delete_workspace(workspace_id: str, driver: AsyncDriver = Depends(get_db_driver)):
     try:
         # Delete workspace and all its HAS_FILE relations and BELONGS_TO relations
         query = """
         MATCH (w:Workspace {id: $workspace_id})
         DETACH DELETE w
         """
-        with driver.session() as session:
-            session.run(query, workspace_id=workspace_id)
+        async with driver.session() as session:
+            await session.run(query, workspace_id=workspace_id)
+        response_cache.invalidate_workspace(workspace_id)
         
         # Also cleanup vector store for this workspace_id if we filtered by it
         # (Not implemented in this step, but noted)
@@ -139,12 +134,9 @@ async def delete_workspace(workspace_id: str):
         return {"status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        driver.close()
 
 @router.get("/{workspace_id}/files", response_model=List[FileNodeResponse])
-async def list_workspace_files(workspace_id: str):
-    driver = get_db_driver()
+async def list_workspace_files(workspace_id: str, driver: AsyncDriver = Depends(get_db_driver)):
     try:
         # Find Document nodes connected to the workspace
         # Assuming the ingestion pipeline creates (Workspace)-[:HAS_DOCUMENT]->(Document)
@@ -163,10 +155,10 @@ async def list_workspace_files(workspace_id: str):
         # If exact relation is unknown, we might try:
         # MATCH (n:Document) WHERE n.workspace_id = $workspace_id
         
-        with driver.session() as session:
-            results = session.run(query, workspace_id=workspace_id)
+        async with driver.session() as session:
+            results = await session.run(query, workspace_id=workspace_id)
             files = []
-            for record in results:
+            async for record in results:
                 node = record["n"]
                 files.append({
                     "id": node.get("id", str(uuid.uuid4())),
@@ -177,29 +169,26 @@ async def list_workspace_files(workspace_id: str):
     except Exception as e:
         print(f"Error listing files: {e}")
         return []
-    finally:
-        driver.close()
 
 @router.get("/{workspace_id}/graph")
-async def get_workspace_graph(workspace_id: str):
+async def get_workspace_graph(workspace_id: str, driver: AsyncDriver = Depends(get_db_driver)):
     """
     Export the sub-graph for visualization.
     Returns nodes and edges in a format suitable for visualizers.
     """
-    driver = get_db_driver()
     query = """
     MATCH path = (w:Workspace {id: $workspace_id})-[*1..2]-(n)
     RETURN path LIMIT 100
     """
     try:
-        with driver.session() as session:
-            result = session.run(query, workspace_id=workspace_id)
+        async with driver.session() as session:
+            result = await session.run(query, workspace_id=workspace_id)
             
             # Use sets to avoid duplicates
             nodes_dict = {}
             links_list = []
             
-            for record in result:
+            async for record in result:
                 path = record["path"]
                 for node in path.nodes:
                     nodes_dict[node.element_id] = {
@@ -222,5 +211,3 @@ async def get_workspace_graph(workspace_id: str):
     except Exception as e:
         print(f"Graph query failed: {e}")
         return {"nodes": [], "links": []}
-    finally:
-        driver.close()
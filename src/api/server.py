@@ -4,7 +4,7 @@ from src.agent.graph import app as agent_app
 from langchain_core.messages import HumanMessage
 import json
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import os
 log_level_str = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -19,20 +19,52 @@ logging.getLogger("neo4j").setLevel(log_level)
 
 logger = logging.getLogger(__name__)
 
+import asyncio
 from contextlib import asynccontextmanager
 from src.services.health_monitor import health_monitor
+from src.agent.model_factory import ModelFactory
+from src.utils.database import get_driver, close_driver
+from src.tools.mcp_manager import mcp_manager
+from src.agent.graph import checkpointer
+from src.agent.agent_graphs import agent_graphs
+from src.agent.settings_store import settings_store
+from src.api.admission import AdmissionRejected, admission
+from src.agent.checkpoint import compact_periodically
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Start Health Monitor
+    # Startup: Open the shared Neo4j driver, start Health Monitor,
+    # connect saved MCP servers concurrently in the background
+    driver = get_driver()
+    # Settings snapshot read by the graph and ModelFactory; refreshed when another worker saves
+    await asyncio.to_thread(settings_store.refresh)
+    settings_watch = asyncio.create_task(settings_store.watch())
     await health_monitor.start(manager)
+    mcp_startup = asyncio.create_task(mcp.connect_saved_servers(driver))
+    # Checkpoint retention: prune old checkpoints and idle threads periodically
+    compaction = asyncio.create_task(compact_periodically(checkpointer)) if checkpointer else None
     yield
-    # Shutdown: Stop Health Monitor
+    # Shutdown: Stop Health Monitor, MCP session pools, release connection pools
+    mcp_startup.cancel()
+    settings_watch.cancel()
+    if compaction:
+        compaction.cancel()
     await health_monitor.stop()
+    await mcp_manager.disconnect_all()
+    ModelFactory.close()
+    if checkpointer:
+        checkpointer.close()
+    await close_driver()
 
-app = FastAPI(title="Forgery AI Agent API", version="1.0.0")
+app = FastAPI(title="Forgery AI Agent API", version="1.0.0", lifespan=lifespan)
 
-from src.api.routers import agents, workspaces, crews, mcp, settings, models
+from src.api.routers import agents, workspaces, crews, mcp, settings, models, metrics, conversations
+from src.api.routers.conversations import conversations_db, messages_db
+from src.api.chat_stream import stream_graph_run, send_cached_answer
+from src.agent.nodes import DEFAULT_SYSTEM_INSTRUCTIONS
+from src.agent.response_cache import response_cache
+from src.agent.llm_memo import bypass_memo
+from src.utils.config import config
 import uuid
 from datetime import datetime
 
@@ -51,6 +83,8 @@ app.include_router(crews.router)
 app.include_router(mcp.router)
 app.include_router(settings.router)
 app.include_router(models.router)
+app.include_router(metrics.router)
+app.include_router(conversations.router)
 app.include_router(crews.router)
 
 app.add_middleware(
@@ -118,6 +152,11 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             data = await websocket.receive_text()
             message_data = json.loads(data)
+
+            if message_data.get("action") == "resume":
+                await resume_run(websocket, message_data)
+                continue
+
             user_input = message_data.get("message")
             
             if not user_input:
@@ -128,59 +167,74 @@ async def websocket_endpoint(websocket: WebSocket):
             # Broadcast log event
             await manager.broadcast_event("log", {"level": "INFO", "message": f"User Input: {user_input}"})
             
-            # Save User Message
+            # The user message is saved once the query is answered from cache or admitted,
+            # so a shed run does not leave an unanswered question in the conversation
             conversation_id = message_data.get("conversation_id")
-            if conversation_id and conversation_id in conversations_db:
-                # Save to DB
-                messages_db[conversation_id].append({
-                    "id": str(uuid.uuid4()),
-                    "role": "user",
-                    "content": user_input,
-                    "timestamp": datetime.now().isoformat()
-                })
             
             initial_state = {
                 "messages": [HumanMessage(content=user_input)],
                 "reflection_score": 0.0,
                 "retry_count": 0
             }
+
+            # Per-agent graph with the agent's instructions, tools and model tier baked in
+            agent_id = message_data.get("agent_id")
+            agent_graph = await _agent_graph(agent_id)
+            if agent_graph:
+                initial_state["agent_id"] = agent_id
             
-            # Initialize Langfuse Handler
-            from langfuse.langchain import CallbackHandler
-            langfuse_handler = CallbackHandler()
-
-            full_response_content = ""
-
-            # Stream events from the graph
-            async for output in agent_app.astream(initial_state, config={"callbacks": [langfuse_handler]}):
-                for node_name, node_state in output.items():
-                    # Send update to chat client
-                    response = {
-                        "type": "update",
-                        "node": node_name,
-                        "data": str(node_state)
-                    }
-                    await websocket.send_text(json.dumps(response))
-                    
-                    # Also broadcast graph_update to event stream for visualization
-                    await manager.broadcast_event("graph_update", {
-                        "node": node_name,
-                        "status": "completed"
-                    })
-                    
-                    # Capture Agent response from agent_node (simplified)
-                    if node_name == "agent" and "messages" in node_state:
-                         last_msg = node_state["messages"][-1]
-                         full_response_content = last_msg.content
+            # Semantic cache: reuse a previously accepted answer for a near-identical query
+            workspace_id = message_data.get("workspace_id")
+            if not workspace_id and conversation_id in conversations_db:
+                workspace_id = conversations_db[conversation_id]["workspace_id"]
+            workspace_id = workspace_id or "default"
+            system_instructions = agent_graph.profile.instructions if agent_graph else DEFAULT_SYSTEM_INSTRUCTIONS
+
+            # Per-request opt-out of both the semantic cache and LLM call memoization
+            bypass_cache = bool(message_data.get("bypass_cache", False))
+
+            cache_lookup = None
+            if config.SEMANTIC_CACHE_ENABLED and not bypass_cache:
+                try:
+                    cache_lookup = await response_cache.lookup(user_input, system_instructions, workspace_id)
+                except Exception as e:
+                    logger.error(f"Semantic cache lookup failed: {e}")
+
+            if cache_lookup and cache_lookup.answer is not None:
+                _save_message(conversation_id, "user", user_input)
+                await send_cached_answer(websocket, cache_lookup.answer, cache_lookup.similarity)
+                full_response_content = cache_lookup.answer
+            else:
+                # Checkpointed under this thread id; a client that loses the socket resumes with it
+                thread_id = message_data.get("thread_id") or str(uuid.uuid4())
+                model_type = agent_graph.profile.model_type if agent_graph else "fast"
+                try:
+                    # Waits (with queue-position events) for a slot on the model's backend
+                    async with _admission(websocket, model_type):
+                        _save_message(conversation_id, "user", user_input)
+                        await websocket.send_text(json.dumps({"type": "run", "thread_id": thread_id}))
+
+                        # Stream node markers and agent tokens from the graph
+                        with bypass_memo(bypass_cache):
+                            run = await _stream_run(websocket, initial_state, thread_id, agent_graph)
+                except AdmissionRejected as e:
+                    await _send_overloaded(websocket, e)
+                    continue
+                full_response_content = run["answer"]
+
+                if cache_lookup is not None:
+                    await response_cache.store(
+                        user_input,
+                        system_instructions,
+                        workspace_id,
+                        full_response_content,
+                        run["reflection_score"],
+                        settings_store.current().pass_threshold,
+                        vector=cache_lookup.vector,
+                    )
             
             # Save Agent Message
-            if conversation_id and full_response_content and conversation_id in conversations_db:
-                 messages_db[conversation_id].append({
-                    "id": str(uuid.uuid4()),
-                    "role": "assistant",
-                    "content": full_response_content,
-                    "timestamp": datetime.now().isoformat()
-                })
+            _save_message(conversation_id, "assistant", full_response_content)
             
             # Send completion message
             await websocket.send_text(json.dumps({"type": "complete"}))
@@ -190,3 +244,97 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"Error: {e}")
         await websocket.close()
+
+def _admission(websocket: WebSocket, model_type: str):
+    """Admission slot for a run on the model serving `model_type` (see AdmissionController)."""
+    model, limit, max_queue = ModelFactory.backend(model_type)
+    # Fair share per client host, however many sockets it opens
+    client = websocket.client.host if websocket.client else str(id(websocket))
+
+    async def on_position(position: int):
+        await websocket.send_text(json.dumps({"type": "queue", "position": position, "model": model}))
+
+    return admission.admit(model, client, limit, max_queue, on_position)
+
+async def _send_overloaded(websocket: WebSocket, error: AdmissionRejected):
+    await websocket.send_text(json.dumps({"type": "error", "code": "overloaded", "reason": error.reason,
+                                          "model": error.model, "message": str(error)}))
+    await websocket.send_text(json.dumps({"type": "complete"}))
+
+async def _agent_graph(agent_id: Optional[str]):
+    """The agent's cached graph (see AgentGraphRegistry), or None to run the default graph."""
+    if not agent_id:
+        return None
+    try:
+        return await agent_graphs.get(agent_id, lambda: agents.load_agent(agent_id, get_driver()))
+    except Exception as e:
+        logger.error(f"Failed to load agent {agent_id}: {e}")
+        return None
+
+async def _stream_run(websocket: WebSocket, state, thread_id: str, agent_graph=None):
+    """Streams a graph run (state None resumes the thread from its last checkpoint)."""
+    # Initialize Langfuse Handler
+    from langfuse.langchain import CallbackHandler
+    langfuse_handler = CallbackHandler()
+
+    async def on_node_end(node_name: str):
+        # Also broadcast graph_update to event stream for visualization
+        await manager.broadcast_event("graph_update", {
+            "node": node_name,
+            "status": "completed"
+        })
+
+    return await stream_graph_run(
+        websocket,
+        agent_graph.graph if agent_graph else agent_app,
+        state,
+        config={"callbacks": [langfuse_handler], "configurable": {"thread_id": thread_id}},
+        on_node_end=on_node_end,
+    )
+
+def _save_message(conversation_id, role: str, content):
+    if conversation_id and content and conversation_id in conversations_db:
+        messages_db[conversation_id].append({
+            "id": str(uuid.uuid4()),
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat()
+        })
+
+async def resume_run(websocket: WebSocket, message_data: Dict):
+    """
+    `{"action": "resume", "thread_id": ...}`: continues an interrupted run from its last
+    checkpoint, re-running only the node that did not finish. A finished run replays
+    its final answer instead.
+    """
+    thread_id = message_data.get("thread_id")
+    snapshot = None
+    if checkpointer and thread_id:
+        snapshot = await agent_app.aget_state({"configurable": {"thread_id": thread_id}})
+    if not snapshot or not snapshot.values:
+        await websocket.send_text(json.dumps({"type": "resume", "thread_id": thread_id, "status": "not_found"}))
+        await websocket.send_text(json.dumps({"type": "complete"}))
+        return
+
+    if not snapshot.next:
+        answer = next((m.content for m in reversed(snapshot.values.get("messages", [])) if m.type == "ai"), "")
+        await websocket.send_text(json.dumps({"type": "resume", "thread_id": thread_id, "status": "finished"}))
+        for event in ({"type": "node_start"}, {"type": "token", "data": answer}, {"type": "node_end"}):
+            await websocket.send_text(json.dumps({**event, "node": "agent", "phase": "answer"}))
+        await websocket.send_text(json.dumps({"type": "complete"}))
+        return
+
+    logger.info(f"Resuming thread {thread_id} at {list(snapshot.next)}")
+    await websocket.send_text(json.dumps({"type": "resume", "thread_id": thread_id, "status": "resuming",
+                                          "next": list(snapshot.next)}))
+    # Any graph reads the shared checkpoints; the agent's own one continues the run
+    agent_graph = await _agent_graph(snapshot.values.get("agent_id"))
+    model_type = snapshot.values.get("active_model_type") or (agent_graph.profile.model_type if agent_graph else "fast")
+    try:
+        async with _admission(websocket, model_type):
+            run = await _stream_run(websocket, None, thread_id, agent_graph)
+    except AdmissionRejected as e:
+        await _send_overloaded(websocket, e)
+        return
+    _save_message(message_data.get("conversation_id"), "assistant", run["answer"])
+    await websocket.send_text(json.dumps({"type": "complete"}))
@@ -1,4 +1,5 @@
 import asyncio
+import uuid
 from src.agent.graph import app
 from langchain_core.messages import HumanMessage
 
@@ -17,7 +18,8 @@ async def main():
     langfuse_handler = CallbackHandler()
 
     # Run the graph
-    async for output in app.astream(initial_state, config={"callbacks": [langfuse_handler]}):
+    run_config = {"callbacks": [langfuse_handler], "configurable": {"thread_id": str(uuid.uuid4())}}
+    async for output in app.astream(initial_state, config=run_config):
         for key, value in output.items():
             print(f"Node '{key}':")
             print(value)
@@ -2,11 +2,11 @@ import os
 from typing import List, Optional
 from llama_index.core import Document, PropertyGraphIndex
 from llama_index.graph_stores.neo4j import Neo4jPropertyGraphStore
-from neo4j import GraphDatabase
 from llama_index.llms.openai import OpenAI
 from llama_index.core.indices.property_graph import SchemaLLMPathExtractor
 
 from src.memory.graph_schema import NodeLabel, RelationshipType
+from src.utils.database import get_driver
 
 class GraphIngestionPipeline:
     def __init__(self):
@@ -17,11 +17,8 @@ class GraphIngestionPipeline:
             url=os.getenv("NEO4J_URL", "bolt://localhost:7687"),
         )
         
-        # Direct driver for custom queries
-        self.driver = GraphDatabase.driver(
-            os.getenv("NEO4J_URL", "bolt://localhost:7687"),
-            auth=(os.getenv("NEO4J_USERNAME", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
-        )
+        # Shared async driver for custom queries
+        self.driver = get_driver()
         
         # Initialize Property Graph Index
         # We use SchemaLLMPathExtractor to extract entities aligned with our schema
@@ -37,9 +34,9 @@ class GraphIngestionPipeline:
             ]
         )
 
-    def query(self, query_str: str, params: dict = None):
+    async def query(self, query_str: str, params: dict = None):
         """Execute a raw Cypher query using the driver"""
-        records, summary, keys = self.driver.execute_query(query_str, params)
+        records, summary, keys = await self.driver.execute_query(query_str, params)
         return records
 
     async def ingest_documents(self, documents: List[Document], workspace_id: str):
@@ -68,11 +65,11 @@ class GraphIngestionPipeline:
         MERGE (n)-[:{RelationshipType.BELONGS_TO.value}]->(w)
         """
         
-        self.query(link_query, params={"workspace_id": workspace_id})
+        await self.query(link_query, params={"workspace_id": workspace_id})
         
         print(f"Ingestion and linking complete for workspace {workspace_id}.")
 
-    def add_workspace_node(self, workspace_id: str, title: str, goal: Optional[str] = None):
+    async def add_workspace_node(self, workspace_id: str, title: str, goal: Optional[str] = None):
         """Creates the root Workspace node manually"""
         query = f"""
         MERGE (w:{NodeLabel.WORKSPACE.value} {{id: $id}})
@@ -84,4 +81,4 @@ class GraphIngestionPipeline:
             query += "\n        SET w.goal = $goal"
             params["goal"] = goal
             
-        self.query(query, params=params)
+        await self.query(query, params=params)
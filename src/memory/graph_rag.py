@@ -1,8 +1,9 @@
+import asyncio
 import os
 from typing import List, Dict, Any
 from langchain_community.vectorstores import Qdrant
-from langchain_openai import OpenAIEmbeddings
-from neo4j import GraphDatabase
+from src.services.embedding_service import embedding_service, batched_embeddings
+from src.utils.database import get_driver
 
 class HybridGraphRAG:
     """
@@ -11,13 +12,10 @@ class HybridGraphRAG:
     2. Vector Search (Semantic Augmentation)
     """
     def __init__(self):
-        # Neo4j Connection
-        self.neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        self.neo4j_auth = (os.getenv("NEO4J_USERNAME", "neo4j"), os.getenv("NEO4J_PASSWORD", "password"))
-        self.driver = GraphDatabase.driver(self.neo4j_uri, auth=self.neo4j_auth)
+        # Neo4j: the shared async driver (src/utils/database.py)
         
         # Qdrant / Vector Store
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.embeddings = batched_embeddings
         try:
             self.vector_store = Qdrant.from_existing_collection(
                 embedding=self.embeddings,
@@ -29,7 +27,7 @@ class HybridGraphRAG:
              # Fallback or init later
              self.vector_store = None
 
-    def query(self, user_query: str, workspace_id: str, depth: int = 2) -> str:
+    async def query(self, user_query: str, workspace_id: str, depth: int = 2) -> str:
         """
         Executes the Hybrid RAG pipeline.
         Returns a rich context string for the LLM.
@@ -51,7 +49,7 @@ class HybridGraphRAG:
         
         graph_context = []
         try:
-            records, _, _ = self.driver.execute_query(cypher_query, workspace_id=workspace_id)
+            records, _, _ = await get_driver().execute_query(cypher_query, workspace_id=workspace_id)
             for record in records:
                 graph_context.append(record["content"])
         except Exception as e:
@@ -67,7 +65,8 @@ class HybridGraphRAG:
             try:
                 # Filter by workspace_id metadata if possible (Qdrant supports filtering)
                 # For now using pure semantic search
-                results = self.vector_store.similarity_search(user_query, k=5)
+                vector = await embedding_service.embed_query(user_query)
+                results = await asyncio.to_thread(self.vector_store.similarity_search_by_vector, vector, k=5)
                 for doc in results:
                     # Check metadata if we implemented filtering
                     if doc.metadata.get("workspace_id") == workspace_id:
@@ -83,6 +82,7 @@ class HybridGraphRAG:
         return context_str
 
     def close(self):
-        self.driver.close()
+        # The shared driver is closed by the API lifespan
+        pass
 
 graph_rag = HybridGraphRAG()
@@ -1,6 +1,7 @@
-from neo4j import GraphDatabase
+from typing import Optional
+from neo4j import AsyncDriver
 import logging
-from src.utils.config import config
+from src.utils.database import get_driver
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -30,21 +31,19 @@ DEFAULT_AGENTS = [
 ]
 
 class AgentSeeder:
-    def __init__(self):
-        self.driver = GraphDatabase.driver(
-            config.NEO4J_URI,
-            auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
-        )
+    def __init__(self, driver: Optional[AsyncDriver] = None):
+        # Uses the shared process-wide driver unless one is injected
+        self.driver = driver or get_driver()
 
-    def seed(self):
+    async def seed(self):
         """
         Ensures default agents exist in the database.
         """
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
             for agent in DEFAULT_AGENTS:
-                session.execute_write(self._create_agent_if_not_exists, agent)
+                await session.execute_write(self._create_agent_if_not_exists, agent)
                 
-    def _create_agent_if_not_exists(self, tx, agent_data):
+    async def _create_agent_if_not_exists(self, tx, agent_data):
         query = """
         MERGE (a:Agent {name: $name})
         ON CREATE SET 
@@ -57,7 +56,7 @@ class AgentSeeder:
             a.created_at = timestamp()
         RETURN a
         """
-        tx.run(query, 
+        await tx.run(query, 
                name=agent_data["name"],
                id=str(uuid.uuid4()),
                role=agent_data["role"],
@@ -67,15 +66,10 @@ class AgentSeeder:
         )
         logger.info(f"Seeding check for agent: {agent_data['name']}")
 
-    def close(self):
-        self.driver.close()
-
-def seed_default_agents():
+async def seed_default_agents():
     seeder = AgentSeeder()
     try:
-        seeder.seed()
+        await seeder.seed()
         logger.info("Default agents seeded successfully.")
     except Exception as e:
         logger.error(f"Failed to seed agents: {e}")
-    finally:
-        seeder.close()
@@ -0,0 +1,142 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the batch size histogram buckets
+_BUCKETS = (1, 4, 8, 16, 32, 64, 128, 256)
+
+class EmbeddingBatcher:
+    """
+    Shared async embedding service that coalesces concurrent requests.
+
+    Texts submitted within `window_ms` of the first queued text are sent as one
+    `aembed_documents` call, up to `max_batch_size` texts per call (a full batch is
+    dispatched immediately). Identical texts in a batch are embedded once.
+    Exposes the batch size distribution and how long texts waited in the queue.
+    """
+    def __init__(self, embeddings=None, window_ms: float = 5.0, max_batch_size: int = 64):
+        self._embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._histogram = {bucket: 0 for bucket in _BUCKETS}
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "deduplicated": 0, "errors": 0}
+        self._wait_total_ms = 0.0
+        self._wait_max_ms = 0.0
+        self._call_total_ms = 0.0
+
+    @property
+    def embeddings(self):
+        # Created lazily so importing this module does not require an API key
+        if self._embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+            self._embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        return self._embeddings
+
+    async def embed_query(self, text: str) -> List[float]:
+        return (await self.embed_documents([text]))[0]
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        self._stats["requests"] += 1
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future, time.perf_counter()))
+            futures.append(future)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        dispatched = time.perf_counter()
+        unique = list(dict.fromkeys(text for text, _, _ in batch))
+        self._record_batch(batch, unique, dispatched)
+        try:
+            vectors = await self.embeddings.aembed_documents(unique)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Embedding batch of {len(unique)} texts failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._call_total_ms += (time.perf_counter() - dispatched) * 1000
+
+        by_text = dict(zip(unique, vectors))
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def _record_batch(self, batch, unique, dispatched: float):
+        self._stats["batches"] += 1
+        self._stats["texts"] += len(batch)
+        self._stats["deduplicated"] += len(batch) - len(unique)
+        bucket = next((b for b in _BUCKETS if len(unique) <= b), _BUCKETS[-1])
+        self._histogram[bucket] += 1
+        for _, _, enqueued in batch:
+            waited_ms = (dispatched - enqueued) * 1000
+            self._wait_total_ms += waited_ms
+            self._wait_max_ms = max(self._wait_max_ms, waited_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._stats["batches"]
+        texts = self._stats["texts"]
+        return {
+            **self._stats,
+            "avg_batch_size": (texts - self._stats["deduplicated"]) / batches if batches else 0.0,
+            "batch_size_histogram": {f"<={b}": n for b, n in self._histogram.items()},
+            "avg_queue_wait_ms": self._wait_total_ms / texts if texts else 0.0,
+            "max_queue_wait_ms": self._wait_max_ms,
+            "avg_call_ms": self._call_total_ms / batches if batches else 0.0,
+        }
+
+class BatchedEmbeddings(Embeddings):
+    """
+    LangChain `Embeddings` facade over the batcher, for vector stores.
+    Async calls are coalesced; sync calls go straight to the underlying model.
+    """
+    def __init__(self, batcher: EmbeddingBatcher):
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.batcher.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.batcher.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.batcher.embed_query(text)
+
+embedding_service = EmbeddingBatcher(
+    window_ms=config.EMBEDDING_BATCH_WINDOW_MS,
+    max_batch_size=config.EMBEDDING_MAX_BATCH_SIZE,
+)
+batched_embeddings = BatchedEmbeddings(embedding_service)
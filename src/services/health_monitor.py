@@ -2,9 +2,9 @@ import asyncio
 import logging
 import psutil
 from typing import Dict, Any
-from neo4j import GraphDatabase
 from qdrant_client import QdrantClient
 from src.utils.config import config
+from src.utils.database import get_driver
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +29,8 @@ class HealthMonitor:
                 # 1. Check Neo4j
                 neo4j_status = "error"
                 try:
-                    driver = GraphDatabase.driver(
-                        config.NEO4J_URI, 
-                        auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD)
-                    )
-                    driver.verify_connectivity()
+                    await get_driver().verify_connectivity()
                     neo4j_status = "ok"
-                    driver.close()
                 except Exception as e:
                     logger.error(f"Neo4j health check failed: {e}")
                     neo4j_status = "error"
@@ -0,0 +1,148 @@
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set, Tuple
+import json
+import math
+import re
+
+from src.tools.tool_registry import qualified_name
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_IDENTIFIER = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.\-]*")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "please", "run", "the", "this", "to", "use", "what", "with",
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; identifiers are split on '_', '-', '.' and camelCase."""
+    return [w.lower() for w in _WORD.findall(_CAMEL.sub(" ", text or "")) if w.lower() not in _STOPWORDS]
+
+def _arg_names(json_schema: Any) -> List[str]:
+    try:
+        schema = json.loads(json_schema) if isinstance(json_schema, str) else (json_schema or {})
+        return list((schema.get("properties") or {}).keys())
+    except (ValueError, AttributeError):
+        return []
+
+class LexicalToolIndex:
+    """
+    BM25 inverted index over tool names, descriptions and argument names, plus a
+    name table (bare and '<server>__<tool>' names) for exact and prefix hits. Kept next to the vector index and updated
+    incrementally with it.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}  # term -> {tool id: term frequency}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._names: Dict[str, Set[str]] = {}            # lowercased tool name -> tool ids
+        self._sorted_names: List[str] = []               # keys of _names, sorted for prefix lookups
+        self._docs: Dict[str, Tuple[List[str], List[str]]] = {}  # tool id -> (name keys, distinct terms)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def upsert(self, tool_id: str, payload: Dict[str, Any]):
+        self.remove(tool_id)
+        name = payload.get("tool_name") or ""
+        # The name counts twice: it is the most specific text a tool has
+        terms = tokenize(name) * 2 + tokenize(payload.get("description") or "")
+        for arg in _arg_names(payload.get("json_schema")):
+            terms += tokenize(arg)
+        counts = Counter(terms)
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[tool_id] = tf
+        self._lengths[tool_id] = len(terms)
+        self._total_length += len(terms)
+        names = [name.lower()] if name else []
+        if name and payload.get("server_name"):
+            names.append(qualified_name(payload["server_name"], name).lower())
+        self._docs[tool_id] = (names, list(counts))
+        for key in names:
+            if key not in self._names:
+                self._names[key] = set()
+                insort(self._sorted_names, key)
+            self._names[key].add(tool_id)
+
+    def remove(self, tool_id: str):
+        doc = self._docs.pop(tool_id, None)
+        if doc is None:
+            return
+        names, terms = doc
+        for term in terms:
+            postings = self._postings[term]
+            del postings[tool_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(tool_id)
+        for name in names:
+            ids = self._names.get(name)
+            if ids is not None:
+                ids.discard(tool_id)
+                if not ids:
+                    del self._names[name]
+                    del self._sorted_names[bisect_left(self._sorted_names, name)]
+
+    def clear(self):
+        self._postings.clear()
+        self._lengths.clear()
+        self._names.clear()
+        self._sorted_names.clear()
+        self._docs.clear()
+        self._total_length = 0
+
+    def name_hits(self, query: str, min_prefix: int = 4, ids: Optional[Collection[str]] = None,
+                  words: bool = True) -> List[str]:
+        """
+        Tool IDs named in the query: an identifier equal to a tool name, or an identifier
+        containing a separator ('search_w') that is a prefix of tool names.
+        Plain words only count as exact matches, so 'search' does not select every search_* tool;
+        with `words=False` they do not count at all ('fetch' in "fetch me the sales numbers").
+        With `ids`, only those tools are considered.
+        """
+        hits: List[str] = []
+        for token in _IDENTIFIER.findall(query or ""):
+            token = token.lower().rstrip(".-")
+            identifier = any(sep in token for sep in "_-.")
+            if not (words or identifier):
+                continue
+            if token in self._names:
+                hits.extend(sorted(self._names[token]))
+            elif len(token) >= min_prefix and identifier:
+                start = bisect_left(self._sorted_names, token)
+                for name in self._sorted_names[start:]:
+                    if not name.startswith(token):
+                        break
+                    hits.extend(sorted(self._names[name]))
+        if ids is not None:
+            hits = [tool_id for tool_id in hits if tool_id in ids]
+        return list(dict.fromkeys(hits))
+
+    def ids_named(self, names: Iterable[str]) -> Set[str]:
+        """Tool IDs whose bare or '<server>__<tool>' name is one of `names`."""
+        return {tool_id for name in names for tool_id in self._names.get(name.lower(), ())}
+
+    def search(self, query: str, k: int, ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """BM25 top-k as (tool id, score), best first; with `ids`, among those tools only."""
+        count = len(self._lengths)
+        if not count or k <= 0:
+            return []
+        avg_length = self._total_length / count
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for tool_id, tf in postings.items():
+                if ids is not None and tool_id not in ids:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[tool_id] / avg_length)
+                scores[tool_id] = scores.get(tool_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tools": len(self._lengths), "terms": len(self._postings), "names": len(self._names)}
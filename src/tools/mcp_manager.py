@@ -1,14 +1,12 @@
 import asyncio
-import os
-import shutil
-from typing import List, Dict, Optional
-from mcp.client.stdio import stdio_client, StdioServerParameters
-from mcp.client.session import ClientSession
-from contextlib import AsyncExitStack
+from typing import Any, Callable, List, Dict, Optional
 
+from src.tools.mcp_pool import MCPSessionPool, stdio_params
 from src.tools.tool_indexer import ToolIndexer
-# We will use this to persist config
-# from src.memory.graph_store import ... (Using Neo4j directly via driver if needed or via a ConfigService)
+from src.tools.result_cache import tool_cache_ttl, tool_result_cache
+from src.tools.tool_registry import ToolEntry, qualified_name, tool_registry
+from src.utils.config import config
+# Server configurations are persisted as (:MCPServer) nodes by src/api/routers/mcp.py
 
 class MCPServerManager:
     _instance = None
@@ -16,32 +14,40 @@ class MCPServerManager:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MCPServerManager, cls).__new__(cls)
-            cls._instance.connections = {} # key: server_name, value: stacks/sessions
+            cls._instance.connections = {} # key: server_name, value: {"pool", "tools"}
             cls._instance.indexer = ToolIndexer()
+            cls._instance.registry = tool_registry
+            cls._instance.result_cache = tool_result_cache
         return cls._instance
 
-    async def connect_server(self, name: str, command: str, args: List[str], env: Optional[Dict] = None):
+    async def connect_server(
+        self,
+        name: str,
+        command: str,
+        args: List[str],
+        env: Optional[Dict] = None,
+        pool_size: Optional[int] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+    ):
         """
-        Connects to an MCP server via Stdio.
+        Connects to an MCP server via Stdio with a pool of `pool_size` sessions
+        (subprocesses, MCP_POOL_SIZE by default). Reconnecting replaces the old pool.
         """
         print(f"Connecting to MCP server '{name}'...")
-        
-        server_params = StdioServerParameters(
-            command=command,
-            args=args,
-            env={**os.environ, **(env or {})}
+        if name in self.connections:
+            await self.disconnect_server(name)
+
+        pool = MCPSessionPool(
+            name,
+            params=stdio_params(command, args, env),
+            size=pool_size or config.MCP_POOL_SIZE,
+            session_factory=session_factory,
         )
-        
-        # managing the context stack manually to keep connection alive
-        stack = AsyncExitStack()
         try:
-            read, write = await stack.enter_async_context(stdio_client(server_params))
-            session = await stack.enter_async_context(ClientSession(read, write))
-            
-            await session.initialize()
+            await pool.start()
             
             # List tools
-            result = await session.list_tools()
+            result = await pool.any_session().list_tools()
             tools = result.tools
             
             # Index tools
@@ -55,33 +61,75 @@ class MCPServerManager:
                     self.args = t.inputSchema
             
             wrapped_tools = [MCPToolWrapper(t) for t in tools]
-            self.indexer.index_tools(wrapped_tools)
+            # The tool router drops its cached shortlists itself when the index changes
+            diff = await self.indexer.index_tools(wrapped_tools, server_name=name)
             
             self.connections[name] = {
-                "stack": stack,
-                "session": session,
-                "tools": {t.name: t for t in tools}
+                "pool": pool,
+                "tools": {t.name: t for t in tools},
             }
-            print(f"Connected to '{name}' and indexed {len(tools)} tools.")
+            self.registry.register_server(name, [
+                ToolEntry(server=name, name=t.name, schema=t.inputSchema, description=t.description or "",
+                          cache_ttl=tool_cache_ttl(t, config.TOOL_RESULT_CACHE_TTL_SECONDS, config.TOOL_RESULT_CACHE_READ_ONLY))
+                for t in tools
+            ])
+            print(f"Connected to '{name}' ({len(pool.sessions)} sessions): {len(diff['added'])} tools added, "
+                  f"{len(diff['updated'])} updated, {diff['removed']} removed, {diff['unchanged']} unchanged.")
             
         except Exception as e:
             print(f"Failed to connect to '{name}': {e}")
-            await stack.aclose()
+            await pool.close()
             raise e
 
+    async def connect_all(self, servers: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+        """
+        Connects saved servers concurrently (each one's sessions start concurrently too).
+        Returns server name -> error message, None for servers that connected.
+        """
+        results = await asyncio.gather(*(
+            self.connect_server(s["name"], s["command"], s.get("args") or [], s.get("env"), s.get("pool_size"))
+            for s in servers
+        ), return_exceptions=True)
+        return {s["name"]: (repr(r) if isinstance(r, BaseException) else None) for s, r in zip(servers, results)}
+
     async def call_tool(self, server_name: str, tool_name: str, arguments: dict):
         if server_name not in self.connections:
             raise ValueError(f"Server '{server_name}' not connected.")
             
-        session: ClientSession = self.connections[server_name]["session"]
-        result = await session.call_tool(tool_name, arguments)
-        return result
+        pool: MCPSessionPool = self.connections[server_name]["pool"]
+
+        async def call():
+            # Least busy live session; each session caps its own in-flight calls
+            return await pool.call_tool(tool_name, arguments)
+
+        # Idempotent tools with a cache TTL are served from (and single-flighted through) the result cache
+        name = qualified_name(server_name, tool_name)
+        entry = self.registry.resolve(name)
+        ttl = self.result_cache.ttl_for(tool_name, name, entry.cache_ttl if entry else None)
+        if ttl:
+            return await self.result_cache.get_or_call(server_name, tool_name, arguments, ttl, call, qualified_name=name)
+        return await call()
+
+    def resolve_tool(self, tool_name: str) -> Optional[ToolEntry]:
+        """Owning server and schema of a bare or '<server>__<tool>' name (see ToolRegistry.resolve)."""
+        return self.registry.resolve(tool_name)
+
+    async def disconnect_server(self, name: str):
+        conn = self.connections.pop(name, None)
+        self.registry.unregister_server(name)
+        if conn:
+            print(f"Disconnecting '{name}'...")
+            await conn["pool"].close()
 
     async def disconnect_all(self):
+        self.registry.clear()
         for name, conn in self.connections.items():
             print(f"Disconnecting '{name}'...")
-            await conn["stack"].aclose()
+        await asyncio.gather(*(conn["pool"].close() for conn in self.connections.values()), return_exceptions=True)
         self.connections.clear()
 
+    def stats(self) -> Dict[str, Any]:
+        return {name: {"tools": len(conn["tools"]), **conn["pool"].stats()} for name, conn in self.connections.items()}
+
 # Global instance
 mcp_manager = MCPServerManager()
@@ -0,0 +1,245 @@
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+def is_disconnect(error: BaseException) -> bool:
+    """True for errors meaning the session (subprocess / pipe) is gone, as opposed to a failed tool."""
+    if isinstance(error, (ConnectionError, EOFError, anyio.ClosedResourceError, anyio.BrokenResourceError)):
+        return True
+    return isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED
+
+@asynccontextmanager
+async def stdio_session(params: StdioServerParameters):
+    """Spawns the server subprocess and yields an initialized ClientSession."""
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+class PooledSession:
+    """
+    One MCP session (one server subprocess for stdio).
+
+    The session's context managers are entered and exited inside a dedicated task,
+    as anyio requires, so the session outlives the request that started it and can be
+    closed from any task.
+    """
+    def __init__(self, index: int, session_factory: Callable[[], Any], max_concurrency: int):
+        self.index = index
+        self.session_factory = session_factory
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.broken = False
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self.broken and self._task is not None and not self._task.done()
+
+    async def start(self, timeout: float):
+        ready = asyncio.get_running_loop().create_future()
+        self.broken = False
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run(ready, self._stop))
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except BaseException:
+            await self.stop()
+            raise
+
+    async def _run(self, ready: asyncio.Future, stop: asyncio.Event):
+        try:
+            async with self.session_factory() as session:
+                self.session = session
+                ready.set_result(None)
+                await stop.wait()
+        except Exception as e:
+            self.last_error = repr(e)
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session {self.index} ended: {e!r}")
+        finally:
+            self.session = None
+
+    async def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except BaseException:
+                self._task.cancel()
+        self.session = None
+
+    async def call_tool(self, tool_name: str, arguments: dict):
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                session = self.session
+                if session is None:
+                    raise ConnectionError(f"MCP session {self.index} is not connected")
+                self.calls += 1
+                return await session.call_tool(tool_name, arguments)
+        except Exception as e:
+            if is_disconnect(e):
+                self.failures += 1
+                self.broken = True
+                self.last_error = repr(e)
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def ping(self, timeout: float) -> bool:
+        session = self.session
+        if session is None:
+            return False
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            self.broken = True
+            self.last_error = f"ping failed: {e!r}"
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "index": self.index, "alive": self.alive, "in_flight": self.in_flight, "calls": self.calls,
+            "failures": self.failures, "restarts": self.restarts, "last_error": self.last_error,
+        }
+
+class MCPSessionPool:
+    """
+    N sessions (subprocesses) of one MCP server with least-busy dispatch.
+    Each session admits `max_concurrency` calls at once, so the server as a whole
+    takes up to N x `max_concurrency`.
+
+    A supervisor task pings every session each `ping_interval` seconds; a session that
+    fails its probe (or whose subprocess exited) is stopped and respawned with
+    exponential backoff, while calls go to the remaining live sessions.
+    """
+    def __init__(
+        self,
+        name: str,
+        params: Optional[StdioServerParameters] = None,
+        size: int = config.MCP_POOL_SIZE,
+        session_factory: Optional[Callable[[], Any]] = None,
+        max_concurrency: int = config.MCP_SERVER_MAX_CONCURRENCY,
+        ping_interval: float = config.MCP_PING_INTERVAL_SECONDS,
+        ping_timeout: float = config.MCP_PING_TIMEOUT_SECONDS,
+        backoff_max: float = config.MCP_RESPAWN_BACKOFF_MAX_SECONDS,
+        start_timeout: float = 30.0,
+    ):
+        self.name = name
+        factory = session_factory or (lambda: stdio_session(params))
+        self.sessions: List[PooledSession] = [PooledSession(i, factory, max_concurrency) for i in range(max(1, size))]
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.backoff_max = backoff_max
+        self.start_timeout = start_timeout
+        self._supervisor: Optional[asyncio.Task] = None
+        self._respawning: Dict[int, asyncio.Task] = {}
+        self._closed = False
+
+    async def start(self):
+        """Starts every session concurrently; succeeds if at least one comes up."""
+        results = await asyncio.gather(*(s.start(self.start_timeout) for s in self.sessions), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(self.sessions):
+            raise errors[0]
+        for session, result in zip(self.sessions, results):
+            if isinstance(result, BaseException):
+                self._schedule_respawn(session)
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def any_session(self) -> ClientSession:
+        for pooled in self.sessions:
+            if pooled.alive:
+                return pooled.session
+        raise ConnectionError(f"No live sessions for MCP server '{self.name}'")
+
+    def _pick(self) -> PooledSession:
+        live = [s for s in self.sessions if s.alive]
+        if not live:
+            raise ConnectionError(f"No live sessions for MCP server '{self.name}'")
+        return min(live, key=lambda s: s.in_flight)
+
+    async def call_tool(self, tool_name: str, arguments: dict):
+        pooled = self._pick()
+        try:
+            return await pooled.call_tool(tool_name, arguments)
+        except Exception as e:
+            # Tool calls may have side effects, so they are not retried; the session is replaced
+            if pooled.broken or is_disconnect(e):
+                self._schedule_respawn(pooled)
+            raise
+
+    async def _supervise(self):
+        while not self._closed:
+            await asyncio.sleep(self.ping_interval)
+            probes = await asyncio.gather(*(s.ping(self.ping_timeout) for s in self.sessions if s.index not in self._respawning))
+            checked = [s for s in self.sessions if s.index not in self._respawning]
+            for pooled, ok in zip(checked, probes):
+                if not ok:
+                    logger.warning(f"MCP server '{self.name}' session {pooled.index} failed its liveness probe")
+                    self._schedule_respawn(pooled)
+
+    def _schedule_respawn(self, pooled: PooledSession):
+        if self._closed or pooled.index in self._respawning:
+            return
+        self._respawning[pooled.index] = asyncio.create_task(self._respawn(pooled))
+
+    async def _respawn(self, pooled: PooledSession):
+        delay = 0.5
+        try:
+            await pooled.stop()
+            while not self._closed:
+                try:
+                    await pooled.start(self.start_timeout)
+                    pooled.restarts += 1
+                    logger.info(f"MCP server '{self.name}' session {pooled.index} respawned")
+                    return
+                except Exception as e:
+                    pooled.last_error = repr(e)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.backoff_max)
+        finally:
+            self._respawning.pop(pooled.index, None)
+
+    async def close(self):
+        self._closed = True
+        tasks = list(self._respawning.values()) + ([self._supervisor] if self._supervisor else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*(s.stop() for s in self.sessions), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.sessions),
+            "alive": sum(1 for s in self.sessions if s.alive),
+            "respawning": len(self._respawning),
+            "in_flight": sum(s.in_flight for s in self.sessions),
+            "sessions": [s.stats() for s in self.sessions],
+        }
+
+def stdio_params(command: str, args: List[str], env: Optional[Dict[str, str]] = None) -> StdioServerParameters:
+    return StdioServerParameters(command=command, args=args, env={**os.environ, **(env or {})})
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import json
+import threading
+import time
+
+from src.tools.tool_registry import qualified_name as qualify
+from src.utils.config import config
+
+def parse_cache_rules(spec: str, default_ttl: float) -> List[Tuple[str, float]]:
+    """'search_web=300,github__get_*' -> [('search_web', 300.0), ('github__get_*', default_ttl)]."""
+    rules = []
+    for item in (spec or "").split(","):
+        pattern, _, ttl = item.strip().partition("=")
+        if pattern:
+            rules.append((pattern, float(ttl) if ttl else default_ttl))
+    return rules
+
+def tool_cache_ttl(tool: Any, default_ttl: float, cache_read_only: bool) -> Optional[float]:
+    """
+    TTL an MCP tool declares for its results: `_meta.cache_ttl` (seconds), or the default
+    TTL for tools annotated read-only and idempotent when `cache_read_only` is set.
+    """
+    meta = getattr(tool, "meta", None) or {}
+    if meta.get("cache_ttl") is not None:
+        return float(meta["cache_ttl"]) or None
+    annotations = getattr(tool, "annotations", None)
+    if cache_read_only and annotations and annotations.readOnlyHint and annotations.idempotentHint:
+        return default_ttl
+    return None
+
+def canonical_args(arguments: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+class ToolResultCache:
+    """
+    TTL + LRU cache of MCP tool results keyed by (server, tool, canonicalized args).
+
+    Only tools with a TTL are cached: configured by name pattern (TOOL_RESULT_CACHE,
+    matched against bare and '<server>__<tool>' names) or declared by the server in
+    the tool's metadata. Concurrent identical calls are single-flighted: one reaches
+    the server, the others await its result. Error results are never cached.
+    """
+    def __init__(self, max_size: int = config.TOOL_RESULT_CACHE_SIZE, rules: Optional[List[Tuple[str, float]]] = None):
+        self.max_size = max_size
+        self.rules = rules if rules is not None else parse_cache_rules(
+            config.TOOL_RESULT_CACHE, config.TOOL_RESULT_CACHE_TTL_SECONDS)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, result)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def ttl_for(self, tool_name: str, qualified_name: str, declared_ttl: Optional[float] = None) -> Optional[float]:
+        for pattern, ttl in self.rules:
+            if fnmatchcase(qualified_name, pattern) or fnmatchcase(tool_name, pattern):
+                return ttl or None
+        return declared_ttl
+
+    def _count(self, qualified_name: str, outcome: str):
+        row = self._tools.setdefault(qualified_name, {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0})
+        row[outcome] += 1
+
+    def _lookup(self, key: Hashable, qualified_name: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                self._count(qualified_name, "expired")
+                return False, None
+            self._data.move_to_end(key)
+            return True, entry[1]
+
+    def _store(self, key: Hashable, result: Any, ttl: float):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    async def get_or_call(
+        self,
+        server_name: str,
+        tool_name: str,
+        arguments: Optional[Dict[str, Any]],
+        ttl: float,
+        call: Callable[[], Awaitable[Any]],
+        qualified_name: Optional[str] = None,
+    ) -> Any:
+        qualified_name = qualified_name or qualify(server_name, tool_name)
+        key = (server_name, tool_name, canonical_args(arguments))
+        while True:
+            found, result = self._lookup(key, qualified_name)
+            if found:
+                self._count(qualified_name, "hits")
+                return result
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    continue  # the leading call was cancelled (e.g. timed out); try again ourselves
+                raise
+            self._count(qualified_name, "coalesced")
+            return result
+
+        self._count(qualified_name, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # followers re-raise it; do not warn when there are none
+            raise
+        else:
+            if not getattr(result, "isError", False):
+                self._store(key, result, ttl)
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        tools = {}
+        for name, row in self._tools.items():
+            lookups = row["hits"] + row["misses"] + row["coalesced"]
+            tools[name] = {**row, "hit_rate": (row["hits"] + row["coalesced"]) / lookups if lookups else 0.0}
+        return {"size": len(self._data), "max_size": self.max_size, "evictions": self.evictions,
+                "in_flight": len(self._inflight), "tools": tools}
+
+# Used by MCPServerManager.call_tool
+tool_result_cache = ToolResultCache()
@@ -0,0 +1,172 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+import json
+import secrets
+import threading
+import time
+
+from src.utils.config import config
+
+# Built-in tool the agent pages through stored results with (see `READ_RESULT_TOOL_DEF`)
+READ_RESULT_TOOL = "read_tool_result"
+HANDLE_PREFIX = "result:"
+
+READ_RESULT_TOOL_DEF = {
+    "name": READ_RESULT_TOOL,
+    "description": "Reads more of a truncated tool result by its handle, starting at a character offset.",
+    "args": {
+        "type": "object",
+        "properties": {
+            "handle": {"type": "string", "description": "Handle from the truncation note, e.g. 'result:3f9c0a1b2d4e'"},
+            "offset": {"type": "integer", "description": "Character offset to start reading at", "default": 0},
+            "limit": {"type": "integer", "description": "Maximum characters to return"},
+        },
+        "required": ["handle"],
+    },
+}
+
+def render_result(result: Any) -> Iterator[str]:
+    """
+    Text chunks of an MCP CallToolResult, one per content block. Binary blocks
+    (images, audio, blobs) are described rather than inlined as base64.
+    """
+    content = getattr(result, "content", None)
+    if content is None:
+        yield str(result)
+        return
+    if not content and getattr(result, "structuredContent", None) is not None:
+        yield json.dumps(result.structuredContent, default=str)
+        return
+    for i, block in enumerate(content):
+        if i:
+            yield "\n"
+        kind = getattr(block, "type", None)
+        if kind == "text":
+            yield block.text
+        elif kind in ("image", "audio"):
+            yield f"[{kind}: {block.mimeType}, {len(block.data)} base64 chars]"
+        elif kind == "resource":
+            resource = block.resource
+            text = getattr(resource, "text", None)
+            yield text if text is not None else f"[resource {resource.uri}: {resource.mimeType or 'binary'}, {len(resource.blob)} base64 chars]"
+        elif kind == "resource_link":
+            yield f"[resource link: {block.uri}]"
+        else:
+            yield str(block)
+
+class ToolResultStore:
+    """
+    Out-of-band store for tool results too large for the message history.
+
+    `bound` consumes a result's chunks, keeps a head excerpt of at most `max_chars`
+    for the message, and stores the full text under a handle the agent can page
+    through with the `read_tool_result` built-in tool. Entries expire after `ttl`
+    seconds; the oldest are evicted once the store holds more than `max_total_chars`.
+    """
+    def __init__(
+        self,
+        max_chars: int = config.TOOL_RESULT_MAX_CHARS,
+        page_chars: int = config.TOOL_RESULT_PAGE_CHARS,
+        max_total_chars: int = config.TOOL_RESULT_STORE_MAX_CHARS,
+        ttl: float = config.TOOL_RESULT_STORE_TTL_SECONDS,
+    ):
+        self.max_chars = max_chars
+        self.page_chars = page_chars
+        self.max_total_chars = max_total_chars
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()  # handle -> (expires_at, tool, text)
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.evictions = 0
+        self.pages_read = 0
+        self.chars_withheld = 0
+
+    def bound(self, chunks: Iterable[str], tool_name: str, max_chars: Optional[int] = None) -> str:
+        """Excerpt of the result for the message history; the full text is stored when it is longer."""
+        limit = self.max_chars if max_chars is None else max_chars
+        parts, size = [], 0
+        for chunk in chunks:
+            parts.append(chunk)
+            size += len(chunk)
+        text = "".join(parts)
+        if limit <= 0 or size <= limit:
+            return text
+
+        excerpt = _cut(text, limit)
+        handle = self.put(text, tool_name)
+        self.chars_withheld += size - len(excerpt)
+        return (
+            f"{excerpt}\n[Truncated: showing characters 0-{len(excerpt)} of {size}. The full result is stored as "
+            f"'{handle}'; call {READ_RESULT_TOOL} with {{\"handle\": \"{handle}\", \"offset\": {len(excerpt)}}} to read on.]"
+        )
+
+    def put(self, text: str, tool_name: str) -> str:
+        handle = HANDLE_PREFIX + secrets.token_hex(6)
+        with self._lock:
+            self._expire()
+            self._data[handle] = (time.monotonic() + self.ttl, tool_name, text)
+            self._total_chars += len(text)
+            self.stored += 1
+            # The newest entry is kept even when it alone exceeds the budget
+            while self._total_chars > self.max_total_chars and len(self._data) > 1:
+                _, (_, _, old) = self._data.popitem(last=False)
+                self._total_chars -= len(old)
+                self.evictions += 1
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        with self._lock:
+            self._expire()
+            entry = self._data.get(handle)
+            return entry[2] if entry else None
+
+    def read(self, handle: str, offset: int = 0, limit: Optional[int] = None) -> str:
+        """One page of a stored result, with a note saying where the next page starts."""
+        try:
+            limit = max(1, min(int(limit or self.page_chars), self.page_chars))
+            offset = max(0, int(offset or 0))
+        except (TypeError, ValueError):
+            return f"Error: 'offset' and 'limit' must be integers, got offset={offset!r}, limit={limit!r}."
+        text = self.get(handle) if isinstance(handle, str) else None
+        if text is None:
+            return f"Error: no stored tool result '{handle}' (unknown or expired). Call the original tool again."
+        if offset >= len(text):
+            return f"[End of '{handle}': it has {len(text)} characters.]"
+        end = offset + limit
+        page = text[offset:end] if end >= len(text) else _cut(text[offset:], limit)
+        end = offset + len(page)
+        self.pages_read += 1
+        if end >= len(text):
+            return f"{page}\n[End of '{handle}' (characters {offset}-{end} of {len(text)}).]"
+        return f"{page}\n[Characters {offset}-{end} of {len(text)}; next offset {end}.]"
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._data:
+            handle, (expires_at, _, text) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            del self._data[handle]
+            self._total_chars -= len(text)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._total_chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data), "chars": self._total_chars, "max_chars": self.max_total_chars,
+            "stored": self.stored, "evictions": self.evictions, "pages_read": self.pages_read,
+            "chars_withheld": self.chars_withheld,
+        }
+
+def _cut(text: str, limit: int) -> str:
+    """First `limit` characters of `text`, ending at a line break when one is close to the limit."""
+    head = text[:limit]
+    newline = head.rfind("\n")
+    return head[:newline] if newline >= limit * 0.8 else head
+
+# Used by tool_node
+tool_result_store = ToolResultStore()
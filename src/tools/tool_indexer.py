@@ -1,62 +1,181 @@
-from typing import List, Dict
-import os
-from langchain_community.vectorstores import Qdrant
-from langchain_openai import OpenAIEmbeddings
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import uuid
 from langchain_core.tools import BaseTool
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models as rest
+from src.services.embedding_service import embedding_service
+from src.tools.tool_matrix import ToolMatrix, tool_matrix
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "mcp_tools"
+UPSERT_BATCH_SIZE = 256
+
+def tool_point_id(server_name: str, tool_name: str) -> str:
+    """Stable Qdrant point ID for a tool of a server."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"mcp-tool://{server_name}/{tool_name}"))
+
+def tool_content_hash(tool) -> str:
+    """Hash of everything that goes into the embedding and the routed definition."""
+    schema = json.dumps(tool.args, sort_keys=True, default=str)
+    return hashlib.sha256(f"{tool.name}\x00{tool.description}\x00{schema}".encode("utf-8")).hexdigest()
+
+def tool_payload(tool, server_name: str = "") -> Dict[str, Any]:
+    """Qdrant payload for a tool, in the page_content/metadata layout LangChain readers expect."""
+    # Create a rich semantic description
+    text = f"Tool Name: {tool.name}\nDescription: {tool.description}\nArgs: {tool.args}"
+    # Store the full tool definition in metadata so we can reconstruct/route to it
+    return {
+        "page_content": text,
+        "metadata": {
+            "tool_name": tool.name,
+            "description": tool.description,
+            "json_schema": json.dumps(tool.args, default=str),
+            "server_name": server_name,
+            "content_hash": tool_content_hash(tool),
+        },
+    }
 
 class ToolIndexer:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-        self.qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
-        self.collection_name = "mcp_tools"
-        
-        # Initialize Vector Store (allow creation)
-        try:
-            self.vector_store = Qdrant.from_existing_collection(
-                embedding=self.embeddings,
-                collection_name=self.collection_name,
-                url=self.qdrant_url
+    """
+    Writes tool embeddings to Qdrant (durable storage) and to the in-process
+    ToolMatrix that SemanticToolRouter searches. Qdrant is only read on cold start
+    (see `load_tool_matrix`).
+    """
+    def __init__(self, matrix: Optional[ToolMatrix] = None, client: Optional[AsyncQdrantClient] = None):
+        self.matrix = matrix if matrix is not None else tool_matrix
+        self.qdrant_url = config.QDRANT_URL
+        self.collection_name = COLLECTION_NAME
+        self._client = client
+
+    @property
+    def client(self) -> AsyncQdrantClient:
+        if self._client is None:
+            self._client = AsyncQdrantClient(url=self.qdrant_url, api_key=config.QDRANT_API_KEY)
+        return self._client
+
+    async def _ensure_collection(self, dim: int):
+        if not await self.client.collection_exists(self.collection_name):
+            await self.client.create_collection(
+                self.collection_name,
+                vectors_config=rest.VectorParams(size=dim, distance=rest.Distance.COSINE),
+            )
+
+    async def _scroll(self, flt: rest.Filter, with_vectors: bool = False) -> List[rest.Record]:
+        records, offset = [], None
+        while True:
+            points, offset = await self.client.scroll(
+                self.collection_name, scroll_filter=flt, limit=1024, offset=offset,
+                with_payload=True, with_vectors=with_vectors,
             )
-        except Exception:
-             # Collection likely doesn't exist, we will create it when adding texts
-             # But we need a wrapper. We'll init with from_texts later or just pass for now
-             # Since we can't easily init an empty Qdrant store in LangChain without documents,
-             # We will handle this in index_tools
-             self.vector_store = None
-
-    def index_tools(self, tools: List[BaseTool]):
+            records.extend(points)
+            if offset is None:
+                return records
+
+    async def _stored_hashes(self, server_name: str, tool_names: List[str]) -> Dict[str, Optional[str]]:
+        """Point ID -> content hash of what is stored for this server, including legacy points without one."""
+        if not await self.client.collection_exists(self.collection_name):
+            return {}
+        stored = await self._scroll(rest.Filter(must=[
+            rest.FieldCondition(key="metadata.server_name", match=rest.MatchValue(value=server_name)),
+        ]))
+        hashes = {str(p.id): (p.payload or {}).get("metadata", {}).get("content_hash") for p in stored}
+        if tool_names:
+            # Points written before IDs were derived from (server, tool) carry no server name
+            legacy = await self._scroll(rest.Filter(
+                must=[rest.FieldCondition(key="metadata.tool_name", match=rest.MatchAny(any=tool_names))],
+                should=[
+                    rest.IsEmptyCondition(is_empty=rest.PayloadField(key="metadata.server_name")),
+                    rest.IsNullCondition(is_null=rest.PayloadField(key="metadata.server_name")),
+                ],
+            ))
+            hashes.update({str(p.id): None for p in legacy})
+        return hashes
+
+    async def index_tools(self, tools: List[BaseTool], server_name: str = "") -> Dict[str, Any]:
         """
-        Indexes a list of LangChain/MCP tools into Qdrant.
+        Synchronizes the indexed tools of one server with `tools`.
+
+        Point IDs are derived from (server name, tool name), and each point stores a hash
+        of the tool's name, description and schema. Only new or changed tools are embedded
+        (through the shared batching embedding service) and upserted in batches; tools the
+        server no longer lists are deleted. Qdrant and the in-memory matrix are updated alike.
+        Returns a diff summary: added / updated / removed tool names and the unchanged count.
         """
-        texts = []
-        metadatas = []
-        
-        for tool in tools:
-            # Create a rich semantic description
-            text = f"Tool Name: {tool.name}\nDescription: {tool.description}\nArgs: {tool.args}"
-            texts.append(text)
-            
-            # Store the full tool definition in metadata so we can reconstruct/route to it
-            metadatas.append({
-                "tool_name": tool.name,
-                "description": tool.description,
-                "json_schema": str(tool.args) # simplified storage
-            })
-            
-        print(f"Indexing {len(tools)} tools into Qdrant...")
-        if self.vector_store is None:
-             self.vector_store = Qdrant.from_texts(
-                texts=texts,
-                metadatas=metadatas,
-                embedding=self.embeddings,
-                collection_name=self.collection_name,
-                url=self.qdrant_url
-            )
-        else:
-            self.vector_store.add_texts(texts=texts, metadatas=metadatas)
-        print("Tool indexing complete.")
+        by_id = {tool_point_id(server_name, tool.name): tool for tool in tools}
+        stored = await self._stored_hashes(server_name, [tool.name for tool in tools])
+
+        changed = {point_id: tool for point_id, tool in by_id.items()
+                   if stored.get(point_id) != tool_content_hash(tool)}
+        removed_ids = [point_id for point_id in stored if point_id not in by_id]
+        unchanged_ids = [point_id for point_id in by_id if point_id not in changed]
+        diff = {
+            "server": server_name,
+            "added": sorted(t.name for i, t in changed.items() if i not in stored),
+            "updated": sorted(t.name for i, t in changed.items() if i in stored),
+            "removed": len(removed_ids),
+            "unchanged": len(unchanged_ids),
+        }
+
+        if changed:
+            print(f"Indexing {len(changed)} new or changed tools of '{server_name}' into Qdrant...")
+            payloads = [tool_payload(tool, server_name) for tool in changed.values()]
+            vectors = await embedding_service.embed_documents([p["page_content"] for p in payloads])
+            await self._ensure_collection(len(vectors[0]))
+            points = [rest.PointStruct(id=i, vector=v, payload=p) for i, v, p in zip(changed, vectors, payloads)]
+            for start in range(0, len(points), UPSERT_BATCH_SIZE):
+                await self.client.upsert(self.collection_name, points=points[start:start + UPSERT_BATCH_SIZE])
+            self.matrix.upsert(list(changed), vectors, [p["metadata"] for p in payloads])
+
+        if removed_ids:
+            await self.remove_tools(removed_ids)
 
-    def delete_all_tools(self):
+        # Unchanged tools missing from the matrix (e.g. a failed cold start) are loaded without re-embedding
+        known = set(self.matrix.ids())
+        missing = [point_id for point_id in unchanged_ids if point_id not in known]
+        if missing:
+            records = await self.client.retrieve(self.collection_name, ids=missing, with_payload=True, with_vectors=True)
+            self.matrix.upsert([str(r.id) for r in records], [r.vector for r in records],
+                               [(r.payload or {}).get("metadata", {}) for r in records])
+
+        print(f"Tool indexing complete: {diff}")
+        return diff
+
+    async def remove_tools(self, ids: Sequence[str]) -> int:
+        """Removes tools by point ID from Qdrant and the matrix."""
+        if not ids:
+            return 0
+        await self.client.delete(self.collection_name, points_selector=rest.PointIdsList(points=list(ids)))
+        return self.matrix.remove(ids)
+
+    async def delete_all_tools(self):
         """Clears the tool index (useful for refreshing registry)"""
-        # Logic to clear collection would go here
-        pass
+        if await self.client.collection_exists(self.collection_name):
+            await self.client.delete_collection(self.collection_name)
+        self.matrix.clear()
+
+def load_tool_matrix(matrix: Optional[ToolMatrix] = None, batch_size: int = 1024) -> int:
+    """Cold start: fills the matrix with every tool stored in Qdrant. Returns the tool count."""
+    matrix = matrix if matrix is not None else tool_matrix
+    client = QdrantClient(url=config.QDRANT_URL, api_key=config.QDRANT_API_KEY)
+    try:
+        ids, vectors, payloads = [], [], []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                COLLECTION_NAME, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+            )
+            for point in points:
+                ids.append(str(point.id))
+                vectors.append(point.vector)
+                payloads.append((point.payload or {}).get("metadata", {}))
+            if offset is None:
+                break
+        matrix.replace(ids, vectors, payloads)
+        return len(ids)
+    finally:
+        client.close()
@@ -0,0 +1,173 @@
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple
+import threading
+
+import numpy as np
+
+from src.tools.lexical_index import LexicalToolIndex
+
+class ToolMatrix:
+    """
+    In-process tool index: one contiguous float32 matrix of L2-normalized embeddings.
+
+    Top-k routing is a single matrix-vector product plus a partial sort, so no network
+    round trip is needed per query. Rows are kept dense: added tools are appended
+    (capacity doubles when full) and a removed tool's row is overwritten by the last row.
+    Each row carries the tool's payload (name, description, schema), which is also
+    indexed in `lexical` (BM25 + tool names) so both views always hold the same tools.
+    Subscribers (e.g. SemanticToolRouter's shortlist cache) are told whenever tools change.
+    """
+    def __init__(self, initial_capacity: int = 256):
+        self.initial_capacity = initial_capacity
+        self._vectors: Optional[np.ndarray] = None  # shape (capacity, dim); rows [0, len) are live
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.lexical = LexicalToolIndex()
+        self._listeners: List[Callable[[], None]] = []
+
+    def subscribe(self, listener: Callable[[], None]):
+        self._listeners.append(listener)
+
+    def _changed(self):
+        for listener in self._listeners:
+            listener()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._vectors is None else self._vectors.shape[1]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, rows: int, dim: int):
+        if self._vectors is None:
+            self._vectors = np.empty((max(self.initial_capacity, rows), dim), dtype=np.float32)
+            return
+        if dim != self._vectors.shape[1]:
+            raise ValueError(f"Embedding dimension {dim} does not match the index ({self._vectors.shape[1]})")
+        capacity = self._vectors.shape[0]
+        if rows > capacity:
+            grown = np.empty((max(rows, capacity * 2), dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+            self._vectors = grown
+
+    def upsert(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], payloads: Sequence[Dict[str, Any]]):
+        """Adds tools or replaces the vectors and payloads of existing ones."""
+        if not ids:
+            return
+        block = self._normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            new = sum(1 for point_id in dict.fromkeys(ids) if point_id not in self._rows)
+            self._reserve(len(self._ids) + new, block.shape[1])
+            for point_id, vector, payload in zip(ids, block, payloads):
+                row = self._rows.get(point_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[point_id] = row
+                    self._ids.append(point_id)
+                    self._payloads.append(payload)
+                else:
+                    self._payloads[row] = payload
+                self._vectors[row] = vector
+                self.lexical.upsert(point_id, payload)
+        self._changed()
+
+    def remove(self, ids: Sequence[str]) -> int:
+        """Removes tools by point ID. Returns how many were present."""
+        removed = 0
+        with self._lock:
+            for point_id in ids:
+                row = self._rows.pop(point_id, None)
+                if row is None:
+                    continue
+                self.lexical.remove(point_id)
+                last = len(self._ids) - 1
+                if row != last:
+                    # Move the last row into the hole to keep the matrix dense
+                    self._vectors[row] = self._vectors[last]
+                    self._ids[row] = self._ids[last]
+                    self._payloads[row] = self._payloads[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._payloads.pop()
+                removed += 1
+        if removed:
+            self._changed()
+        return removed
+
+    def replace(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], payloads: Sequence[Dict[str, Any]]):
+        """Replaces the whole index, e.g. on cold start from the persistent store."""
+        with self._lock:
+            self.clear()
+            self.upsert(ids, vectors, payloads)
+
+    def clear(self):
+        with self._lock:
+            self._vectors = None
+            self._ids.clear()
+            self._payloads.clear()
+            self._rows.clear()
+            self.lexical.clear()
+        self._changed()
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._ids)
+
+    def payload(self, point_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.get(point_id)
+            return None if row is None else self._payloads[row]
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Returns up to k (payload, cosine similarity) pairs, best first."""
+        with self._lock:
+            return [(self._payloads[self._rows[i]], score) for i, score in self.search_ids(vector, k)]
+
+    def search_ids(self, vector: Sequence[float], k: int, ids: Optional[Collection[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Returns up to k (point ID, cosine similarity) pairs, best first. With `ids`, only
+        those tools are scored (a gathered sub-matrix), e.g. an agent's allowed tools.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        with self._lock:
+            if ids is None:
+                rows = None
+                scores = self._vectors[:len(self._ids)] @ query if self._ids else np.empty(0)
+            else:
+                rows = np.fromiter((self._rows[i] for i in ids if i in self._rows), dtype=np.intp)
+                scores = self._vectors[rows] @ query if len(rows) else np.empty(0)
+            size = len(scores)
+            if size == 0 or k <= 0:
+                return []
+            if k < size:
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+            if rows is not None:
+                return [(self._ids[rows[i]], float(scores[i])) for i in top]
+            return [(self._ids[i], float(scores[i])) for i in top]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tools": len(self._ids),
+                "dim": self.dim,
+                "capacity": 0 if self._vectors is None else self._vectors.shape[0],
+                "bytes": 0 if self._vectors is None else self._vectors.nbytes,
+                "lexical_terms": self.lexical.stats()["terms"],
+            }
+
+# Shared by ToolIndexer (writes) and SemanticToolRouter (reads)
+tool_matrix = ToolMatrix()
@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import re
+import threading
+
+# Qualified names are '<server>__<tool>'; provider function names allow [A-Za-z0-9_-]
+NAMESPACE_SEPARATOR = "__"
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+def qualified_name(server_name: str, tool_name: str) -> str:
+    return f"{_UNSAFE.sub('_', server_name)}{NAMESPACE_SEPARATOR}{tool_name}"
+
+class AmbiguousToolError(LookupError):
+    """A bare tool name is exposed by several servers; the qualified name must be used."""
+    def __init__(self, tool_name: str, candidates: List[str]):
+        super().__init__(f"Tool '{tool_name}' is provided by several servers; use one of: {', '.join(candidates)}")
+        self.tool_name = tool_name
+        self.candidates = candidates
+
+@dataclass(frozen=True)
+class ToolEntry:
+    server: str
+    name: str
+    schema: Any = None
+    description: str = ""
+    cache_ttl: Optional[float] = None  # result cache TTL the server declared (see result_cache)
+    qualified_name: str = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "qualified_name", qualified_name(self.server, self.name))
+
+@dataclass(frozen=True)
+class _Snapshot:
+    by_qualified: Mapping[str, ToolEntry] = field(default_factory=dict)
+    by_name: Mapping[str, Tuple[ToolEntry, ...]] = field(default_factory=dict)
+    servers: Mapping[str, Tuple[ToolEntry, ...]] = field(default_factory=dict)
+    ambiguous: Mapping[str, List[str]] = field(default_factory=dict)  # bare name -> sorted qualified names
+
+class ToolRegistry:
+    """
+    Process-wide index of connected tools: tool name -> (server, schema).
+
+    Lookups are O(1) dictionary reads against an immutable snapshot. Writers (server
+    connect / disconnect) build the next snapshot under a lock, copying the maps and
+    patching only the server's own names, and swap the reference, so a lookup never
+    sees a half-registered server.
+
+    A tool name exposed by a single server resolves by its bare name; when several
+    servers expose it, each copy is addressed as '<server>__<tool>' (the qualified
+    name always works).
+    """
+    def __init__(self):
+        self._snapshot = _Snapshot()
+        self._write_lock = threading.Lock()
+
+    def register_server(self, server_name: str, tools: Iterable[ToolEntry]):
+        """Adds or replaces every tool of a server."""
+        with self._write_lock:
+            self._swap(server_name, tuple(tools))
+
+    def unregister_server(self, server_name: str) -> bool:
+        with self._write_lock:
+            if server_name not in self._snapshot.servers:
+                return False
+            self._swap(server_name, None)
+            return True
+
+    def clear(self):
+        with self._write_lock:
+            self._snapshot = _Snapshot()
+
+    def _swap(self, server_name: str, entries: Optional[Tuple[ToolEntry, ...]]):
+        """Builds the next snapshot by patching only the names the server touches, then publishes it."""
+        current = self._snapshot
+        old = current.servers.get(server_name, ())
+        servers = dict(current.servers)
+        by_qualified = dict(current.by_qualified)
+        by_name = dict(current.by_name)
+        ambiguous = dict(current.ambiguous)
+
+        for entry in old:
+            by_qualified.pop(entry.qualified_name, None)
+            by_name[entry.name] = tuple(e for e in by_name.get(entry.name, ()) if e.server != server_name)
+        if entries is None:
+            servers.pop(server_name, None)
+        else:
+            servers[server_name] = entries
+            for entry in entries:
+                by_qualified[entry.qualified_name] = entry
+                by_name[entry.name] = tuple(e for e in by_name.get(entry.name, ()) if e.server != server_name) + (entry,)
+
+        for name in {entry.name for entry in old} | {entry.name for entry in entries or ()}:
+            same_name = by_name.get(name, ())
+            if not same_name:
+                by_name.pop(name, None)
+            if len(same_name) > 1:
+                ambiguous[name] = sorted(entry.qualified_name for entry in same_name)
+            else:
+                ambiguous.pop(name, None)
+
+        self._snapshot = _Snapshot(
+            by_qualified=MappingProxyType(by_qualified),
+            by_name=MappingProxyType(by_name),
+            servers=MappingProxyType(servers),
+            ambiguous=MappingProxyType(ambiguous),
+        )
+
+    def resolve(self, name: str) -> Optional[ToolEntry]:
+        """
+        Entry for a bare or qualified tool name; None when unknown.
+        Raises AmbiguousToolError for a bare name several servers expose.
+        """
+        snapshot = self._snapshot
+        entries = snapshot.by_name.get(name)
+        if entries:
+            if len(entries) > 1:
+                raise AmbiguousToolError(name, snapshot.ambiguous[name])
+            return entries[0]
+        return snapshot.by_qualified.get(name)
+
+    def public_name(self, server_name: str, tool_name: str) -> str:
+        """Name to show the model: bare when unambiguous, qualified otherwise."""
+        entries = self._snapshot.by_name.get(tool_name, ())
+        if len(entries) > 1 or (server_name and entries and entries[0].server != server_name):
+            return qualified_name(server_name, tool_name)
+        return tool_name
+
+    def server_tools(self, server_name: str) -> Tuple[ToolEntry, ...]:
+        return self._snapshot.servers.get(server_name, ())
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "servers": len(snapshot.servers),
+            "tools": len(snapshot.by_qualified),
+            "ambiguous_names": len(snapshot.ambiguous),
+        }
+
+# Maintained by MCPServerManager; read by tool_node and SemanticToolRouter
+tool_registry = ToolRegistry()
@@ -1,63 +1,207 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, FrozenSet, Optional
+import asyncio
 import json
-from langchain_community.vectorstores import Qdrant
-from langchain_openai import OpenAIEmbeddings
+import time
+from src.services.embedding_service import embedding_service
+from src.tools.tool_matrix import ToolMatrix, tool_matrix
+from src.tools.tool_indexer import load_tool_matrix
+from src.tools.tool_registry import tool_registry
+from src.utils.cache import LRUCache
+from src.utils.config import config
+
+# Above this many tools a search takes milliseconds; run it off the event loop
+INLINE_SEARCH_MAX_TOOLS = 20_000
+# Each ranking contributes top_k * HYBRID_CANDIDATE_FACTOR candidates to the fusion
+HYBRID_CANDIDATE_FACTOR = 4
+# Standard reciprocal rank fusion constant; damps the influence of the very top ranks
+RRF_K = 60
 
 class SemanticToolRouter:
-    def __init__(self, top_k: int = 5):
+    """
+    Shortlists the tools relevant to a query by hybrid lexical + vector search.
+
+    Queries that name tools by identifier (a name such as 'search_web', or a prefix such
+    as 'search_w') are answered from the lexical index alone, without embedding the query.
+    A plain word that equals a tool name ('fetch') is too common to be sure of: that tool
+    goes first and the rest of the shortlist is searched as usual. Otherwise the
+    vector ranking (one matrix-vector product over the in-process ToolMatrix) and a BM25
+    ranking over tool names, descriptions and argument names are fused, so rare exact
+    terms such as identifiers are not lost in the embedding. Qdrant's 'mcp_tools'
+    collection is only read to fill the index on cold start.
+
+    Query embeddings and shortlists are kept in size-bounded LRU caches, so retries and
+    repeated or templated queries skip the embedding call and the search. Shortlists
+    depend on the index and are dropped by `invalidate()`, which the matrix calls whenever
+    tools are added, updated or removed; query embeddings do not, and are kept.
+
+    An agent's tool allow-list is applied inside the search (both rankings only score the
+    allowed tools), so the shortlist is the agent's top-k rather than a filtered global one.
+    """
+    def __init__(self, top_k: int = 5, cache_size: int = config.TOOL_ROUTER_CACHE_SIZE, matrix: Optional[ToolMatrix] = None,
+                 lexical_weight: float = config.TOOL_ROUTER_LEXICAL_WEIGHT):
         self.top_k = top_k
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.lexical_weight = lexical_weight
+        self.matrix = matrix if matrix is not None else tool_matrix
+        self._embedding_cache = LRUCache(cache_size)
+        self._shortlist_cache = LRUCache(cache_size)
+        self._allowed_cache = LRUCache(cache_size)  # allow-list -> point IDs in the index
+        # Average cost of the work a cache hit skips, for reporting saved latency
+        self._timings = {"embed_ms": 0.0, "embeds": 0, "search_ms": 0.0, "searches": 0}
+        self._routes = {"name_fast_path": 0, "hybrid": 0, "vector": 0}
+        self._generation = 0
+        self.matrix.subscribe(self.invalidate)
+        if not len(self.matrix):
+            self._cold_start()
+
+    def _cold_start(self):
         try:
-            self.vector_store = Qdrant.from_existing_collection(
-                embedding=self.embeddings,
-                collection_name="mcp_tools",
-                url="http://localhost:6333"
-            )
+            count = load_tool_matrix(self.matrix)
+            print(f"Loaded {count} tools from Qdrant into the in-memory tool index.")
         except Exception:
             print("Warning: 'mcp_tools' collection not found in Qdrant. Tool routing will be disabled until tools are indexed.")
-            # Fallback or allow it to be None
-            self.vector_store = None
 
-    def route(self, query: str) -> List[Dict[str, Any]]:
+    def invalidate(self):
+        """Drops cached shortlists after the tool index changed."""
+        self._generation += 1
+        self._shortlist_cache.clear()
+        self._allowed_cache.clear()
+
+    async def route(self, query: str, allowed: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
         """
         Routes the user query to the top-k most relevant tools.
         Returns a list of tool definitions (names/descriptions) to be passed to the Agent.
+        `allowed` restricts routing to tools with those bare or qualified names; empty or
+        None allows every tool.
         """
         print(f"Routing query: '{query}'...")
         
-        if not self.vector_store:
-            print("Vector store not available. Returning empty tool list.")
+        if not len(self.matrix):
+            print("Tool index is empty. Returning empty tool list.")
+            return []
+
+        key = (query, allowed) if allowed else query
+        cached = self._shortlist_cache.get(key)
+        if cached is not None:
+            return [dict(tool) for tool in cached]
+
+        generation = self._generation
+        shortlisted_tools = await self._search(query, self._allowed_ids(allowed) if allowed else None)
+        if shortlisted_tools is not None:
+            # Do not cache a shortlist from an index that was replaced mid-search
+            if generation == self._generation:
+                self._shortlist_cache.put(key, shortlisted_tools)
+            return [dict(tool) for tool in shortlisted_tools]
+        return []
+
+    async def _embed(self, query: str) -> List[float]:
+        vector = self._embedding_cache.get(query)
+        if vector is None:
+            started = time.perf_counter()
+            vector = await embedding_service.embed_query(query)
+            self._timings["embed_ms"] += (time.perf_counter() - started) * 1000
+            self._timings["embeds"] += 1
+            self._embedding_cache.put(query, vector)
+        return vector
+
+    def _allowed_ids(self, allowed: FrozenSet[str]) -> FrozenSet[str]:
+        ids = self._allowed_cache.get(allowed)
+        if ids is None:
+            generation = self._generation
+            ids = frozenset(self.matrix.lexical.ids_named(allowed))
+            if generation == self._generation:
+                self._allowed_cache.put(allowed, ids)
+        return ids
+
+    async def _search(self, query: str, ids: Optional[FrozenSet[str]] = None):
+        if ids is not None and not ids:
+            # None of the allowed tools is indexed (e.g. their server is not connected)
             return []
-            
-        # Perform similarity search
         try:
-            results = self.vector_store.similarity_search(query, k=self.top_k)
+            # Fast path: the query names tools by identifier, so no embedding is needed
+            hits = self.matrix.lexical.name_hits(query, ids=ids, words=False)
+            if hits:
+                self._routes["name_fast_path"] += 1
+                ranked = hits[:self.top_k]
+                for point_id, _score in self.matrix.lexical.search(query, self.top_k + len(ranked), ids):
+                    if len(ranked) >= self.top_k:
+                        break
+                    if point_id not in ranked:
+                        ranked.append(point_id)
+            else:
+                # The query embedding is batched with concurrent requests
+                vector = await self._embed(query)
+                started = time.perf_counter()
+                candidates = self.top_k * HYBRID_CANDIDATE_FACTOR
+                if len(ids if ids is not None else self.matrix) > INLINE_SEARCH_MAX_TOOLS:
+                    vector_hits = await asyncio.to_thread(self.matrix.search_ids, vector, candidates, ids)
+                else:
+                    vector_hits = self.matrix.search_ids(vector, candidates, ids)
+                lexical_hits = self.matrix.lexical.search(query, candidates, ids) if self.lexical_weight > 0 else []
+                # Tools named by a plain word lead; the fused ranking fills the other slots
+                named = self.matrix.lexical.name_hits(query, ids=ids)[:self.top_k]
+                ranked = named + [point_id for point_id in self._fuse(vector_hits, lexical_hits) if point_id not in named]
+                ranked = ranked[:self.top_k]
+                self._routes["hybrid" if lexical_hits else "vector"] += 1
+                self._timings["search_ms"] += (time.perf_counter() - started) * 1000
+                self._timings["searches"] += 1
         except Exception as e:
             print(f"Tool routing failed: {e}")
-            return []
-        
-        shortlisted_tools = []
-        for doc in results:
-            # print(f" - Found tool: {doc.metadata.get('tool_name')}")
-            tool_def = {
-                "name": doc.metadata.get("tool_name"),
-                "description": doc.metadata.get("description"),
-            }
-            
-            # Try to parse properties/args if available
-            if "json_schema" in doc.metadata:
-                try:
-                    schema = doc.metadata.get("json_schema")
-                    if isinstance(schema, str):
-                        tool_def["args"] = json.loads(schema)
-                    else:
-                        tool_def["args"] = schema
-                except json.JSONDecodeError:
-                    print(f"Failed to parse JSON schema for tool: {tool_def['name']}")
-                    tool_def["args"] = {}
-                except Exception as e:
-                    print(f"Error processing tool schema: {e}")
-                    
-            shortlisted_tools.append(tool_def)
-            
-        return shortlisted_tools
+            return None
+
+        payloads = [self.matrix.payload(point_id) for point_id in ranked]
+        return [self._tool_def(metadata) for metadata in payloads if metadata is not None]
+
+    def _fuse(self, vector_hits, lexical_hits) -> List[str]:
+        """
+        Reciprocal rank fusion: each list contributes weight / (RRF_K + rank). Ranks rather
+        than raw scores are fused because cosine similarities and BM25 scores are not on
+        comparable scales.
+        """
+        scores: Dict[str, float] = {}
+        for rank, (point_id, _score) in enumerate(vector_hits):
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        for rank, (point_id, _score) in enumerate(lexical_hits):
+            scores[point_id] = scores.get(point_id, 0.0) + self.lexical_weight / (RRF_K + rank + 1)
+        return sorted(scores, key=lambda point_id: -scores[point_id])
+
+    @staticmethod
+    def _tool_def(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        # Tools whose name several servers share are offered under '<server>__<tool>'
+        tool_def = {
+            "name": tool_registry.public_name(metadata.get("server_name") or "", metadata.get("tool_name")),
+            "description": metadata.get("description"),
+        }
+
+        # Try to parse properties/args if available
+        if "json_schema" in metadata:
+            try:
+                schema = metadata.get("json_schema")
+                if isinstance(schema, str):
+                    tool_def["args"] = json.loads(schema)
+                else:
+                    tool_def["args"] = schema
+            except json.JSONDecodeError:
+                print(f"Failed to parse JSON schema for tool: {tool_def['name']}")
+                tool_def["args"] = {}
+            except Exception as e:
+                print(f"Error processing tool schema: {e}")
+        return tool_def
+
+    def cache_stats(self) -> Dict[str, Any]:
+        t = self._timings
+        avg_embed = t["embed_ms"] / t["embeds"] if t["embeds"] else 0.0
+        avg_search = t["search_ms"] / t["searches"] if t["searches"] else 0.0
+        shortlist = self._shortlist_cache.stats()
+        embedding = self._embedding_cache.stats()
+        # A shortlist hit skips embedding and search; an embedding hit (after a shortlist miss) skips the embedding
+        saved_ms = shortlist["hits"] * (avg_embed + avg_search) + embedding["hits"] * avg_embed
+        return {
+            "shortlists": shortlist,
+            "embeddings": embedding,
+            "allow_lists": self._allowed_cache.stats(),
+            "avg_embed_ms": avg_embed,
+            "avg_search_ms": avg_search,
+            "estimated_saved_ms": saved_ms,
+            "routes": dict(self._routes),
+            "index": self.matrix.stats(),
+        }
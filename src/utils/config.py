@@ -7,6 +7,8 @@ class Config:
     NEO4J_URI = os.getenv("NEO4J_URI", os.getenv("NEO4J_URL", "bolt://localhost:7687"))
     NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
     NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+    NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+    NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
     
     QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
@@ -29,4 +31,84 @@ class Config:
         "reflector": "gpt-4o",       # Self-correction usually needs high intelligence
     }
 
+    # Routing among equivalent models of a tier (Model nodes list the tiers they serve)
+    MODEL_ROUTER_EWMA_ALPHA = float(os.getenv("MODEL_ROUTER_EWMA_ALPHA", "0.2"))
+    MODEL_ROUTER_FAILURE_THRESHOLD = int(os.getenv("MODEL_ROUTER_FAILURE_THRESHOLD", "3"))
+    MODEL_ROUTER_COOLDOWN_SECONDS = float(os.getenv("MODEL_ROUTER_COOLDOWN_SECONDS", "30"))
+
+    # Embedding micro-batching across concurrent requests
+    EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+    EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64"))
+
+    # Per-process LRU caches of query embeddings and tool shortlists in the tool router
+    TOOL_ROUTER_CACHE_SIZE = int(os.getenv("TOOL_ROUTER_CACHE_SIZE", "1024"))
+    # Weight of the BM25 ranking relative to the vector ranking in hybrid tool routing (0 = vector only)
+    TOOL_ROUTER_LEXICAL_WEIGHT = float(os.getenv("TOOL_ROUTER_LEXICAL_WEIGHT", "1.0"))
+
+    # Semantic response cache (answers accepted by reflection, per workspace)
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+    # Tiered reflection: cheap scores inside [threshold - margin, threshold + margin) go to the reflector
+    REFLECTION_GATE_MARGIN = float(os.getenv("REFLECTION_GATE_MARGIN", "0.15"))
+    REFLECTION_GATE_MODEL = os.getenv("REFLECTION_GATE_MODEL") or None  # e.g. 'fast' to score with a local model first
+
+    # Default speculation policy for agents without their own: 'off' or 'fast_smart'
+    AGENT_SPECULATION = os.getenv("AGENT_SPECULATION", "off")
+    # Tool execution: per-call timeout and concurrent calls allowed per MCP session (stdio subprocess);
+    # a server's cap is MCP_POOL_SIZE x MCP_SERVER_MAX_CONCURRENCY
+    TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "30"))
+    MCP_SERVER_MAX_CONCURRENCY = int(os.getenv("MCP_SERVER_MAX_CONCURRENCY", "4"))
+    # MCP session pools: sessions per server, liveness probes, respawn backoff cap
+    MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+    MCP_PING_INTERVAL_SECONDS = float(os.getenv("MCP_PING_INTERVAL_SECONDS", "15"))
+    MCP_PING_TIMEOUT_SECONDS = float(os.getenv("MCP_PING_TIMEOUT_SECONDS", "5"))
+    MCP_RESPAWN_BACKOFF_MAX_SECONDS = float(os.getenv("MCP_RESPAWN_BACKOFF_MAX_SECONDS", "60"))
+    # MCP tool result cache: comma-separated name patterns with optional TTLs, e.g. 'search_web=300,github__get_*'
+    TOOL_RESULT_CACHE = os.getenv("TOOL_RESULT_CACHE", "")
+    TOOL_RESULT_CACHE_TTL_SECONDS = float(os.getenv("TOOL_RESULT_CACHE_TTL_SECONDS", "300"))
+    TOOL_RESULT_CACHE_SIZE = int(os.getenv("TOOL_RESULT_CACHE_SIZE", "1024"))
+    # Also cache tools the server annotates as read-only and idempotent
+    TOOL_RESULT_CACHE_READ_ONLY = os.getenv("TOOL_RESULT_CACHE_READ_ONLY", "false").lower() == "true"
+    # Tool results longer than TOOL_RESULT_MAX_CHARS enter the history as an excerpt; the rest is paged on demand
+    TOOL_RESULT_MAX_CHARS = int(os.getenv("TOOL_RESULT_MAX_CHARS", "4000"))
+    TOOL_RESULT_PAGE_CHARS = int(os.getenv("TOOL_RESULT_PAGE_CHARS", "4000"))
+    TOOL_RESULT_STORE_MAX_CHARS = int(os.getenv("TOOL_RESULT_STORE_MAX_CHARS", str(64 * 1024 * 1024)))
+    TOOL_RESULT_STORE_TTL_SECONDS = float(os.getenv("TOOL_RESULT_STORE_TTL_SECONDS", "3600"))
+    # Context window manager: history is packed into the model's context_window (Model registry) before each call
+    AGENT_CONTEXT_MANAGER = os.getenv("AGENT_CONTEXT_MANAGER", "true").lower() == "true"
+    AGENT_CONTEXT_WINDOW_DEFAULT = int(os.getenv("AGENT_CONTEXT_WINDOW_DEFAULT", "8192"))
+    AGENT_CONTEXT_RESPONSE_TOKENS = int(os.getenv("AGENT_CONTEXT_RESPONSE_TOKENS", "1024"))
+    # Share of the budget the recent turns are compacted to when older turns are summarized
+    AGENT_CONTEXT_SUMMARY_TARGET = float(os.getenv("AGENT_CONTEXT_SUMMARY_TARGET", "0.5"))
+    AGENT_CONTEXT_SUMMARY_MODEL = os.getenv("AGENT_CONTEXT_SUMMARY_MODEL", "fast")
+    # How routed tools reach the model: 'text' (JSON convention in the system prompt) or 'native' (bind_tools)
+    AGENT_TOOL_CALLING = os.getenv("AGENT_TOOL_CALLING", "text")
+    # Compiled per-agent graphs; the TTL bounds how long an edit made through another worker goes unseen
+    AGENT_GRAPH_CACHE_SIZE = int(os.getenv("AGENT_GRAPH_CACHE_SIZE", "256"))
+    AGENT_GRAPH_CACHE_TTL_SECONDS = float(os.getenv("AGENT_GRAPH_CACHE_TTL_SECONDS", "300"))
+    # How often each worker checks the SystemSettings version counter for changes saved by other workers
+    SETTINGS_POLL_SECONDS = float(os.getenv("SETTINGS_POLL_SECONDS", "5"))
+    # Chat run admission per model backend, unless its Model node sets max_concurrency / max_queue (0 = unlimited)
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "16"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "120"))
+
+    # Durable graph checkpoints: 'sqlite' (local file), 'neo4j' or 'off'; retention applied every compaction interval
+    CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite")
+    CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "data/checkpoints.sqlite3")
+    CHECKPOINT_KEEP_PER_THREAD = int(os.getenv("CHECKPOINT_KEEP_PER_THREAD", "20"))
+    CHECKPOINT_RETENTION_SECONDS = float(os.getenv("CHECKPOINT_RETENTION_SECONDS", str(7 * 24 * 3600)))
+    CHECKPOINT_COMPACT_INTERVAL_SECONDS = float(os.getenv("CHECKPOINT_COMPACT_INTERVAL_SECONDS", "3600"))
+    # Appended-only list channels (messages) are written as deltas; a full value every N versions
+    CHECKPOINT_DELTA_CHAIN_MAX = int(os.getenv("CHECKPOINT_DELTA_CHAIN_MAX", "32"))
+
+    # Exact-match LLM call memoization (opt-in, shared on-disk store)
+    LLM_MEMO_ENABLED = os.getenv("LLM_MEMO_ENABLED", "false").lower() == "true"
+    LLM_MEMO_PATH = os.getenv("LLM_MEMO_PATH", "data/llm_memo.sqlite3")
+    LLM_MEMO_MAX_BYTES = int(os.getenv("LLM_MEMO_MAX_BYTES", str(256 * 1024 * 1024)))
+    LLM_MEMO_MAX_AGE_SECONDS = float(os.getenv("LLM_MEMO_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+
 config = Config()
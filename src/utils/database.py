@@ -0,0 +1,36 @@
+from typing import Optional
+from neo4j import AsyncGraphDatabase, AsyncDriver
+from src.utils.config import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Process-wide async driver. It owns the connection pool shared by all routers and services.
+_driver: Optional[AsyncDriver] = None
+
+def get_driver() -> AsyncDriver:
+    """Returns the shared async Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        _driver = AsyncGraphDatabase.driver(
+            config.NEO4J_URI,
+            auth=(config.NEO4J_USERNAME, config.NEO4J_PASSWORD),
+            max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+        )
+        logger.info(
+            f"Neo4j driver created (pool size {config.NEO4J_MAX_POOL_SIZE}, "
+            f"acquisition timeout {config.NEO4J_ACQUISITION_TIMEOUT}s)."
+        )
+    return _driver
+
+async def close_driver():
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+        logger.info("Neo4j driver closed.")
+
+async def get_db_driver() -> AsyncDriver:
+    """FastAPI dependency for the shared driver."""
+    return get_driver()
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.api.admission import AdmissionController, AdmissionRejected
+
+async def _hold(controller, client, release, log, positions=None, name=None):
+    async def on_position(position):
+        if positions is not None:
+            positions.append(position)
+
+    async with controller.admit("ollama", client, on_position=on_position):
+        log.append(name or client)
+        await release.wait()
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_round_robin_across_clients():
+    controller = AdmissionController(default_limit=1, default_queue=8, timeout=5)
+    log, b_positions = [], []
+    gates = {name: asyncio.Event() for name in ("a1", "a2", "a3", "a4", "b1")}
+
+    def run(name, positions=None):
+        return asyncio.create_task(_hold(controller, name[0], gates[name], log, positions, name))
+
+    tasks = [run("a1")]
+    await _settle()
+    tasks += [run("a2"), run("a3"), run("a4")]
+    await _settle()
+    tasks.append(run("b1", b_positions))
+    await _settle()
+    assert controller.stats()["ollama"]["waiting"] == 4
+    assert b_positions == [2]  # ahead of a3 and a4, which arrived first
+
+    for name in ("a1", "a2", "b1", "a3", "a4"):
+        await _settle()
+        gates[name].set()
+    await asyncio.gather(*tasks)
+    assert log == ["a1", "a2", "b1", "a3", "a4"]
+    assert b_positions == [2, 1]
+    assert controller.stats()["ollama"]["active"] == 0
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_and_timeouts_leave_the_queue():
+    controller = AdmissionController(default_limit=1, default_queue=1, timeout=0.05)
+    release, log = asyncio.Event(), []
+    holder = asyncio.create_task(_hold(controller, "a", release, log))
+    await _settle()
+    waiter = asyncio.create_task(_hold(controller, "b", release, log))
+    await _settle()
+
+    with pytest.raises(AdmissionRejected) as shed:
+        async with controller.admit("ollama", "c"):
+            pass
+    assert shed.value.reason == "queue_full"
+
+    with pytest.raises(AdmissionRejected) as timed_out:
+        await waiter
+    assert timed_out.value.reason == "timeout"
+    release.set()
+    await holder
+    stats = controller.stats()["ollama"]
+    assert (stats["active"], stats["waiting"], stats["rejected"], stats["timed_out"]) == (0, 0, 1, 1)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    controller = AdmissionController(default_limit=1, default_queue=4, timeout=5)
+    release, log = asyncio.Event(), []
+    holder = asyncio.create_task(_hold(controller, "a", release, log))
+    await _settle()
+    waiter = asyncio.create_task(_hold(controller, "b", release, log))
+    await _settle()
+    waiter.cancel()
+    await _settle()
+    release.set()
+    await holder
+
+    assert log == ["a"]
+    assert controller.stats()["ollama"]["active"] == 0
+    # A per-Model limit of 0 admits without queueing
+    async with controller.admit("gpt-4o", "a", limit=0):
+        async with controller.admit("gpt-4o", "b", limit=0):
+            assert controller.stats()["gpt-4o"]["active"] == 2
+
+@pytest.mark.asyncio
+async def test_zero_max_queue_means_unbounded_queue():
+    controller = AdmissionController(default_limit=1, default_queue=0, timeout=5)
+    release, log = asyncio.Event(), []
+    tasks = [asyncio.create_task(_hold(controller, client, release, log)) for client in "abc"]
+    await _settle()
+    assert controller.stats()["ollama"]["waiting"] == 2
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert log == ["a", "b", "c"]
+    assert controller.stats()["ollama"]["rejected"] == 0
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.agent.agent_graphs import AgentGraphRegistry, build_profile
+from src.agent.nodes import _execute_tool_call
+from src.tools.tool_registry import ToolEntry
+
+def _agent(**overrides):
+    fields = dict(id="a1", name="Web Researcher", role="Researcher", goal="Find facts.", backstory="You cite sources.",
+                  tools=["Search_Web"], enabled=True, speculation="off", model_type="smart")
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+def test_profile_bakes_in_instructions_tools_and_model():
+    profile = build_profile(_agent())
+
+    assert profile.instructions == "You are Web Researcher, the team's Researcher.\nYour goal: Find facts.\nYou cite sources."
+    assert profile.tools == frozenset({"search_web"})
+    assert profile.model_type == "smart"
+    assert profile.allows(ToolEntry("web", "search_web"))
+    assert not profile.allows(ToolEntry("fs", "delete_file"))
+    assert build_profile(_agent(tools=[])).allows(ToolEntry("fs", "delete_file"))
+
+@pytest.mark.asyncio
+async def test_graph_is_compiled_once_until_invalidated():
+    builds = []
+    registry = AgentGraphRegistry(build=lambda profile: builds.append(profile) or object(), max_size=4, ttl=60)
+    load = AsyncMock(return_value=_agent())
+
+    first = await registry.get("a1", load)
+    second = await registry.get("a1", load)
+    assert first is second
+    assert load.await_count == 1 and len(builds) == 1
+
+    registry.invalidate("a1")
+    third = await registry.get("a1", load)
+    assert third is not first
+    assert load.await_count == 2
+    assert registry.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_update_during_load_is_not_cached():
+    registry = AgentGraphRegistry(build=lambda profile: object(), max_size=4, ttl=60)
+
+    async def load():
+        registry.invalidate("a1")  # PUT /agents/a1 lands while the old record is being read
+        return _agent()
+
+    assert await registry.get("a1", load) is not None
+    assert registry.stats()["entries"] == 0
+    assert await registry.get("missing", AsyncMock(return_value=None)) is None
+
+@pytest.mark.asyncio
+async def test_tool_outside_allow_list_is_refused():
+    profile = build_profile(_agent())
+    manager = SimpleNamespace(resolve_tool=lambda name: ToolEntry("fs", name), call_tool=AsyncMock())
+    with patch("src.tools.mcp_manager.mcp_manager", manager):
+        result = await _execute_tool_call({"tool": "delete_file", "args": {}}, profile)
+
+    assert result == "Error: Tool 'delete_file' is not available to this agent."
+    manager.call_tool.assert_not_awaited()
@@ -0,0 +1,78 @@
+import json
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, END
+
+from src.api.chat_stream import stream_graph_run
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text: str):
+        self.sent.append(json.loads(text))
+
+class State(TypedDict):
+    messages: Annotated[List, operator.add]
+    reflection_score: float
+
+def build_graph():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="hello streaming world")]))
+
+    def agent(state: State):
+        return {"messages": [llm.invoke(state["messages"])]}
+
+    def reflect(state: State):
+        return {"reflection_score": 0.9}
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent", agent)
+    workflow.add_node("reflect", reflect)
+    workflow.set_entry_point("agent")
+    workflow.add_edge("agent", "reflect")
+    workflow.add_edge("reflect", END)
+    return workflow.compile()
+
+@pytest.mark.asyncio
+async def test_stream_graph_run_forwards_tokens_and_phases():
+    websocket = FakeWebSocket()
+    state = {"messages": [HumanMessage(content="hi")], "reflection_score": 0.0}
+
+    run = await stream_graph_run(websocket, build_graph(), state, config={})
+
+    types = [e["type"] for e in websocket.sent]
+    tokens = [e["data"] for e in websocket.sent if e["type"] == "token"]
+    assert "".join(tokens) == "hello streaming world"
+    assert types.index("metric") < types.index("token")
+    assert {"type": "node_start", "node": "reflect", "phase": "reflection"} in websocket.sent
+
+    # Reflection only starts after the answer has finished streaming
+    agent_end = websocket.sent.index({"type": "node_end", "node": "agent", "phase": "answer"})
+    reflect_start = websocket.sent.index({"type": "node_start", "node": "reflect", "phase": "reflection"})
+    assert agent_end < reflect_start
+
+    assert run == {"answer": "hello streaming world", "reflection_score": 0.9}
+
+@pytest.mark.asyncio
+async def test_nostream_calls_are_sent_as_one_token():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="speculative answer")]))
+
+    async def agent(state: State):
+        return {"messages": [await llm.ainvoke(state["messages"], config={"tags": ["nostream"]})]}
+
+    workflow = StateGraph(State)
+    workflow.add_node("agent", agent)
+    workflow.set_entry_point("agent")
+    workflow.add_edge("agent", END)
+
+    websocket = FakeWebSocket()
+    state = {"messages": [HumanMessage(content="hi")], "reflection_score": 0.0}
+    run = await stream_graph_run(websocket, workflow.compile(), state, config={})
+
+    tokens = [e["data"] for e in websocket.sent if e["type"] == "token"]
+    assert tokens == ["speculative answer"]
+    assert run["answer"] == "speculative answer"
@@ -0,0 +1,106 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.agent.context_window import SUMMARY_HEADER, ContextWindowManager, TokenCounter
+
+def chars_counter():
+    # One token per 4 characters, no tokenizer download
+    return TokenCounter(encode=lambda text: len(text) // 4)
+
+class Summarizer:
+    def __init__(self):
+        self.calls = []
+        self.results = []
+
+    async def __call__(self, previous, messages):
+        self.calls.append((previous, [m.content for m in messages]))
+        self.results.append(f"{previous or ''}+{len(messages)}")
+        return self.results[-1]
+
+def conversation(turns):
+    messages = [SystemMessage(content="rules"), HumanMessage(content="task: audit the repo")]
+    for i in range(turns):
+        messages += [AIMessage(content=f"step {i} " + "x" * 400), HumanMessage(content=f"continue {i}")]
+    return messages
+
+def test_token_counter_memoizes_per_message():
+    counter = chars_counter()
+    messages = conversation(3)
+    first = [counter.count(m) for m in messages]
+    second = [counter.count(m) for m in messages + [AIMessage(content="new")]]
+
+    assert second[:-1] == first
+    assert counter.misses == len(messages) + 1
+    assert counter.hits == len(messages)
+
+@pytest.mark.asyncio
+async def test_history_within_budget_is_untouched():
+    manager = ContextWindowManager(summarize=Summarizer(), counter=chars_counter(), response_tokens=0)
+    messages = conversation(2)
+
+    assert await manager.pack(messages, context_window=10_000) == messages
+
+@pytest.mark.asyncio
+async def test_pins_task_and_latest_user_message_and_summarizes_the_rest():
+    summarizer = Summarizer()
+    manager = ContextWindowManager(summarize=summarizer, counter=chars_counter(), response_tokens=0, summary_target=0.5)
+    messages = conversation(20)
+
+    packed = await manager.pack(messages, context_window=1000)
+
+    assert sum(manager.counter.count(m) for m in packed) <= 1000
+    assert packed[:2] == messages[:2]  # system rules and the task
+    assert packed[2].content.startswith(SUMMARY_HEADER)
+    assert packed[-1] is messages[-1]
+    assert len(summarizer.calls) == 1
+    # Pinned messages are not fed to the summarizer
+    assert "task: audit the repo" not in summarizer.calls[0][1]
+
+@pytest.mark.asyncio
+async def test_summary_is_reused_then_extended_incrementally():
+    summarizer = Summarizer()
+    manager = ContextWindowManager(summarize=summarizer, counter=chars_counter(), response_tokens=0, summary_target=0.5)
+    messages = conversation(20)
+    await manager.pack(messages, context_window=1000)
+
+    # One more turn still fits next to the cached summary: no new summary
+    messages += [AIMessage(content="step 20"), HumanMessage(content="continue 20")]
+    await manager.pack(messages, context_window=1000)
+    assert len(summarizer.calls) == 1
+    assert manager.stats()["summary_hits"] == 1
+
+    # Many more turns: the cached summary is extended with only the newly dropped messages
+    for i in range(21, 30):
+        messages += [AIMessage(content=f"step {i} " + "x" * 400), HumanMessage(content=f"continue {i}")]
+    packed = await manager.pack(messages, context_window=1000)
+    previous, new = summarizer.calls[-1]
+    assert len(summarizer.calls) == 2 and previous == summarizer.results[0]
+    assert all("step 0 " not in content for content in new)
+    assert sum(manager.counter.count(m) for m in packed) <= 1000
+
+@pytest.mark.asyncio
+async def test_tool_results_stay_with_their_call():
+    manager = ContextWindowManager(summarize=Summarizer(), counter=chars_counter(), response_tokens=0, summary_target=0.3)
+    messages = conversation(10) + [
+        AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "c1"}]),
+        ToolMessage(content="r" * 800, tool_call_id="c1"),
+    ]
+
+    packed = await manager.pack(messages, context_window=800)
+
+    index = next(i for i, m in enumerate(packed) if isinstance(m, ToolMessage))
+    assert packed[index - 1].tool_calls[0]["id"] == "c1"
+
+@pytest.mark.asyncio
+async def test_failed_summary_falls_back_to_dropping_old_turns():
+    async def broken(previous, messages):
+        raise RuntimeError("model down")
+
+    manager = ContextWindowManager(summarize=broken, counter=chars_counter(), response_tokens=0)
+    messages = conversation(20)
+
+    packed = await manager.pack(messages, context_window=1000)
+
+    assert packed[:2] == messages[:2]
+    assert not any(SUMMARY_HEADER in m.content for m in packed)
+    assert manager.stats()["summary_failures"] == 1
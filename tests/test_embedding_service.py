@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from src.services.embedding_service import EmbeddingBatcher
+
+class FakeEmbeddings:
+    """Returns [len(text)] per text and records every batch it receives."""
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("embedding endpoint down")
+        return [[float(len(t))] for t in texts]
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_deduplicated_call():
+    fake = FakeEmbeddings()
+    batcher = EmbeddingBatcher(embeddings=fake, window_ms=20, max_batch_size=64)
+
+    texts = ["weather", "stocks", "weather", "news", "stocks"]
+    vectors = await asyncio.gather(*(batcher.embed_query(t) for t in texts))
+
+    assert vectors == [[7.0], [6.0], [7.0], [4.0], [6.0]]
+    assert fake.batches == [["weather", "stocks", "news"]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["deduplicated"] == 2
+    assert stats["batch_size_histogram"]["<=4"] == 1
+    assert stats["max_queue_wait_ms"] >= 0
+
+@pytest.mark.asyncio
+async def test_full_batches_are_dispatched_without_waiting_for_the_window():
+    fake = FakeEmbeddings()
+    batcher = EmbeddingBatcher(embeddings=fake, window_ms=10_000, max_batch_size=3)
+
+    vectors = await asyncio.wait_for(batcher.embed_documents(["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]), 1)
+
+    assert [v[0] for v in vectors] == [1, 2, 3, 4, 5, 6]
+    assert [len(b) for b in fake.batches] == [3, 3]
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    batcher = EmbeddingBatcher(embeddings=FakeEmbeddings(fail=True), window_ms=1)
+    results = await asyncio.gather(batcher.embed_query("a"), batcher.embed_query("b"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats()["errors"] == 1
@@ -0,0 +1,74 @@
+import json
+
+from src.tools.lexical_index import LexicalToolIndex, tokenize
+from src.tools.tool_matrix import ToolMatrix
+
+def tool(name, description="", args=()):
+    return {"tool_name": name, "description": description,
+            "json_schema": json.dumps({"properties": {arg: {"type": "string"} for arg in args}})}
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("readFile search_web the-URL") == ["read", "file", "search", "web", "url"]
+
+def test_bm25_ranks_names_descriptions_and_argument_names():
+    index = LexicalToolIndex()
+    index.upsert("1", tool("search_web", "Search the internet"))
+    index.upsert("2", tool("read_file", "Read a file from disk", args=["path"]))
+    index.upsert("3", tool("write_file", "Write text to disk", args=["path", "content"]))
+
+    assert index.search("search the internet", k=1)[0][0] == "1"
+    assert [i for i, _ in index.search("read file at path", k=2)] == ["2", "3"]
+    assert index.search("unrelated words", k=3) == []
+
+def test_name_hits_exact_and_prefix_only():
+    index = LexicalToolIndex()
+    index.upsert("1", tool("search_web"))
+    index.upsert("2", tool("search_files"))
+    index.upsert("3", tool("fetch"))
+
+    assert index.name_hits("use search_web please") == ["1"]
+    assert index.name_hits("try search_f.") == ["2"]
+    assert index.name_hits("fetch the page") == ["3"]
+    # A plain word is not a prefix hit, otherwise 'search' would select every search_* tool
+    assert index.name_hits("search for cats") == []
+    # Without plain words only identifier-shaped tokens count
+    assert index.name_hits("fetch the page", words=False) == []
+    assert index.name_hits("fetch with search_web", words=False) == ["1"]
+
+def test_remove_and_matrix_keep_lexical_index_in_sync():
+    matrix = ToolMatrix()
+    matrix.upsert(["1", "2"], [[1, 0], [0, 1]], [tool("search_web", "web"), tool("read_file", "disk")])
+    matrix.remove(["1"])
+
+    assert matrix.lexical.name_hits("search_web") == []
+    assert matrix.lexical.search("web", k=5) == []
+    assert matrix.lexical.search("disk", k=5)[0][0] == "2"
+
+    matrix.upsert(["2"], [[0, 1]], [tool("read_file", "filesystem")])
+    assert matrix.lexical.search("disk", k=5) == []
+    matrix.clear()
+    assert len(matrix.lexical) == 0
+
+def test_name_hits_include_qualified_names():
+    index = LexicalToolIndex()
+    index.upsert("1", {**tool("search"), "server_name": "github"})
+    index.upsert("2", {**tool("search"), "server_name": "docs"})
+
+    assert index.name_hits("use github__search") == ["1"]
+    assert index.name_hits("search it") == ["1", "2"]
+
+def test_prefix_hits_follow_upserts_renames_and_removals():
+    index = LexicalToolIndex()
+    index.upsert("1", tool("search_web"))
+    index.upsert("2", tool("search_files"))
+    index.upsert("3", tool("search_wiki"))
+    index.upsert("4", tool("searchable"))
+
+    assert index.name_hits("search_w") == ["1", "3"]
+    index.upsert("3", tool("lookup_wiki"))   # renamed: the old name key goes away
+    index.remove("1")
+    assert index.name_hits("search_w") == []
+    assert index.name_hits("search_") == ["2"]
+    assert index._sorted_names == sorted(index._names)
+    index.clear()
+    assert index._sorted_names == [] and index.name_hits("search_") == []
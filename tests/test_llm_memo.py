@@ -0,0 +1,44 @@
+import time
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from src.agent.llm_memo import SQLiteLLMMemo, bypass_memo
+
+def make_memo(tmp_path, **kwargs):
+    params = {"max_bytes": 1024 * 1024, "max_age_seconds": 3600, **kwargs}
+    return SQLiteLLMMemo(path=str(tmp_path / "memo.sqlite3"), **params)
+
+def generation(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+def test_roundtrip_survives_reopen(tmp_path):
+    memo = make_memo(tmp_path)
+    assert memo.lookup("prompt", "gpt-4o|t=0") is None
+    memo.update("prompt", "gpt-4o|t=0", generation('{"score": 0.9}'))
+    memo.close()
+
+    reopened = make_memo(tmp_path)
+    cached = reopened.lookup("prompt", "gpt-4o|t=0")
+    assert cached[0].message.content == '{"score": 0.9}'
+    # Different parameters are a different key
+    assert reopened.lookup("prompt", "gpt-4o|t=1") is None
+
+def test_bypass_skips_lookup_and_write(tmp_path):
+    memo = make_memo(tmp_path)
+    memo.update("prompt", "llm", generation("a"))
+    with bypass_memo():
+        assert memo.lookup("prompt", "llm") is None
+        memo.update("other", "llm", generation("b"))
+    assert memo.lookup("other", "llm") is None
+    assert memo.stats()["bypassed"] == 1
+
+def test_evicts_by_size_and_age(tmp_path):
+    memo = make_memo(tmp_path, max_bytes=600)
+    for i in range(5):
+        memo.update(f"prompt-{i}", "llm", generation("x" * 50))
+        time.sleep(0.01)
+    assert memo.lookup("prompt-0", "llm") is None
+    assert memo.lookup("prompt-4", "llm") is not None
+    assert memo.stats()["bytes"] <= 600
+
+    aged = make_memo(tmp_path, max_age_seconds=0)
+    assert aged.lookup("prompt-4", "llm") is None
@@ -0,0 +1,38 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.tools.mcp_manager import mcp_manager
+from src.tools.mcp_pool import PooledSession
+
+class FakeSession:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def call_tool(self, tool_name, arguments):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return tool_name
+
+class OneSessionPool:
+    def __init__(self, pooled):
+        self.pooled = pooled
+
+    async def call_tool(self, tool_name, arguments):
+        return await self.pooled.call_tool(tool_name, arguments)
+
+@pytest.mark.asyncio
+async def test_call_tool_caps_concurrency_per_session():
+    session = FakeSession()
+    pooled = PooledSession(0, session_factory=None, max_concurrency=2)
+    pooled.session = session
+    connections = {"stdio": {"pool": OneSessionPool(pooled), "tools": {}}}
+    with patch.object(mcp_manager, "connections", connections):
+        results = await asyncio.gather(*(mcp_manager.call_tool("stdio", f"t{i}", {}) for i in range(6)))
+
+    assert results == [f"t{i}" for i in range(6)]
+    assert session.peak == 2
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ErrorData
+
+from src.tools.mcp_pool import MCPSessionPool, stdio_params
+
+class FakeSession:
+    def __init__(self, index):
+        self.index = index
+        self.dead = False
+
+    async def call_tool(self, tool_name, arguments):
+        if self.dead:
+            raise McpError(ErrorData(code=CONNECTION_CLOSED, message="Connection closed"))
+        await asyncio.sleep(arguments.get("delay", 0))
+        return self.index
+
+    async def send_ping(self):
+        if self.dead:
+            raise ConnectionError("pipe closed")
+
+def fake_factory(created):
+    @asynccontextmanager
+    async def factory():
+        session = FakeSession(len(created))
+        created.append(session)
+        yield session
+    return factory
+
+@pytest.mark.asyncio
+async def test_least_busy_dispatch():
+    created = []
+    pool = MCPSessionPool("fake", size=3, session_factory=fake_factory(created), ping_interval=60)
+    await pool.start()
+    try:
+        results = await asyncio.gather(*(pool.call_tool("t", {"delay": 0.05}) for _ in range(3)))
+        assert sorted(results) == [0, 1, 2]
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_dead_sessions_are_respawned():
+    created = []
+    pool = MCPSessionPool("fake", size=2, session_factory=fake_factory(created), ping_interval=0.02)
+    await pool.start()
+    try:
+        created[0].dead = True
+        with pytest.raises(McpError):
+            while True:  # least-busy dispatch may pick the live session first
+                await pool.call_tool("t", {})
+        created[1].dead = True  # found by the liveness probe instead
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if pool.stats()["alive"] == 2 and len(created) == 4:
+                break
+        assert pool.stats()["alive"] == 2
+        assert [s["restarts"] for s in pool.stats()["sessions"]] == [1, 1]
+        assert await pool.call_tool("t", {}) in (2, 3)
+    finally:
+        await pool.close()
+
+@pytest.mark.asyncio
+async def test_crashed_stdio_server_is_respawned():
+    pool = MCPSessionPool("fake", params=stdio_params(sys.executable, ["-m", "benchmarks.fake_mcp_server"]),
+                          size=1, ping_interval=0.1)
+    await pool.start()
+    try:
+        with pytest.raises(McpError):
+            await pool.call_tool("crash", {})
+        for _ in range(100):
+            await asyncio.sleep(0.1)
+            if pool.stats()["alive"]:
+                break
+        result = await pool.call_tool("echo", {"text": "back"})
+        assert result.content[0].text == "back"
+        assert pool.stats()["sessions"][0]["restarts"] == 1
+    finally:
+        await pool.close()
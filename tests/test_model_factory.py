@@ -0,0 +1,54 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.agent.model_factory import ModelFactory
+from src.utils.config import config
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    ModelFactory.invalidate()
+    yield
+    ModelFactory.invalidate()
+
+def test_get_model_caches_resolved_instance():
+    with patch.object(ModelFactory, "_resolve", return_value=("gpt-4o", {"provider": "openai"}, True)) as mock_resolve, \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: MagicMock(model=name)):
+        hits_before = ModelFactory.cache_stats()["hits"]
+
+        first = ModelFactory.get_model("smart")
+        second = ModelFactory.get_model("smart")
+
+        assert first is second
+        assert mock_resolve.call_count == 1
+        assert ModelFactory.cache_stats()["hits"] == hits_before + 1
+
+def test_invalidate_forces_new_resolution():
+    with patch.object(ModelFactory, "_resolve", return_value=("qwen2.5:1.5b", {"provider": "ollama"}, True)) as mock_resolve, \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: MagicMock(model=name)):
+        first = ModelFactory.get_model("fast")
+        ModelFactory.invalidate()
+        second = ModelFactory.get_model("fast")
+
+        assert first is not second
+        assert mock_resolve.call_count == 2
+
+def test_fallback_resolution_is_not_cached():
+    with patch.object(ModelFactory, "_resolve", return_value=("gpt-4o", None, False)) as mock_resolve, \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: MagicMock(model=name)):
+        ModelFactory.get_model("smart")
+        ModelFactory.get_model("smart")
+
+        assert mock_resolve.call_count == 2
+
+def test_context_window_is_smallest_among_candidates():
+    nodes = {"gpt-4o": {"provider": "openai", "context_window": 128000},
+             "qwen2.5:1.5b": {"provider": "ollama", "context_window": 32000}}
+    with patch.object(ModelFactory, "_resolve", return_value=("gpt-4o", nodes["gpt-4o"], True)), \
+         patch.object(ModelFactory, "_alternatives", return_value=[("qwen2.5:1.5b", nodes["qwen2.5:1.5b"])]), \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: MagicMock(model=name)), \
+         patch("src.agent.model_factory.model_router.rank", side_effect=lambda names: names):
+        assert ModelFactory.context_window("smart") == 32000
+
+    with patch.object(ModelFactory, "_resolve", return_value=("unregistered", None, True)), \
+         patch.object(ModelFactory, "_alternatives", return_value=[]), \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: MagicMock(model=name)):
+        assert ModelFactory.context_window("fast") == config.AGENT_CONTEXT_WINDOW_DEFAULT
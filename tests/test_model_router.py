@@ -0,0 +1,60 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.agent.model_factory import ModelFactory
+from src.agent.model_router import ModelRouter, model_router
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    ModelFactory.invalidate()
+    model_router.reset()
+    yield
+    ModelFactory.invalidate()
+    model_router.reset()
+
+def test_rank_prefers_lower_expected_latency():
+    router = ModelRouter(alpha=0.5)
+    router.record_start("ollama-qwen")
+    router.record_end("ollama-qwen", 900)
+    router.record_start("groq-llama")
+    router.record_end("groq-llama", 300)
+    assert router.rank(["ollama-qwen", "groq-llama"]) == ["groq-llama", "ollama-qwen"]
+
+    # Saturation counts: with three calls in flight the expected latency quadruples
+    for _ in range(3):
+        router.record_start("groq-llama")
+    assert router.rank(["ollama-qwen", "groq-llama"]) == ["ollama-qwen", "groq-llama"]
+
+def test_unknown_models_keep_configured_order_and_failures_open_circuit():
+    router = ModelRouter(failure_threshold=2, cooldown_seconds=60)
+    assert router.rank(["primary", "alternate"]) == ["primary", "alternate"]
+
+    for _ in range(2):
+        router.record_start("primary")
+        router.record_error("primary")
+    assert router.rank(["primary", "alternate"]) == ["alternate", "primary"]
+    assert router.snapshot()["primary"]["circuit_open"] is True
+
+class FailingChatModel(GenericFakeChatModel):
+    def _generate(self, *args, **kwargs):
+        raise ConnectionError("ollama saturated")
+
+def test_get_model_fails_over_to_equivalent_model():
+    built = {
+        "qwen2.5:1.5b": FailingChatModel(messages=iter([]), callbacks=[model_router.callback("qwen2.5:1.5b")]),
+        "phi3": GenericFakeChatModel(messages=iter([AIMessage(content="ok")] * 5), callbacks=[model_router.callback("phi3")]),
+    }
+    with patch.object(ModelFactory, "_resolve", return_value=("qwen2.5:1.5b", {"provider": "ollama"}, True)), \
+         patch.object(ModelFactory, "_alternatives", return_value=[("phi3", {"provider": "ollama", "tiers": ["fast"]})]), \
+         patch.object(ModelFactory, "_build", side_effect=lambda name, node: built[name]):
+        response = asyncio.run(ModelFactory.get_model("fast").ainvoke("hi"))
+
+        assert response.content == "ok"
+        stats = model_router.snapshot()
+        assert stats["qwen2.5:1.5b"]["errors"] == 1
+        assert stats["phi3"]["calls"] == 1 and stats["phi3"]["in_flight"] == 0
+        assert ModelFactory.cache_stats()["candidates"] == {"fast": ["qwen2.5:1.5b", "phi3"]}
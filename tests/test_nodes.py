@@ -12,7 +12,8 @@ def test_reflection_node_call_success(reflection_node):
     # Mock LLM response
     mock_llm_response = AIMessage(content='{"score": 0.9, "reason": "Excellent response"}')
     
-    with patch('src.agent.nodes.llm.invoke', return_value=mock_llm_response):
+    with patch('src.agent.nodes.ModelFactory.get_model') as mock_get_model:
+        mock_get_model.return_value.invoke.return_value = mock_llm_response
         state = {
             "messages": [
                 HumanMessage(content="What is AI?"),
@@ -30,7 +31,8 @@ def test_reflection_node_call_json_error(reflection_node):
     # Mock invalid JSON response
     mock_llm_response = AIMessage(content='Invalid JSON output')
     
-    with patch('src.agent.nodes.llm.invoke', return_value=mock_llm_response):
+    with patch('src.agent.nodes.ModelFactory.get_model') as mock_get_model:
+        mock_get_model.return_value.invoke.return_value = mock_llm_response
         state = {
             "messages": [HumanMessage(content="Test"), AIMessage(content="Response")],
             "retry_count": 0
@@ -41,3 +43,93 @@ def test_reflection_node_call_json_error(reflection_node):
         # Should fallback to default error handling
         assert result["reflection_score"] == 0.5
         assert result["retry_count"] == 1
+
+WEATHER_TOOL = {"name": "get_weather", "description": "Weather",
+                "args": {"type": "object", "properties": {"city": {"type": "string"}}}}
+
+@pytest.mark.asyncio
+async def test_agent_node_native_tool_calling():
+    from unittest.mock import AsyncMock
+    from src.agent.nodes import agent_node, tool_router
+
+    llm = MagicMock()
+    bound = llm.bind_tools.return_value
+    bound.ainvoke = AsyncMock(return_value=AIMessage(
+        content="", tool_calls=[{"name": "get_weather", "args": {"city": "Paris"}, "id": "call_1"}]))
+
+    with patch("src.agent.nodes.ModelFactory.get_model", return_value=llm), \
+         patch.object(tool_router, "route", new=AsyncMock(return_value=[WEATHER_TOOL])), \
+         patch("src.agent.nodes.config.AGENT_TOOL_CALLING", "native"):
+        result = await agent_node({"messages": [HumanMessage(content="Weather in Paris?")]})
+
+    definitions = llm.bind_tools.call_args.args[0]
+    assert definitions[0]["function"]["parameters"]["properties"] == {"city": {"type": "string"}}
+    prompt = bound.ainvoke.await_args.args[0]
+    assert "AVAILABLE TOOLS" not in prompt[0].content
+    assert result["tool_calls"] == [{"tool": "get_weather", "args": {"city": "Paris"}, "id": "call_1"}]
+
+@pytest.mark.asyncio
+async def test_agent_node_native_falls_back_to_text_mode():
+    from unittest.mock import AsyncMock
+    from src.agent.nodes import agent_node, tool_router
+
+    llm = MagicMock()
+    llm.bind_tools.side_effect = NotImplementedError
+    llm.ainvoke = AsyncMock(return_value=AIMessage(content='{"tool": "get_weather", "args": {"city": "Paris"}}'))
+
+    with patch("src.agent.nodes.ModelFactory.get_model", return_value=llm), \
+         patch.object(tool_router, "route", new=AsyncMock(return_value=[WEATHER_TOOL])), \
+         patch("src.agent.nodes.config.AGENT_TOOL_CALLING", "native"):
+        result = await agent_node({"messages": [HumanMessage(content="Weather in Paris?")]})
+
+    assert "AVAILABLE TOOLS" in llm.ainvoke.await_args.args[0][0].content
+    assert result["tool_calls"] == [{"tool": "get_weather", "args": {"city": "Paris"}}]
+
+@pytest.mark.asyncio
+async def test_tool_node_answers_native_calls_with_tool_messages():
+    from unittest.mock import AsyncMock
+    from langchain_core.messages import ToolMessage
+    from src.agent.nodes import tool_node
+    from src.tools.mcp_manager import mcp_manager
+    from src.tools.tool_registry import ToolEntry, ToolRegistry
+
+    registry = ToolRegistry()
+    registry.register_server("weather", [ToolEntry(server="weather", name="get_weather")])
+    with patch.object(mcp_manager, "registry", registry), \
+         patch.object(mcp_manager, "call_tool", new=AsyncMock(return_value="sunny")) as call_tool:
+        result = await tool_node({"tool_calls": [{"tool": "get_weather", "args": {"city": "Paris"}, "id": "call_1"}]})
+
+    call_tool.assert_awaited_once_with("weather", "get_weather", {"city": "Paris"})
+    [message] = result["messages"]
+    assert isinstance(message, ToolMessage)
+    assert message.tool_call_id == "call_1"
+    assert message.content == "Tool Result: sunny"
+    assert result["tool_calls"] == []
+
+@pytest.mark.asyncio
+async def test_tool_node_runs_calls_concurrently_in_order_with_timeouts():
+    import asyncio
+    import time
+    from src.agent.nodes import tool_node
+    from src.tools.mcp_manager import mcp_manager
+    from src.tools.tool_registry import ToolEntry, ToolRegistry
+
+    registry = ToolRegistry()
+    registry.register_server("srv", [ToolEntry(server="srv", name=n) for n in ("slow", "fast", "hang")])
+    delays = {"slow": 0.2, "fast": 0.1, "hang": 10}
+
+    async def call_tool(server, tool, args):
+        await asyncio.sleep(delays[tool])
+        return tool
+
+    calls = [{"tool": "slow", "args": {}}, {"tool": "fast", "args": {}}, {"tool": "hang", "args": {}}]
+    with patch.object(mcp_manager, "registry", registry), \
+         patch.object(mcp_manager, "call_tool", new=call_tool), \
+         patch("src.agent.nodes.config.TOOL_CALL_TIMEOUT_SECONDS", 0.3):
+        started = time.perf_counter()
+        result = await tool_node({"tool_calls": calls})
+        elapsed = time.perf_counter() - started
+
+    assert [m.content for m in result["messages"]] == [
+        "Tool Result: slow", "Tool Result: fast", "Error executing tool: 'hang' timed out after 0.3s"]
+    assert elapsed < 0.5
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from src.agent.nodes import ReflectionNode
+from src.agent.reflection_gate import ReflectionGate
+from src.agent.settings_store import SettingsStore
+
+def test_obvious_answers_are_scored_by_heuristics():
+    gate = ReflectionGate(margin=0.15)
+    assert gate.pre_score("What is AI?", "", 0.7)[0] == 0.0
+    assert gate.pre_score("What is AI?", "Error: tool crashed", 0.7)[0] == 0.1
+    assert gate.pre_score("hello!", "Hi! How can I help you today?", 0.7)[0] == 0.9
+    # Nothing obvious about a regular answer: the reflector decides
+    assert gate.pre_score("What is AI?", "AI stands for Artificial Intelligence.", 0.7) is None
+
+    stats = gate.stats()
+    assert stats["avoided_heuristic"] == 3
+    assert stats["reflector_calls"] == 1
+    assert stats["reflector_calls_avoided"] == 3
+
+def test_heuristic_inside_uncertain_band_defers_to_reflector():
+    gate = ReflectionGate(margin=0.15)
+    # A refusal scores 0.3, which is inside [0.2, 0.5) for threshold 0.35
+    assert gate.pre_score("Delete prod", "I'm sorry, I can't do that.", 0.35) is None
+    assert gate.pre_score("Delete prod", "I'm sorry, I can't do that.", 0.7)[0] == 0.3
+
+def test_local_model_score_is_used_outside_the_band():
+    gate = ReflectionGate(margin=0.1, local_model_type="fast")
+    with patch("src.agent.model_factory.ModelFactory.get_model") as mock_get_model:
+        mock_get_model.return_value.invoke.return_value = AIMessage(content='{"score": 0.95, "reason": "fine"}')
+        score, reason = gate.pre_score("What is AI?", "AI stands for Artificial Intelligence.", 0.7)
+        mock_get_model.assert_called_with("fast")
+        assert score == 0.95
+
+        mock_get_model.return_value.invoke.return_value = AIMessage(content='{"score": 0.72, "reason": "meh"}')
+        assert gate.pre_score("What is ML?", "Machine learning.", 0.7) is None
+
+def test_reflection_node_reuses_previous_verdict():
+    node = ReflectionNode(gate=ReflectionGate())
+    state = {
+        "messages": [HumanMessage(content="What is AI?"), AIMessage(content="AI stands for Artificial Intelligence.")],
+        "retry_count": 0,
+    }
+    # Defaults only: the shared store would read whatever a local Neo4j holds
+    store = SettingsStore(load=lambda: {}, read_version=lambda: 0)
+    with patch("src.agent.nodes.settings_store", store), \
+         patch("src.agent.nodes.ModelFactory.get_model") as mock_get_model:
+        mock_get_model.return_value.invoke.return_value = AIMessage(content='{"score": 0.9, "reason": "ok"}')
+        assert node(state)["reflection_score"] == 0.9
+        assert node(state)["reflection_score"] == 0.9
+        assert mock_get_model.return_value.invoke.call_count == 1
+    assert node.gate.stats()["avoided_cached"] == 1
+    assert store.stats()["loads"] == 1 and store.stats()["load_failures"] == 0
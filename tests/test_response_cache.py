@@ -0,0 +1,57 @@
+import pytest
+from src.agent.response_cache import SemanticResponseCache
+
+class FakeEmbeddings:
+    """Maps known texts to fixed vectors; counts calls."""
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        query = text.split("\n---\n", 1)[1]
+        return self.vectors[query]
+
+VECTORS = {
+    "what is ai?": [1.0, 0.0, 0.0],
+    "what is AI?": [0.99, 0.05, 0.0],
+    "weather today": [0.0, 1.0, 0.0],
+}
+
+@pytest.mark.asyncio
+async def test_accepted_answer_is_served_for_similar_query():
+    cache = SemanticResponseCache(embeddings=FakeEmbeddings(VECTORS), threshold=0.95)
+
+    miss = await cache.lookup("what is ai?", "sys", "ws1")
+    assert miss.answer is None
+    stored = await cache.store("what is ai?", "sys", "ws1", "Artificial Intelligence", 0.9, 0.8, vector=miss.vector)
+    assert stored
+
+    hit = await cache.lookup("what is AI?", "sys", "ws1")
+    assert hit.answer == "Artificial Intelligence"
+    assert (await cache.lookup("weather today", "sys", "ws1")).answer is None
+    # Other workspaces never see the entry
+    assert (await cache.lookup("what is ai?", "sys", "ws2")).answer is None
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_rejected_answers_are_not_cached():
+    cache = SemanticResponseCache(embeddings=FakeEmbeddings(VECTORS))
+    assert not await cache.store("what is ai?", "sys", "ws1", "meh", 0.5, 0.8)
+    assert cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_ttl_lru_and_workspace_invalidation():
+    cache = SemanticResponseCache(embeddings=FakeEmbeddings(VECTORS), max_entries=2, ttl_seconds=0)
+    await cache.store("what is ai?", "sys", "ws1", "a", 1.0, 0.8)
+    await cache.store("weather today", "sys", "ws1", "b", 1.0, 0.8)
+    await cache.store("what is AI?", "sys", "ws2", "c", 1.0, 0.8)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evicted"] == 1
+
+    # ttl_seconds=0: everything is expired on the next lookup
+    assert (await cache.lookup("weather today", "sys", "ws1")).answer is None
+    assert cache.stats()["expired"] == 1
+
+    assert cache.invalidate_workspace("ws2") == 1
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools.result_cache import ToolResultCache, parse_cache_rules, tool_cache_ttl
+
+class Server:
+    def __init__(self, delay=0.01):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(content=f"result {self.calls}", isError=False)
+
+@pytest.mark.asyncio
+async def test_single_flight_and_canonical_args():
+    cache, server = ToolResultCache(max_size=8, rules=[]), Server()
+    results = await asyncio.gather(*(
+        cache.get_or_call("web", "search", {"q": "x", "n": 1} if i % 2 else {"n": 1, "q": "x"}, 60, server)
+        for i in range(5)
+    ))
+    again = await cache.get_or_call("web", "search", {"q": "x", "n": 1}, 60, server)
+
+    assert server.calls == 1
+    assert {r.content for r in results} == {again.content} == {"result 1"}
+    stats = cache.stats()["tools"]["web__search"]
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+    assert stats["hit_rate"] == pytest.approx(5 / 6)
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_lru_eviction_and_errors_are_not_cached():
+    cache, server = ToolResultCache(max_size=1, rules=[]), Server(delay=0)
+    await cache.get_or_call("s", "t", {"a": 1}, 0.01, server)
+    await asyncio.sleep(0.02)
+    await cache.get_or_call("s", "t", {"a": 1}, 60, server)
+    assert server.calls == 2
+    assert cache.stats()["tools"]["s__t"]["expired"] == 1
+
+    await cache.get_or_call("s", "t", {"a": 2}, 60, server)  # evicts {"a": 1}
+    await cache.get_or_call("s", "t", {"a": 1}, 60, server)
+    assert server.calls == 4
+    assert cache.stats()["evictions"] == 2
+
+    async def failing():
+        return SimpleNamespace(content="boom", isError=True)
+    await cache.get_or_call("s", "broken", {}, 60, failing)
+    assert cache.stats()["size"] == 1
+
+@pytest.mark.asyncio
+async def test_follower_retries_when_leader_is_cancelled():
+    cache, server = ToolResultCache(rules=[]), Server(delay=0.05)
+    leader = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, server))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_call("s", "t", {}, 60, server))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    result = await follower
+    assert result.content == "result 2"
+    assert server.calls == 2
+
+def test_rules_and_declared_ttls():
+    cache = ToolResultCache(rules=parse_cache_rules("search_web=300,github__get_*,slow_tool=0", 60))
+    assert cache.ttl_for("search_web", "web__search_web") == 300
+    assert cache.ttl_for("get_issue", "github__get_issue") == 60
+    assert cache.ttl_for("slow_tool", "x__slow_tool", declared_ttl=30) is None
+    assert cache.ttl_for("other", "x__other", declared_ttl=30) == 30
+
+    read_only = SimpleNamespace(meta=None, annotations=SimpleNamespace(readOnlyHint=True, idempotentHint=True))
+    assert tool_cache_ttl(SimpleNamespace(meta={"cache_ttl": 120}, annotations=None), 60, False) == 120
+    assert tool_cache_ttl(read_only, 60, cache_read_only=False) is None
+    assert tool_cache_ttl(read_only, 60, cache_read_only=True) == 60
@@ -0,0 +1,93 @@
+import pytest
+from mcp.types import CallToolResult, ImageContent, TextContent
+
+from src.tools.result_store import READ_RESULT_TOOL, ToolResultStore, render_result
+
+def test_render_result_describes_binary_content():
+    result = CallToolResult(content=[
+        TextContent(type="text", text="chart:"),
+        ImageContent(type="image", data="A" * 1000, mimeType="image/png"),
+    ])
+
+    assert "".join(render_result(result)) == "chart:\n[image: image/png, 1000 base64 chars]"
+    assert "".join(render_result("plain")) == "plain"
+
+def test_small_results_pass_through_unstored():
+    store = ToolResultStore(max_chars=100)
+
+    assert store.bound(["short ", "result"], "web__search") == "short result"
+    assert store.stats()["entries"] == 0
+
+def test_large_result_is_excerpted_and_paged():
+    store = ToolResultStore(max_chars=100, page_chars=150)
+    text = "".join(f"line {i:03d}\n" for i in range(100))  # 9 chars per line
+
+    message = store.bound([text], "fs__read_file")
+    excerpt, note = message.rsplit("\n[Truncated", 1)
+    assert text.startswith(excerpt) and len(excerpt) <= 100
+    assert excerpt.endswith("line 010")  # cut at a line break
+    assert READ_RESULT_TOOL in note and f"of {len(text)}" in note
+    [handle] = [h for h in store._data]
+
+    pages, offset = [], len(excerpt)
+    while True:
+        page = store.read(handle, offset, limit=10_000)  # capped at page_chars
+        body, footer = page.rsplit("\n[", 1)
+        pages.append(body)
+        if footer.startswith("End"):
+            break
+        offset = int(footer.rsplit("next offset ", 1)[1].rstrip(".]"))
+        assert len(body) <= 150
+    assert excerpt + "".join(pages) == text
+
+def test_unknown_handle_and_eviction():
+    store = ToolResultStore(max_chars=10, max_total_chars=50)
+    for i in range(5):
+        store.bound(["x" * 20], "t")
+
+    assert store.stats()["entries"] == 2
+    assert store.stats()["evictions"] == 3
+    assert store.read("result:missing").startswith("Error: no stored tool result")
+
+@pytest.mark.asyncio
+async def test_tool_node_truncates_and_serves_pages():
+    from unittest.mock import AsyncMock, patch
+    from src.agent.nodes import tool_node
+    from src.tools.mcp_manager import mcp_manager
+    from src.tools.tool_registry import ToolEntry, ToolRegistry
+
+    registry = ToolRegistry()
+    registry.register_server("fs", [ToolEntry(server="fs", name="read_file")])
+    big = CallToolResult(content=[TextContent(type="text", text="y" * 5000)])
+    store = ToolResultStore(max_chars=1000, page_chars=1000)
+    with patch.object(mcp_manager, "registry", registry), \
+         patch.object(mcp_manager, "call_tool", new=AsyncMock(return_value=big)), \
+         patch("src.agent.nodes.tool_result_store", store):
+        first = await tool_node({"tool_calls": [{"tool": "read_file", "args": {"path": "a"}}]})
+        [handle] = list(store._data)
+        second = await tool_node({"tool_calls": [{"tool": READ_RESULT_TOOL, "args": {"handle": handle, "offset": 1000}}]})
+
+    assert len(first["messages"][0].content) < 1300
+    assert first["messages"][0].content.startswith("Tool Result: " + "y" * 1000)
+    assert second["messages"][0].content.startswith("y" * 1000 + "\n[Characters 1000-2000 of 5000")
+
+@pytest.mark.asyncio
+async def test_malformed_read_calls_become_error_messages():
+    from unittest.mock import patch
+    from src.agent.nodes import tool_node
+
+    store = ToolResultStore(max_chars=10, page_chars=10)
+    handle = store.put("z" * 100, "fs__read_file")
+    calls = [
+        {"tool": READ_RESULT_TOOL, "args": {"handle": handle, "offset": "next"}},
+        {"tool": READ_RESULT_TOOL, "args": {"handle": handle, "limit": [5]}},
+        {"tool": READ_RESULT_TOOL, "args": "result:abc"},
+        {"tool": READ_RESULT_TOOL, "args": {"handle": 42}},
+    ]
+    with patch("src.agent.nodes.tool_result_store", store):
+        result = await tool_node({"tool_calls": calls})
+
+    contents = [m.content for m in result["messages"]]
+    assert all(content.startswith("Error:") for content in contents)
+    assert "offset='next'" in contents[0]
+    assert store.read(handle, 0, -3).startswith("z")
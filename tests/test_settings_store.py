@@ -0,0 +1,54 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.settings_store import SettingsStore
+
+def test_snapshot_parses_settings_once_and_defaults_missing_ones():
+    load = MagicMock(return_value={"version": 3, "agent_config_max_retries": "5", "agent_config_pass_threshold": "oops"})
+    store = SettingsStore(load=load, read_version=lambda: 3)
+
+    for _ in range(100):
+        settings = store.current()
+    assert load.call_count == 1
+    assert (settings.version, settings.max_retries, settings.pass_threshold, settings.reflection_threshold) == (3, 5, 0.8, 0.7)
+
+def test_publish_swaps_snapshot_and_notifies_subscribers():
+    store = SettingsStore(load=lambda: {"version": 1}, read_version=lambda: 1)
+    seen = []
+    store.subscribe(lambda snapshot: seen.append(snapshot.version))
+    before = store.current()
+
+    store.publish({"version": 2, "agent_config_reflection_threshold": 0.6})
+
+    assert store.current().reflection_threshold == 0.6
+    assert before.reflection_threshold == 0.7  # readers holding the old snapshot are unaffected
+    assert seen == [2]
+    # An older version read late does not roll the snapshot back
+    store.publish({"version": 1})
+    assert store.current().version == 2
+
+def test_unreachable_database_falls_back_to_defaults():
+    store = SettingsStore(load=MagicMock(side_effect=ConnectionError("down")), read_version=lambda: 0)
+    settings = store.current()
+    assert settings.version is None and settings.max_retries == 3
+    assert store.current() is settings
+    assert store.stats()["load_failures"] == 1
+
+@pytest.mark.asyncio
+async def test_watch_reloads_when_another_worker_bumps_the_version():
+    saved = {"version": 1}
+    store = SettingsStore(load=lambda: dict(saved), read_version=lambda: saved["version"])
+    store.current()
+    watcher = asyncio.create_task(store.watch(interval=0.01))
+    try:
+        saved.update(version=2, agent_config_max_retries=1)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if store.current().version == 2:
+                break
+    finally:
+        watcher.cancel()
+    assert store.current().max_retries == 1
+    assert store.stats()["loads"] == 2
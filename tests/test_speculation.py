@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.speculation import SpeculationStats, race_fast_smart
+
+class SlowModel:
+    """Answers after `delay` seconds; remembers whether it was cancelled."""
+    def __init__(self, content, delay, tokens=100, error=None):
+        self.content = content
+        self.delay = delay
+        self.tokens = tokens
+        self.error = error
+        self.cancelled = False
+
+    async def ainvoke(self, messages):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.content, usage_metadata={
+            "input_tokens": self.tokens, "output_tokens": 0, "total_tokens": self.tokens,
+        })
+
+PROMPT = [HumanMessage(content="What is AI?")]
+
+async def accept_all(response):
+    return True
+
+async def reject_all(response):
+    return False
+
+@pytest.mark.asyncio
+async def test_accepted_fast_answer_cancels_smart():
+    stats = SpeculationStats()
+    fast, smart = SlowModel("fast", 0.01), SlowModel("smart", 1.0)
+
+    response, winner = await race_fast_smart(PROMPT, fast, smart, accept_all, stats)
+
+    assert (response.content, winner) == ("fast", "fast")
+    assert smart.cancelled
+    assert stats.fast_accepted == 1 and stats.cancelled == 1
+    assert stats.wasted_tokens == 2  # estimated prompt of the cancelled smart call
+
+@pytest.mark.asyncio
+async def test_rejected_fast_answer_waits_for_smart():
+    stats = SpeculationStats()
+    fast, smart = SlowModel("fast", 0.01, tokens=40), SlowModel("smart", 0.05)
+
+    response, winner = await race_fast_smart(PROMPT, fast, smart, reject_all, stats)
+
+    assert (response.content, winner) == ("smart", "smart")
+    assert stats.fast_rejected == 1
+    assert stats.wasted_tokens == 40
+
+@pytest.mark.asyncio
+async def test_smart_first_wins_and_failures_fall_back():
+    stats = SpeculationStats()
+    fast, smart = SlowModel("fast", 1.0), SlowModel("smart", 0.01)
+    response, winner = await race_fast_smart(PROMPT, fast, smart, accept_all, stats)
+    assert winner == "smart" and fast.cancelled and stats.smart_first == 1
+
+    # Smart fails: the fast answer is still returned
+    fast, smart = SlowModel("fast", 0.05), SlowModel("smart", 0.01, error=RuntimeError("down"))
+    response, winner = await race_fast_smart(PROMPT, fast, smart, reject_all, stats)
+    assert (response.content, winner) == ("fast", "fast")
+    assert stats.smart_errors == 1
+
+    fast = SlowModel("fast", 0.01, error=RuntimeError("down"))
+    smart = SlowModel("smart", 0.02, error=RuntimeError("down too"))
+    with pytest.raises(RuntimeError, match="down too"):
+        await race_fast_smart(PROMPT, fast, smart, accept_all, stats)
@@ -0,0 +1,38 @@
+from src.agent.tool_calls import ToolCallParser, extract_tool_calls
+
+def test_separates_multiple_json_blocks():
+    text = (
+        'Here is the data: {"items": [1, 2]}\n'
+        '```json\n{"tool": "search_web", "args": {"query": "a } in a string"}}\n```\n'
+        'and then {"tool": "read_file", "args": {"path": "/tmp/x"}}'
+    )
+    assert extract_tool_calls(text) == [
+        {"tool": "search_web", "args": {"query": "a } in a string"}},
+        {"tool": "read_file", "args": {"path": "/tmp/x"}},
+    ]
+
+def test_ignores_prose_braces_and_finds_nested_call():
+    assert extract_tool_calls('Use {braces} freely. {"plan": {"tool": "x"}, oops}') == [{"tool": "x", "args": {}}]
+    assert extract_tool_calls("No tools needed.") == []
+
+def test_limit_stops_early():
+    assert extract_tool_calls('{"tool": "a"} {"tool": "b"}', limit=1) == [{"tool": "a", "args": {}}]
+
+def test_incremental_feed_across_chunk_boundaries():
+    parser = ToolCallParser()
+    chunks = ['Calling {"to', 'ol": "get_weather", "args": {"city": "Par\\', '"is"}}', " done"]
+    found = [call for chunk in chunks for call in parser.feed(chunk)]
+    assert found == [{"tool": "get_weather", "args": {"city": 'Par"is'}}]
+
+def test_unbalanced_prose_brace_does_not_hide_later_calls():
+    assert extract_tool_calls('The set {a, b is open. {"tool": "x", "args": {}}') == [{"tool": "x", "args": {}}]
+
+def test_quotes_braces_and_backslashes_in_prose_do_not_hide_calls():
+    call = '{"tool": "x", "args": {}}'
+    assert extract_tool_calls('The pipe is 5" long. ' + call) == [{"tool": "x", "args": {}}]
+    assert extract_tool_calls('a } b ' + call) == [{"tool": "x", "args": {}}]
+    assert extract_tool_calls('See C:\\' + call) == [{"tool": "x", "args": {}}]
+    # Same prose arriving in chunks while streaming
+    parser = ToolCallParser()
+    found = [c for chunk in ['He said "hi', ' } ', call[:10], call[10:]] for c in parser.feed(chunk)]
+    assert found == [{"tool": "x", "args": {}}]
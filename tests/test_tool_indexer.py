@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+
+from src.tools.tool_indexer import ToolIndexer, tool_point_id
+from src.tools.tool_matrix import ToolMatrix
+
+def tool(name, description="does things", args=None):
+    return SimpleNamespace(name=name, description=description, args=args or {"type": "object"})
+
+def fake_embed():
+    async def embed(texts):
+        return [[float(len(t)), 1.0] for t in texts]
+    return AsyncMock(side_effect=embed)
+
+@pytest.mark.asyncio
+async def test_reconnect_only_embeds_changes_and_removes_stale_tools():
+    indexer = ToolIndexer(matrix=ToolMatrix(), client=AsyncQdrantClient(location=":memory:"))
+
+    with patch("src.tools.tool_indexer.embedding_service.embed_documents", new=fake_embed()) as embed:
+        first = await indexer.index_tools([tool("search"), tool("fetch")], server_name="web")
+        assert first["added"] == ["fetch", "search"]
+
+        # Reconnect with the same catalog: nothing to embed or write
+        again = await indexer.index_tools([tool("search"), tool("fetch")], server_name="web")
+        assert again == {"server": "web", "added": [], "updated": [], "removed": 0, "unchanged": 2}
+        assert embed.await_count == 1
+
+        diff = await indexer.index_tools([tool("search", "searches the web"), tool("crawl")], server_name="web")
+        assert diff["added"] == ["crawl"] and diff["updated"] == ["search"] and diff["removed"] == 1
+        assert embed.await_args.args[0][0].startswith("Tool Name: search")
+        assert len(embed.await_args.args[0]) == 2
+
+    assert (await indexer.client.count("mcp_tools")).count == 2
+    assert sorted(indexer.matrix.ids()) == sorted([tool_point_id("web", "search"), tool_point_id("web", "crawl")])
+    # Same tool name on another server is a different point
+    assert tool_point_id("web", "search") != tool_point_id("files", "search")
+
+@pytest.mark.asyncio
+async def test_unchanged_tools_missing_from_matrix_are_loaded_without_embedding():
+    client = AsyncQdrantClient(location=":memory:")
+    with patch("src.tools.tool_indexer.embedding_service.embed_documents", new=fake_embed()) as embed:
+        await ToolIndexer(matrix=ToolMatrix(), client=client).index_tools([tool("search")], server_name="web")
+
+        cold = ToolIndexer(matrix=ToolMatrix(), client=client)
+        diff = await cold.index_tools([tool("search")], server_name="web")
+
+    assert diff["unchanged"] == 1 and embed.await_count == 1
+    assert len(cold.matrix) == 1
+
+    await cold.delete_all_tools()
+    assert len(cold.matrix) == 0
+    assert not await client.collection_exists("mcp_tools")
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.tools.tool_matrix import ToolMatrix
+
+def payload(name):
+    return {"tool_name": name}
+
+def test_search_returns_best_matches_first():
+    matrix = ToolMatrix(initial_capacity=2)
+    matrix.upsert(["a", "b", "c"], [[1, 0, 0], [0, 1, 0], [0.7, 0.7, 0]], [payload("a"), payload("b"), payload("c")])
+
+    results = matrix.search([1, 0.1, 0], k=2)
+
+    assert [p["tool_name"] for p, _ in results] == ["a", "c"]
+    assert results[0][1] == pytest.approx(1 / np.linalg.norm([1, 0.1, 0]), rel=1e-5)
+    assert matrix.stats()["capacity"] >= 3
+
+def test_incremental_upsert_and_remove_keep_rows_consistent():
+    matrix = ToolMatrix()
+    matrix.upsert(["a", "b", "c"], [[1, 0], [0, 1], [-1, 0]], [payload("a"), payload("b"), payload("c")])
+
+    assert matrix.remove(["a", "missing"]) == 1
+    # 'c' moved into a's row; its vector must have moved with it
+    assert matrix.search([-1, 0], k=1)[0][0]["tool_name"] == "c"
+
+    matrix.upsert(["b"], [[1, 0]], [payload("b2")])
+    assert len(matrix) == 2
+    assert matrix.search([1, 0], k=1)[0][0]["tool_name"] == "b2"
+
+    with pytest.raises(ValueError):
+        matrix.upsert(["d"], [[1, 0, 0]], [payload("d")])
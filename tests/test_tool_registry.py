@@ -0,0 +1,36 @@
+import pytest
+
+from src.tools.tool_registry import AmbiguousToolError, ToolEntry, ToolRegistry
+
+def entries(server, *names):
+    return [ToolEntry(server=server, name=name) for name in names]
+
+def test_resolves_unique_and_qualified_names():
+    registry = ToolRegistry()
+    registry.register_server("github", entries("github", "create_issue", "search"))
+    registry.register_server("my docs", entries("my docs", "search"))
+
+    assert registry.resolve("create_issue").server == "github"
+    assert registry.resolve("github__create_issue").server == "github"
+    assert registry.resolve("my_docs__search").server == "my docs"
+    assert registry.resolve("missing") is None
+    with pytest.raises(AmbiguousToolError) as excinfo:
+        registry.resolve("search")
+    assert excinfo.value.candidates == ["github__search", "my_docs__search"]
+
+    assert registry.public_name("github", "create_issue") == "create_issue"
+    assert registry.public_name("github", "search") == "github__search"
+    assert registry.stats() == {"servers": 2, "tools": 3, "ambiguous_names": 1}
+
+def test_reconnect_and_disconnect_replace_a_server_atomically():
+    registry = ToolRegistry()
+    registry.register_server("a", entries("a", "x", "y"))
+    registry.register_server("b", entries("b", "y"))
+
+    registry.register_server("a", entries("a", "z"))
+    assert registry.resolve("x") is None
+    assert registry.resolve("y").server == "b"
+
+    assert registry.unregister_server("b") is True
+    assert registry.resolve("y") is None
+    assert [e.name for e in registry.server_tools("a")] == ["z"]
@@ -0,0 +1,121 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.tools.tool_matrix import ToolMatrix
+from src.tools.tool_router import SemanticToolRouter
+from src.utils.cache import LRUCache
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+@pytest.fixture
+def router():
+    matrix = ToolMatrix()
+    matrix.upsert(["w"], [[1.0, 0.0]], [{"tool_name": "get_weather", "description": "Weather"}])
+    router = SemanticToolRouter(top_k=1, cache_size=8, matrix=matrix)
+    with patch.object(matrix, "search_ids", wraps=matrix.search_ids) as search:
+        router.search_spy = search
+        yield router
+
+@pytest.mark.asyncio
+async def test_repeated_query_skips_embedding_and_search(router):
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])) as embed:
+        first = await router.route("weather in Paris")
+        second = await router.route("weather in Paris")
+
+    assert first == second == [{"name": "get_weather", "description": "Weather"}]
+    assert embed.await_count == 1
+    assert router.search_spy.call_count == 1
+    assert router.cache_stats()["shortlists"]["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_reindex_drops_shortlists_but_keeps_embeddings(router):
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])) as embed:
+        await router.route("weather in Paris")
+        router.invalidate()
+        await router.route("weather in Paris")
+
+    assert embed.await_count == 1
+    assert router.search_spy.call_count == 2
+    assert router.cache_stats()["embeddings"]["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_matrix_changes_drop_shortlists(router):
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])):
+        assert [t["name"] for t in await router.route("weather in Paris")] == ["get_weather"]
+        router.matrix.upsert(["f"], [[1.0, 0.1]], [{"tool_name": "get_forecast", "description": "Forecast"}])
+        router.matrix.remove(["w"])
+        assert [t["name"] for t in await router.route("weather in Paris")] == ["get_forecast"]
+
+    assert router.search_spy.call_count == 2
+    assert router.cache_stats()["shortlists"]["hits"] == 0
+
+@pytest.mark.asyncio
+async def test_named_tool_skips_embedding(router):
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock()) as embed:
+        tools = await router.route("call get_weather for Paris")
+
+    assert [t["name"] for t in tools] == ["get_weather"]
+    embed.assert_not_awaited()
+    assert router.cache_stats()["routes"]["name_fast_path"] == 1
+
+@pytest.mark.asyncio
+async def test_plain_word_tool_name_leads_a_hybrid_shortlist():
+    matrix = ToolMatrix()
+    matrix.upsert(
+        ["f", "r", "b"], [[0.0, 1.0], [1.0, 0.0], [0.7, 0.3]],
+        [{"tool_name": "fetch", "description": "Fetch a URL"},
+         {"tool_name": "query_reports", "description": "Latest revenue figures"},
+         {"tool_name": "list_buckets", "description": "List S3 buckets"}],
+    )
+    router = SemanticToolRouter(top_k=2, cache_size=8, matrix=matrix)
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])) as embed:
+        tools = await router.route("fetch me the latest sales numbers")
+
+    # 'fetch' is an ordinary word here: the query is still embedded and the vector ranking fills the slots
+    assert [t["name"] for t in tools] == ["fetch", "query_reports"]
+    embed.assert_awaited_once()
+    assert router.cache_stats()["routes"]["name_fast_path"] == 0
+
+@pytest.mark.asyncio
+async def test_lexical_match_outranks_close_vector_neighbour():
+    matrix = ToolMatrix()
+    matrix.upsert(
+        ["a", "b"], [[1.0, 0.0], [0.9, 0.1]],
+        [{"tool_name": "list_files", "description": "List files in a folder"},
+         {"tool_name": "list_buckets", "description": "List S3 buckets"}],
+    )
+    router = SemanticToolRouter(top_k=1, cache_size=8, matrix=matrix)
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])):
+        tools = await router.route("show my s3 buckets")
+
+    assert [t["name"] for t in tools] == ["list_buckets"]
+    assert router.cache_stats()["routes"]["hybrid"] == 1
+
+@pytest.mark.asyncio
+async def test_allow_list_limits_routing_to_the_agents_tools():
+    matrix = ToolMatrix()
+    matrix.upsert(
+        ["w", "s"], [[1.0, 0.0], [0.8, 0.2]],
+        [{"tool_name": "get_weather", "server_name": "meteo", "description": "Weather"},
+         {"tool_name": "search_web", "server_name": "web", "description": "Search the web"}],
+    )
+    router = SemanticToolRouter(top_k=1, cache_size=8, matrix=matrix)
+    with patch("src.tools.tool_router.embedding_service.embed_query", new=AsyncMock(return_value=[1.0, 0.0])):
+        everything = await router.route("weather in Paris")
+        allowed = await router.route("weather in Paris", frozenset({"web__search_web"}))
+        named = await router.route("call get_weather", frozenset({"search_web"}))
+        nothing = await router.route("weather in Paris", frozenset({"not_connected"}))
+
+    assert [t["name"] for t in everything] == ["get_weather"]
+    assert [t["name"] for t in allowed] == ["search_web"]
+    assert [t["name"] for t in named] == ["search_web"]
+    assert nothing == []